@@ -1,11 +1,16 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, BackgroundTasks, Response, Header, UploadFile, File, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, FileResponse
+from fastapi.responses import StreamingResponse, FileResponse, JSONResponse
+from fastapi.encoders import jsonable_encoder
+from starlette.datastructures import MutableHeaders
+from starlette.background import BackgroundTask
 from motor.motor_asyncio import AsyncIOMotorClient
-from pydantic import BaseModel, Field, validator
-from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+from pymongo import IndexModel, ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import OperationFailure
+from pydantic import BaseModel, Field, validator, ValidationError
+from typing import List, Optional, Dict, Any, Tuple, Callable, Awaitable, AsyncIterator, BinaryIO, Union, Deque
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from dotenv import load_dotenv
 import os
@@ -16,11 +21,26 @@ import json
 import asyncio
 import httpx
 import google.generativeai as genai
+from openai import AsyncOpenAI
 from enum import Enum
+from abc import ABC, abstractmethod
 import bcrypt
 import io
 import base64
 import secrets
+import time
+import re
+import zlib
+import hashlib
+import itertools
+import bisect
+import csv
+import zipfile
+import shutil
+import tempfile
+import math
+from array import array
+from collections import deque
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Table, TableStyle
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -32,12 +52,39 @@ from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.enum.text import PP_ALIGN
 from pptx.dml.color import RGBColor
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import nsdecls, qn
 from docx import Document
-from docx.shared import Inches as DocxInches
+from docx.shared import Pt as DocxPt, RGBColor as DocxRGBColor
+from docx.oxml.ns import qn as docx_qn
+from docx.enum.style import WD_STYLE_TYPE
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 import aiosmtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from email.utils import format_datetime, parsedate_to_datetime
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+from html.parser import HTMLParser
+from collections import OrderedDict
+from urllib.parse import urlparse, urljoin
+import codecs
+import ipaddress
+import sys
+import argparse
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
 # Import email templates
 try:
     from email_templates import *
@@ -90,10 +137,16 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+# Index management
+ENSURE_INDEXES_ON_STARTUP = os.environ.get('ENSURE_INDEXES_ON_STARTUP', 'true').lower() == 'true'
+
 # AI Configuration
 DEEPSEEK_API_KEY = os.environ.get('DEEPSEEK_API_KEY')
 DEEPSEEK_BASE_URL = os.environ.get('DEEPSEEK_BASE_URL', 'https://api.deepseek.com')
 GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
+OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
+OPENAI_BASE_URL = os.environ.get('OPENAI_BASE_URL')
+OPENAI_MODEL = os.environ.get('OPENAI_MODEL', 'gpt-4o-mini')
 DEMO_MODE = os.environ.get('DEMO_MODE', 'true').lower() == 'true'
 
 # Email Configuration
@@ -105,12 +158,97 @@ SMTP_FROM_NAME = os.environ.get('SMTP_FROM_NAME', 'Somna AI')
 SMTP_FROM_EMAIL = os.environ.get('SMTP_FROM_EMAIL', 'noreply@somna-ai.com')
 FRONTEND_URL = os.environ.get('FRONTEND_URL', 'http://localhost:3000')
 
+# Structured output
+DEFAULT_FRAMEWORK_MAX_TOKENS = int(os.environ.get('FRAMEWORK_MAX_TOKENS', '1200'))
+FRAMEWORK_TOKEN_BUDGET_SCALE = float(os.environ.get('FRAMEWORK_TOKEN_BUDGET_SCALE', '1.0'))
+
+# Semantic result reuse
+SEMANTIC_INDEX_ENABLED = os.environ.get('SEMANTIC_INDEX_ENABLED', 'true').lower() == 'true'
+SEMANTIC_INDEX_PATH = os.environ.get('SEMANTIC_INDEX_PATH')  # Optional snapshot file
+SEMANTIC_SUGGEST_THRESHOLD = float(os.environ.get('SEMANTIC_SUGGEST_THRESHOLD', '0.6'))
+SEMANTIC_REUSE_THRESHOLD = float(os.environ.get('SEMANTIC_REUSE_THRESHOLD', '0.9'))
+SEMANTIC_REUSE_SCOPE = os.environ.get('SEMANTIC_REUSE_SCOPE', 'user')  # "user" or "global"
+
+# URL enrichment
+URL_FETCH_ENABLED = os.environ.get('URL_FETCH_ENABLED', 'true').lower() == 'true'
+URL_FETCH_TIMEOUT = float(os.environ.get('URL_FETCH_TIMEOUT', '10'))
+URL_FETCH_MAX_BYTES = int(os.environ.get('URL_FETCH_MAX_BYTES', str(512 * 1024)))
+URL_FETCH_ALLOW_PRIVATE = os.environ.get('URL_FETCH_ALLOW_PRIVATE', 'false').lower() == 'true'
+URL_SUMMARY_CHARS = int(os.environ.get('URL_SUMMARY_CHARS', '1500'))
+URL_CACHE_SIZE = int(os.environ.get('URL_CACHE_SIZE', '256'))
+
+# Results storage
+RESULTS_STORAGE_MODE = os.environ.get('RESULTS_STORAGE_MODE', 'inline')  # "inline" or "compressed"
+RESULTS_COMPRESSION_LEVEL = int(os.environ.get('RESULTS_COMPRESSION_LEVEL', '6'))
+
+# Response compression
+COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', '6'))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '4'))
+
+# History search
+SEARCH_INDEX_MAX_USERS = int(os.environ.get('SEARCH_INDEX_MAX_USERS', '1000'))
+# Analyses read per query while building or catching up a user's search index
+SEARCH_INDEX_PAGE = 500
+SEARCH_TEXT_CHARS = int(os.environ.get('SEARCH_TEXT_CHARS', '4000'))
+
+# Provider routing
+PROVIDER_STATS_WINDOW = int(os.environ.get('PROVIDER_STATS_WINDOW', '100'))
+PROVIDER_MIN_SAMPLES = int(os.environ.get('PROVIDER_MIN_SAMPLES', '5'))
+
+# Analysis scheduling and batch submission
+ANALYSIS_MAX_CONCURRENT = int(os.environ.get('ANALYSIS_MAX_CONCURRENT', '8'))
+BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', '1000'))
+
+# Document exports
+EXPORT_WORKERS = int(os.environ.get('EXPORT_WORKERS', str(min(4, os.cpu_count() or 1))))
+EXPORT_MAX_PENDING = int(os.environ.get('EXPORT_MAX_PENDING', str(EXPORT_WORKERS * 4)))
+# Pending slots bulk exports cannot take, so single exports are not turned away during a bulk run
+EXPORT_INTERACTIVE_RESERVE = int(os.environ.get('EXPORT_INTERACTIVE_RESERVE', str(EXPORT_WORKERS)))
+EXPORT_RENDER_TIMEOUT = float(os.environ.get('EXPORT_RENDER_TIMEOUT', '60'))
+EXPORT_RETRY_AFTER = int(os.environ.get('EXPORT_RETRY_AFTER', '5'))
+# Uncached renders larger than this spill from worker memory to a temp file
+EXPORT_SPOOL_MAX_BYTES = int(os.environ.get('EXPORT_SPOOL_MAX_BYTES', str(8 * 1024 * 1024)))
+EXPORT_BULK_MAX_ANALYSES = int(os.environ.get('EXPORT_BULK_MAX_ANALYSES', '200'))
+EXPORT_CACHE_ENABLED = os.environ.get('EXPORT_CACHE_ENABLED', 'true').lower() == 'true'
+EXPORT_CACHE_DIR = os.environ.get('EXPORT_CACHE_DIR') or os.path.join(tempfile.gettempdir(), "somna_export_cache")
+EXPORT_CACHE_MAX_BYTES = int(os.environ.get('EXPORT_CACHE_MAX_BYTES', str(1024 * 1024 * 1024)))
+# Exports rendered into the cache as soon as an analysis completes; empty disables
+EXPORT_PRERENDER_FORMATS = [fmt.strip() for fmt in os.environ.get('EXPORT_PRERENDER_FORMATS', 'pdf').split(',') if fmt.strip()]
+EXPORT_PRERENDER_STYLES = [style.strip() for style in os.environ.get('EXPORT_PRERENDER_STYLES', 'designed').split(',') if style.strip()]
+# Branded master templates for PPTX/DOCX exports; empty uses the built-in defaults
+EXPORT_PPTX_TEMPLATE = os.environ.get('EXPORT_PPTX_TEMPLATE', '')
+EXPORT_DOCX_TEMPLATE = os.environ.get('EXPORT_DOCX_TEMPLATE', '')
+
+# Progress streaming
+PROGRESS_QUEUE_SIZE = int(os.environ.get('PROGRESS_QUEUE_SIZE', '1000'))
+PROGRESS_KEEPALIVE_SECONDS = float(os.environ.get('PROGRESS_KEEPALIVE_SECONDS', '15'))
+
 if GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
 
+# Password hashing
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '12'))
+BCRYPT_WORKERS = int(os.environ.get('BCRYPT_WORKERS', str(min(4, os.cpu_count() or 1))))
+
 # JWT Configuration
 JWT_SECRET = os.environ.get('JWT_SECRET', 'somna_ai_jwt_secret_key_2024_secure_random_string')
 JWT_EXPIRES_IN = os.environ.get('JWT_EXPIRES_IN', '7d')
+# Embed profile claims in tokens so authenticated requests skip the user lookup.
+# Deleted users and password resets then only take effect when the token expires.
+JWT_USER_CLAIMS = os.environ.get('JWT_USER_CLAIMS', 'false').lower() == 'true'
+
+# Authenticated user cache
+USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', '10000'))
+USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', '60'))
+
+# Public platform statistics
+STATS_CACHE_TTL = float(os.environ.get('STATS_CACHE_TTL', '30'))
+
+# Operational metrics are served only to requests carrying this token in X-Metrics-Token;
+# empty disables the endpoint
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
 
 # Create FastAPI app
 app = FastAPI(
@@ -138,6 +276,7 @@ class AnalysisType(str, Enum):
 class AIModel(str, Enum):
     DEEPSEEK = "deepseek"
     GEMINI = "gemini"
+    OPENAI = "openai"
 
 # Email Service
 class EmailService:
@@ -237,6 +376,7 @@ class BusinessAnalysisRequest(BaseModel):
     ai_models: List[AIModel] = [AIModel.DEEPSEEK, AIModel.GEMINI]
     consensus_mode: bool = True
     depth: str = "comprehensive"
+    reuse_similar: bool = False  # Reuse a near-duplicate completed analysis instead of re-running
     
     @validator('business_input')
     def validate_business_input(cls, v):
@@ -253,53 +393,697 @@ class BusinessAnalysis(BaseModel):
     confidence_score: float = 0.0
     status: str = "pending"  # pending, processing, completed, failed, cancelled
     error: Optional[str] = None
+    reused_from: Optional[str] = None
+    url_context: Optional[Dict[str, Any]] = None
+    summary: Dict[str, Any] = {}  # Precomputed listing fields, see build_analysis_summary
+    batch_id: Optional[str] = None
+    version: int = 0  # Bumped on every update; part of the ETag
+    similar_analyses: List[Dict[str, Any]] = []
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+# Analysis frameworks and structured output schemas
+ANALYSIS_FRAMEWORKS = [
+    "swot_analysis",
+    "pestel_analysis", 
+    "porter_five_forces",
+    "business_model_canvas",
+    "vrio_framework",
+    "bcg_matrix",
+    "competitive_landscape",
+    "customer_segmentation",
+    "financial_analysis",
+    "break_even_analysis",
+    "unit_economics",
+    "revenue_model",
+    "risk_assessment",
+    "scenario_analysis",
+    "market_intelligence",
+    "go_to_market_strategy",
+    "trend_analysis",
+    "benchmarking",
+    "kpi_dashboard",
+    "process_mapping",
+    "value_stream_mapping",
+    "lean_six_sigma",
+    "capacity_planning",
+    "cost_benefit_analysis",
+    "working_capital_analysis"
+]
+
+STRING = {"type": "string"}
+NUMBER = {"type": "number"}
+STRING_LIST = {"type": "array", "items": STRING}
+
+def object_schema(properties: Dict[str, Any], required: Optional[List[str]] = None) -> Dict[str, Any]:
+    return {"type": "object", "properties": properties, "required": required if required is not None else list(properties)}
+
+FACTOR_LIST = {
+    "type": "array",
+    "items": object_schema({
+        "factor": STRING,
+        "impact": {"type": "string", "enum": ["high", "medium", "low"]},
+        "confidence": NUMBER,
+        "evidence": STRING
+    }, required=["factor"])
+}
+
+def section_schema(**properties) -> Dict[str, Any]:
+    """Schema for frameworks without a fixed shape: summary, findings, recommendations plus extras"""
+    return object_schema(
+        {"summary": STRING, "key_findings": FACTOR_LIST, "recommendations": STRING_LIST, **properties},
+        required=["summary", "key_findings", "recommendations"]
+    )
+
+PESTEL_FACTOR = object_schema({
+    "factors": STRING_LIST,
+    "impact_score": NUMBER,
+    "trend_direction": STRING,
+    "key_considerations": STRING_LIST
+}, required=["factors", "impact_score"])
+
+PORTER_FORCE = object_schema({
+    "intensity": STRING,
+    "score": NUMBER,
+    "key_factors": STRING_LIST,
+    "strategic_implications": STRING
+}, required=["intensity", "score"])
+
+SCENARIO = object_schema({"description": STRING, "probability": NUMBER, "revenue_impact": STRING}, required=["description"])
+
+FRAMEWORK_SCHEMAS: Dict[str, Dict[str, Any]] = {
+    "swot_analysis": object_schema({
+        "strengths": FACTOR_LIST,
+        "weaknesses": FACTOR_LIST,
+        "opportunities": FACTOR_LIST,
+        "threats": FACTOR_LIST
+    }),
+    "pestel_analysis": object_schema({
+        key: PESTEL_FACTOR
+        for key in ["political", "economic", "social", "technological", "environmental", "legal"]
+    }),
+    "porter_five_forces": object_schema({
+        key: PORTER_FORCE
+        for key in ["competitive_rivalry", "threat_of_new_entrants", "supplier_power", "buyer_power", "threat_of_substitutes"]
+    }),
+    "business_model_canvas": object_schema({
+        key: STRING_LIST
+        for key in [
+            "customer_segments", "value_propositions", "channels", "customer_relationships",
+            "revenue_streams", "key_activities", "key_resources", "key_partnerships", "cost_structure"
+        ]
+    }),
+    "vrio_framework": object_schema({
+        "resources": {
+            "type": "array",
+            "items": object_schema({
+                "resource": STRING,
+                "valuable": {"type": "boolean"},
+                "rare": {"type": "boolean"},
+                "inimitable": {"type": "boolean"},
+                "organized": {"type": "boolean"},
+                "competitive_implication": STRING
+            }, required=["resource"])
+        },
+        "recommendations": STRING_LIST
+    }),
+    "bcg_matrix": object_schema({
+        "stars": STRING_LIST,
+        "cash_cows": STRING_LIST,
+        "question_marks": STRING_LIST,
+        "dogs": STRING_LIST,
+        "recommendations": STRING_LIST
+    }),
+    "competitive_landscape": section_schema(direct_competitors=STRING_LIST, indirect_competitors=STRING_LIST),
+    "customer_segmentation": section_schema(segments=STRING_LIST, personas=STRING_LIST),
+    "financial_analysis": section_schema(metrics={"type": "object"}),
+    "break_even_analysis": section_schema(fixed_costs=STRING, variable_costs=STRING, break_even_point=STRING),
+    "unit_economics": section_schema(cac=STRING, ltv=STRING, ltv_cac_ratio=NUMBER),
+    "revenue_model": section_schema(revenue_streams=STRING_LIST, pricing_strategy=STRING),
+    "risk_assessment": section_schema(risks=FACTOR_LIST),
+    "scenario_analysis": section_schema(best_case=SCENARIO, most_likely=SCENARIO, worst_case=SCENARIO),
+    "market_intelligence": section_schema(tam=STRING, sam=STRING, som=STRING, growth_rate=STRING),
+    "go_to_market_strategy": section_schema(positioning=STRING, channels=STRING_LIST, success_metrics=STRING_LIST),
+    "trend_analysis": section_schema(trends=FACTOR_LIST),
+    "benchmarking": section_schema(gaps=STRING_LIST),
+    "kpi_dashboard": section_schema(kpis=STRING_LIST),
+    "process_mapping": section_schema(core_processes=STRING_LIST, bottlenecks=STRING_LIST),
+    "value_stream_mapping": section_schema(waste=STRING_LIST),
+    "lean_six_sigma": section_schema(dmaic=object_schema({key: STRING for key in ["define", "measure", "analyze", "improve", "control"]}, required=[])),
+    "capacity_planning": section_schema(constraints=STRING_LIST),
+    "cost_benefit_analysis": section_schema(costs=STRING_LIST, benefits=STRING_LIST, npv=STRING, payback_period=STRING),
+    "working_capital_analysis": section_schema(cash_conversion_cycle=STRING)
+}
+
+# Output token budgets, tuned to the size of each schema
+FRAMEWORK_TOKEN_BUDGETS: Dict[str, int] = {
+    "swot_analysis": 1600,
+    "pestel_analysis": 1600,
+    "porter_five_forces": 1400,
+    "business_model_canvas": 1400,
+    "vrio_framework": 1000,
+    "bcg_matrix": 800,
+    "scenario_analysis": 1000,
+    "market_intelligence": 1000,
+    "cost_benefit_analysis": 1000
+}
+
+def framework_max_tokens(framework: str) -> int:
+    return int(FRAMEWORK_TOKEN_BUDGETS.get(framework, DEFAULT_FRAMEWORK_MAX_TOKENS) * FRAMEWORK_TOKEN_BUDGET_SCALE)
+
+def schema_outline(schema: Dict[str, Any]) -> Any:
+    """Compact example of the expected shape, used in prompts instead of the full schema"""
+    expected = schema.get("type")
+    if expected == "object":
+        return {key: schema_outline(subschema) for key, subschema in schema.get("properties", {}).items()}
+    if expected == "array":
+        return [schema_outline(schema.get("items", {}))]
+    if "enum" in schema:
+        return "|".join(schema["enum"])
+    return expected or "any"
+
+def schema_errors(value: Any, schema: Dict[str, Any], path: str = "$") -> List[str]:
+    """Return a list of schema violations for value (empty when valid)"""
+    expected = schema.get("type")
+    if expected == "object":
+        if not isinstance(value, dict):
+            return [f"{path}: expected object"]
+        errors = [f"{path}.{key}: missing" for key in schema.get("required", []) if key not in value]
+        for key, subschema in schema.get("properties", {}).items():
+            if key in value:
+                errors.extend(schema_errors(value[key], subschema, f"{path}.{key}"))
+        return errors
+    if expected == "array":
+        if not isinstance(value, list):
+            return [f"{path}: expected array"]
+        errors = []
+        for index, item in enumerate(value):
+            errors.extend(schema_errors(item, schema.get("items", {}), f"{path}[{index}]"))
+        return errors
+    if expected == "number" and (isinstance(value, bool) or not isinstance(value, (int, float))):
+        return [f"{path}: expected number"]
+    if expected == "boolean" and not isinstance(value, bool):
+        return [f"{path}: expected boolean"]
+    if expected == "string":
+        if not isinstance(value, str):
+            return [f"{path}: expected string"]
+        if "enum" in schema and value not in schema["enum"]:
+            return [f"{path}: expected one of {schema['enum']}"]
+    return []
+
+def normalize_key(key: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '_', str(key).lower()).strip('_')
+
+def repair_value(value: Any, schema: Dict[str, Any]) -> Any:
+    """Cheap, type-directed repair: normalize keys, wrap scalars and coerce obvious mismatches"""
+    expected = schema.get("type")
+    if expected == "object":
+        properties = schema.get("properties", {})
+        if isinstance(value, str) and schema.get("required"):
+            return {schema["required"][0]: value}
+        if not isinstance(value, dict):
+            return value
+        repaired = {}
+        for key, item in value.items():
+            name = normalize_key(key)
+            if name in properties:
+                repaired[name] = repair_value(item, properties[name])
+            else:
+                repaired[key] = item
+        return repaired
+    if expected == "array":
+        if isinstance(value, (str, dict)):
+            value = [value]
+        if isinstance(value, list):
+            return [repair_value(item, schema.get("items", {})) for item in value]
+        return value
+    if expected == "number" and isinstance(value, str):
+        try:
+            return float(value.strip().rstrip('%').replace(',', ''))
+        except ValueError:
+            return value
+    if expected == "boolean" and isinstance(value, str):
+        return value.strip().lower() in ("true", "yes", "y")
+    if expected == "string":
+        if isinstance(value, list):
+            return "; ".join(str(item) for item in value)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+        if "enum" in schema and isinstance(value, str) and value.strip().lower() in schema["enum"]:
+            return value.strip().lower()
+    return value
+
+def validate_framework_result(framework: str, result: Any) -> Tuple[Any, bool]:
+    """Validate a model result against its framework schema, repairing it when cheaply possible"""
+    schema = FRAMEWORK_SCHEMAS.get(framework)
+    if schema is None:
+        return result, True
+    if not schema_errors(result, schema):
+        return result, True
+    
+    repaired = result
+    properties = schema["properties"]
+    if isinstance(repaired, dict) and len(repaired) == 1:
+        key, inner = next(iter(repaired.items()))
+        if isinstance(inner, dict) and normalize_key(key) not in properties:
+            # Unwrap {"swot_analysis": {...}} style wrappers
+            repaired = inner
+        elif key == "analysis" and isinstance(inner, str) and "summary" in properties:
+            repaired = {"summary": inner}
+    if isinstance(repaired, dict) and repaired.get("raw_response") and "summary" in properties:
+        repaired = {"summary": repaired.get("analysis", "")}
+    
+    repaired = repair_value(repaired, schema)
+    return repaired, not schema_errors(repaired, schema)
+
+HEADLINE_CHARS = 140
+
+def build_analysis_summary(comprehensive_results: Dict[str, Any], ai_consensus: Dict[str, Any], confidence_score: float) -> Dict[str, Any]:
+    """Small, precomputed view of a completed analysis for history listings"""
+    headline = ""
+    for framework in ["swot_analysis", *comprehensive_results]:
+        for model_result in (comprehensive_results.get(framework) or {}).values():
+            result = model_result.get("analysis") if isinstance(model_result, dict) else None
+            if not isinstance(result, dict):
+                continue
+            strengths = result.get("strengths")
+            if isinstance(strengths, list) and strengths:
+                first = strengths[0]
+                headline = first.get("factor", "") if isinstance(first, dict) else str(first)
+            elif isinstance(result.get("summary"), str):
+                headline = result["summary"]
+            if headline:
+                break
+        if headline:
+            break
+    if not headline and ai_consensus.get("key_recommendations"):
+        headline = str(ai_consensus["key_recommendations"][0])
+    
+    headline = " ".join(headline.split())
+    if len(headline) > HEADLINE_CHARS:
+        headline = headline[:HEADLINE_CHARS - 1].rstrip() + "…"
+    
+    return {
+        "framework_count": len(comprehensive_results),
+        "confidence_score": confidence_score,
+        "models_used": ai_consensus.get("models_used", []),
+        "headline": headline
+    }
+
+def build_search_text(comprehensive_results: Dict[str, Any]) -> str:
+    """Key result text (factors, summaries, findings) indexed by history search"""
+    parts = []
+    for framework_results in comprehensive_results.values():
+        for model_result in (framework_results or {}).values():
+            result = model_result.get("analysis") if isinstance(model_result, dict) else None
+            if not isinstance(result, dict):
+                continue
+            if isinstance(result.get("summary"), str):
+                parts.append(result["summary"])
+            for key in ("strengths", "weaknesses", "opportunities", "threats", "key_findings"):
+                for item in result.get(key) or []:
+                    if isinstance(item, dict) and isinstance(item.get("factor"), str):
+                        parts.append(item["factor"])
+                    elif isinstance(item, str):
+                        parts.append(item)
+    return " ".join(dict.fromkeys(parts))[:SEARCH_TEXT_CHARS]
+
+# Compressed results storage
+class ResultsCodec:
+    """Stores each framework's results as an individually compressed blob.
+    
+    In compressed mode a completed analysis keeps an empty comprehensive_results and
+    a results_blobs map of framework -> compressed JSON, so readers can project and
+    decompress only the frameworks they need. Inline documents pass through untouched.
+    """
+    def __init__(self, level: int = RESULTS_COMPRESSION_LEVEL):
+        self.level = level
+        self.codec = "zstd" if zstandard is not None else "zlib"
+        self.encoded_raw_bytes = 0
+        self.encoded_bytes = 0
+        self.decoded_blobs = 0
+        self.decode_seconds = 0.0
+    
+    def _compress(self, data: bytes) -> bytes:
+        if self.codec == "zstd":
+            return zstandard.ZstdCompressor(level=self.level).compress(data)
+        return zlib.compress(data, self.level)
+    
+    @staticmethod
+    def _decompress(codec: str, blob: bytes) -> bytes:
+        if codec == "zstd":
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to read zstd-compressed results")
+            return zstandard.ZstdDecompressor().decompress(blob)
+        return zlib.decompress(blob)
+    
+    def storage_fields(self, comprehensive_results: Dict[str, Any]) -> Dict[str, Any]:
+        """Document fields holding comprehensive_results in the configured storage mode"""
+        if RESULTS_STORAGE_MODE != "compressed":
+            return {"comprehensive_results": comprehensive_results}
+        blobs = {}
+        for framework, results in comprehensive_results.items():
+            raw = json.dumps(results, separators=(',', ':'), default=str).encode('utf-8')
+            blobs[framework] = self._compress(raw)
+            self.encoded_raw_bytes += len(raw)
+            self.encoded_bytes += len(blobs[framework])
+        return {
+            "comprehensive_results": {},
+            "results_blobs": blobs,
+            "results_codec": self.codec,
+            "result_frameworks": list(comprehensive_results)
+        }
+    
+    @staticmethod
+    def projection(frameworks: Optional[List[str]] = None) -> Dict[str, int]:
+        """Projection loading results for only the given frameworks (all when None)"""
+        if frameworks is None:
+            return {"comprehensive_results": 1, "results_blobs": 1, "results_codec": 1, "result_frameworks": 1}
+        projection = {"results_codec": 1, "result_frameworks": 1}
+        for framework in frameworks:
+            projection[f"comprehensive_results.{framework}"] = 1
+            projection[f"results_blobs.{framework}"] = 1
+        return projection
+    
+    def decode(self, analysis: Dict[str, Any], frameworks: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Replace stored blobs in analysis with a plain comprehensive_results dict"""
+        blobs = analysis.pop("results_blobs", None)
+        codec = analysis.pop("results_codec", None)
+        analysis.pop("result_frameworks", None)
+        if not blobs:
+            return analysis
+        started = time.perf_counter()
+        results = dict(analysis.get("comprehensive_results") or {})
+        for framework, blob in blobs.items():
+            if frameworks is None or framework in frameworks:
+                results[framework] = json.loads(self._decompress(codec, blob))
+                self.decoded_blobs += 1
+        analysis["comprehensive_results"] = results
+        self.decode_seconds += time.perf_counter() - started
+        return analysis
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": RESULTS_STORAGE_MODE,
+            "codec": self.codec,
+            "compression_ratio": round(self.encoded_raw_bytes / self.encoded_bytes, 2) if self.encoded_bytes else None,
+            "decoded_blobs": self.decoded_blobs,
+            "avg_decode_ms": round(self.decode_seconds / self.decoded_blobs * 1000, 3) if self.decoded_blobs else 0.0
+        }
+
+results_codec = ResultsCodec()
+
+# Analysis progress events
+class ProgressBroker:
+    """In-process fan-out of analysis progress events to live subscribers"""
+    def __init__(self):
+        self.subscribers: Dict[str, List[asyncio.Queue]] = {}
+    
+    def subscribe(self, analysis_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=PROGRESS_QUEUE_SIZE)
+        self.subscribers.setdefault(analysis_id, []).append(queue)
+        return queue
+    
+    def unsubscribe(self, analysis_id: str, queue: asyncio.Queue):
+        queues = self.subscribers.get(analysis_id, [])
+        if queue in queues:
+            queues.remove(queue)
+        if not queues:
+            self.subscribers.pop(analysis_id, None)
+    
+    def publish(self, analysis_id: str, event: Dict[str, Any]):
+        for queue in self.subscribers.get(analysis_id, []):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                logger.warning(f"Progress queue full for analysis {analysis_id}, dropping event")
+
+# Initialize progress broker
+progress_broker = ProgressBroker()
+
+# Streaming JSON parsing
+class IncrementalJSONParser:
+    """Parse a JSON object as it streams in, emitting each top-level member once it is complete.
+    
+    Text before the first '{' (markdown fences, prose) is skipped, so fenced output
+    parses the same as bare JSON.
+    """
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.start = None
+        self.end = None
+        self.member_start = None
+        self.members: Dict[str, Any] = {}
+    
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Consume a chunk of text and return the top-level members it completed"""
+        self.buffer += chunk
+        completed = []
+        while self.pos < len(self.buffer) and self.end is None:
+            ch = self.buffer[self.pos]
+            if self.start is None:
+                if ch == '{':
+                    self.start = self.pos
+                    self.depth = 1
+                    self.member_start = self.pos + 1
+            elif self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch in '{[':
+                self.depth += 1
+            elif ch in '}]':
+                self.depth -= 1
+                if self.depth == 0:
+                    self._complete_member(self.pos, completed)
+                    self.end = self.pos
+            elif ch == ',' and self.depth == 1:
+                self._complete_member(self.pos, completed)
+                self.member_start = self.pos + 1
+            self.pos += 1
+        return completed
+    
+    def _complete_member(self, stop: int, completed: List[Tuple[str, Any]]):
+        text = self.buffer[self.member_start:stop].strip()
+        if not text:
+            return
+        try:
+            member = json.loads("{" + text + "}")
+        except json.JSONDecodeError:
+            # Skip malformed members but keep parsing the rest of the object
+            return
+        for key, value in member.items():
+            self.members[key] = value
+            completed.append((key, value))
+    
+    def finish(self) -> Dict[str, Any]:
+        """Return the best result for everything fed so far"""
+        try:
+            return json.loads(self.buffer)
+        except json.JSONDecodeError:
+            pass
+        if self.start is not None and self.end is not None:
+            try:
+                return json.loads(self.buffer[self.start:self.end + 1])
+            except json.JSONDecodeError:
+                pass
+        if self.members:
+            return dict(self.members)
+        return {"analysis": self.buffer, "raw_response": True}
+
+def parse_json_response(content: str) -> Dict[str, Any]:
+    """Parse a complete model response, tolerating markdown fences and partially valid JSON"""
+    parser = IncrementalJSONParser()
+    parser.feed(content)
+    return parser.finish()
+
 # AI Service Classes
-class DeepSeekService:
+class ProviderStats:
+    """Rolling latency and error statistics for one AI provider"""
+    def __init__(self, window: int = PROVIDER_STATS_WINDOW):
+        self.samples = deque(maxlen=window)
+    
+    def record(self, latency: float, error: bool = False):
+        self.samples.append((latency, error))
+    
+    @property
+    def error_rate(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(1 for _, error in self.samples if error) / len(self.samples)
+    
+    def percentile(self, pct: float) -> float:
+        if not self.samples:
+            return 0.0
+        latencies = sorted(latency for latency, _ in self.samples)
+        index = min(len(latencies) - 1, int(round(pct / 100 * (len(latencies) - 1))))
+        return latencies[index]
+    
+    def score(self) -> float:
+        """Expected cost of routing to this provider; lower is better"""
+        if len(self.samples) < PROVIDER_MIN_SAMPLES:
+            # Not enough data yet - prefer the provider so it gets sampled
+            return 0.0
+        return self.percentile(95) / max(1.0 - self.error_rate, 0.05)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "samples": len(self.samples),
+            "p50_latency": round(self.percentile(50), 3),
+            "p95_latency": round(self.percentile(95), 3),
+            "error_rate": round(self.error_rate, 3)
+        }
+
+class AIProvider(ABC):
+    """Common interface for AI model providers.
+    
+    Subclasses implement _complete(); mock fallback, error handling and latency
+    tracking live here.
+    """
+    name = ""
+    confidence_score = 0.8
+    
+    def __init__(self):
+        self.stats = ProviderStats()
+    
+    def is_configured(self) -> bool:
+        return False
+    
+    async def analyze(
+        self,
+        prompt: str,
+        on_partial: Optional[Callable[[str, Any], Awaitable[None]]] = None,
+        max_tokens: int = DEFAULT_FRAMEWORK_MAX_TOKENS
+    ) -> Dict[str, Any]:
+        if DEMO_MODE or not self.is_configured():
+            return self._get_mock_analysis(prompt)
+        
+        start = time.perf_counter()
+        try:
+            result = await self._complete(prompt, on_partial, max_tokens)
+        except Exception as e:
+            self.stats.record(time.perf_counter() - start, error=True)
+            logger.error(f"{self.name} analysis error: {str(e)}")
+            return self._get_mock_analysis(prompt)
+        
+        self.stats.record(time.perf_counter() - start)
+        return result
+    
+    @abstractmethod
+    async def _complete(
+        self,
+        prompt: str,
+        on_partial: Optional[Callable[[str, Any], Awaitable[None]]],
+        max_tokens: int
+    ) -> Dict[str, Any]:
+        """Call the provider's API and return the parsed JSON result"""
+    
+    def _get_mock_analysis(self, prompt: str) -> Dict[str, Any]:
+        return {"analysis": "Strong market validation with excellent timing."}
+
+class ProviderRegistry:
+    """Registry of AI providers with latency-aware routing"""
+    def __init__(self):
+        self.providers: Dict[str, AIProvider] = {}
+    
+    def register(self, provider: AIProvider):
+        self.providers[provider.name] = provider
+    
+    def get(self, name: str) -> AIProvider:
+        return self.providers[name]
+    
+    def rank(self, allowed: List[str]) -> List[str]:
+        """Allowed providers, best recent p95 latency and error rate first.
+
+        Unconfigured providers answer with mock output and never record stats, so they
+        come after every configured one.
+        """
+        candidates = [name for name in allowed if name in self.providers]
+        if not candidates:
+            raise ValueError("No registered AI provider in the allowed set")
+        return sorted(candidates, key=lambda name: (
+            not self.providers[name].is_configured(),
+            self.providers[name].stats.score()
+        ))
+    
+    def route(self, allowed: List[str]) -> str:
+        """The single provider to use when consensus is off"""
+        return self.rank(allowed)[0]
+    
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {"configured": provider.is_configured(), **provider.stats.snapshot()}
+            for name, provider in self.providers.items()
+        }
+
+class DeepSeekService(AIProvider):
+    name = AIModel.DEEPSEEK.value
+    confidence_score = 0.85
+    
     def __init__(self):
+        super().__init__()
         self.api_key = DEEPSEEK_API_KEY
         self.base_url = DEEPSEEK_BASE_URL
+    
+    def is_configured(self) -> bool:
+        return bool(self.api_key)
         
-    async def analyze(self, prompt: str) -> Dict[str, Any]:
-        if DEMO_MODE or not self.api_key:
-            return self._get_mock_analysis(prompt)
-            
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": "deepseek-chat",
-                        "messages": [
-                            {"role": "system", "content": "You are a professional business analyst. Provide detailed analysis in JSON format."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        "temperature": 0.7,
-                        "max_tokens": 4000
-                    },
-                    timeout=60.0
-                )
+    async def _complete(
+        self,
+        prompt: str,
+        on_partial: Optional[Callable[[str, Any], Awaitable[None]]],
+        max_tokens: int
+    ) -> Dict[str, Any]:
+        """Stream a completion, calling on_partial for each top-level key as soon as it is complete"""
+        async with httpx.AsyncClient() as client:
+            async with client.stream(
+                "POST",
+                f"{self.base_url}/v1/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": "deepseek-chat",
+                    "messages": [
+                        {"role": "system", "content": "You are a professional business analyst. Provide detailed analysis in JSON format."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    "temperature": 0.7,
+                    "max_tokens": max_tokens,
+                    "response_format": {"type": "json_object"},
+                    "stream": True
+                },
+                timeout=60.0
+            ) as response:
+                if response.status_code != 200:
+                    raise RuntimeError(f"DeepSeek API error: {response.status_code}")
                 
-                if response.status_code == 200:
-                    result = response.json()
-                    content = result['choices'][0]['message']['content']
+                parser = IncrementalJSONParser()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
                     try:
-                        return json.loads(content)
-                    except json.JSONDecodeError:
-                        return {"analysis": content, "raw_response": True}
-                else:
-                    logger.error(f"DeepSeek API error: {response.status_code}")
-                    return self._get_mock_analysis(prompt)
-                    
-        except Exception as e:
-            logger.error(f"DeepSeek analysis error: {str(e)}")
-            return self._get_mock_analysis(prompt)
+                        delta = json.loads(data)['choices'][0]['delta'].get('content') or ""
+                    except (json.JSONDecodeError, KeyError, IndexError):
+                        continue
+                    for key, value in parser.feed(delta):
+                        if on_partial:
+                            await on_partial(key, value)
+                
+                return parser.finish()
     
     def _get_mock_analysis(self, prompt: str) -> Dict[str, Any]:
         if "swot" in prompt.lower():
@@ -474,34 +1258,38 @@ class DeepSeekService:
         else:
             return {"analysis": f"Comprehensive {prompt.split('analysis')[0]} analysis completed with high confidence and strategic recommendations for business optimization and growth."}
 
-class GeminiService:
+class GeminiService(AIProvider):
+    name = AIModel.GEMINI.value
+    confidence_score = 0.82
+    
     def __init__(self):
+        super().__init__()
         self.model = None
         if GEMINI_API_KEY:
             try:
                 self.model = genai.GenerativeModel('gemini-1.5-pro')
             except Exception as e:
                 logger.error(f"Failed to initialize Gemini: {e}")
+    
+    def is_configured(self) -> bool:
+        return self.model is not None
         
-    async def analyze(self, prompt: str) -> Dict[str, Any]:
-        if DEMO_MODE or not self.model:
-            return self._get_mock_analysis(prompt)
-            
-        try:
-            response = await asyncio.to_thread(
-                self.model.generate_content,
-                f"You are a business analyst. Provide JSON analysis for: {prompt}"
-            )
-            
-            content = response.text
-            try:
-                return json.loads(content)
-            except json.JSONDecodeError:
-                return {"analysis": content, "raw_response": True}
-                
-        except Exception as e:
-            logger.error(f"Gemini analysis error: {str(e)}")
-            return self._get_mock_analysis(prompt)
+    async def _complete(
+        self,
+        prompt: str,
+        on_partial: Optional[Callable[[str, Any], Awaitable[None]]],
+        max_tokens: int
+    ) -> Dict[str, Any]:
+        response = await asyncio.to_thread(
+            self.model.generate_content,
+            f"You are a business analyst. Provide JSON analysis for: {prompt}",
+            generation_config={
+                "response_mime_type": "application/json",
+                "max_output_tokens": max_tokens
+            }
+        )
+        
+        return parse_json_response(response.text)
     
     def _get_mock_analysis(self, prompt: str) -> Dict[str, Any]:
         if "swot" in prompt.lower():
@@ -526,12 +1314,133 @@ class GeminiService:
         else:
             return {"analysis": "Strong market validation with excellent timing."}
 
+class OpenAIService(AIProvider):
+    name = AIModel.OPENAI.value
+    confidence_score = 0.84
+    
+    def __init__(self):
+        super().__init__()
+        self.client = None
+        if OPENAI_API_KEY:
+            self.client = AsyncOpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL)
+    
+    def is_configured(self) -> bool:
+        return self.client is not None
+    
+    async def _complete(
+        self,
+        prompt: str,
+        on_partial: Optional[Callable[[str, Any], Awaitable[None]]],
+        max_tokens: int
+    ) -> Dict[str, Any]:
+        stream = await self.client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=[
+                {"role": "system", "content": "You are a professional business analyst. Provide detailed analysis in JSON format."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.7,
+            max_tokens=max_tokens,
+            response_format={"type": "json_object"},
+            stream=True,
+            timeout=60.0
+        )
+        
+        parser = IncrementalJSONParser()
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            for key, value in parser.feed(chunk.choices[0].delta.content or ""):
+                if on_partial:
+                    await on_partial(key, value)
+        
+        return parser.finish()
+
+# Initialize AI providers
+provider_registry = ProviderRegistry()
+provider_registry.register(DeepSeekService())
+provider_registry.register(GeminiService())
+provider_registry.register(OpenAIService())
+
 # Password utilities
+class PasswordHasher:
+    """Runs bcrypt in a bounded worker pool so hashing never blocks the event loop.
+    
+    bcrypt releases the GIL while hashing, so threads give real parallelism here.
+    """
+    def __init__(self, workers: int = BCRYPT_WORKERS, rounds: int = BCRYPT_ROUNDS):
+        self.rounds = rounds
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self.workers = workers
+        self.queued = 0
+        self.max_queued = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.total_run = 0.0
+    
+    async def _run(self, func, *args):
+        submitted = time.perf_counter()
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        
+        def timed():
+            started = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                self.total_wait += started - submitted
+                self.total_run += time.perf_counter() - started
+        
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, timed)
+        finally:
+            self.queued -= 1
+            self.completed += 1
+    
+    async def hash(self, password: str) -> str:
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        hashed = await self._run(bcrypt.hashpw, password.encode('utf-8'), salt)
+        return hashed.decode('utf-8')
+    
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(bcrypt.checkpw, password.encode('utf-8'), hashed_password.encode('utf-8'))
+    
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """True when the stored hash was made with a different work factor"""
+        try:
+            return int(hashed_password.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return False
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "rounds": self.rounds,
+            "queue_depth": self.queued,
+            "max_queue_depth": self.max_queued,
+            "completed": self.completed,
+            "avg_wait_ms": round(self.total_wait / self.completed * 1000, 2) if self.completed else 0.0,
+            "avg_run_ms": round(self.total_run / self.completed * 1000, 2) if self.completed else 0.0
+        }
+
+password_hasher = PasswordHasher()
+
 async def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return await password_hasher.hash(password)
 
 async def verify_password(password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+    return await password_hasher.verify(password, hashed_password)
+
+async def rehash_password(user_id: str, password: str):
+    """Re-hash a password with the current work factor after a successful login"""
+    try:
+        await db.users.update_one(
+            {"id": user_id},
+            {"$set": {"password_hash": await hash_password(password)}}
+        )
+        user_cache.invalidate(user_id)
+    except Exception as e:
+        logger.error(f"Failed to rehash password for user {user_id}: {str(e)}")
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -543,6 +1452,57 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, JWT_SECRET, algorithm="HS256")
     return encoded_jwt
 
+def user_token_claims(user: User) -> Dict[str, Any]:
+    claims = {"sub": user.id}
+    if JWT_USER_CLAIMS:
+        claims.update({"name": user.name, "email": user.email, "created_at": user.created_at.isoformat()})
+    return claims
+
+class UserCache:
+    """Bounded TTL/LRU cache of authenticated users keyed by user id"""
+    def __init__(self, max_size: int = USER_CACHE_SIZE, ttl: float = USER_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: "OrderedDict[str, Tuple[float, User]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.claim_hits = 0
+    
+    def get(self, user_id: str) -> Optional[User]:
+        entry = self.entries.get(user_id)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self.entries[user_id]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(user_id)
+        self.hits += 1
+        return entry[1]
+    
+    def put(self, user: User):
+        if self.max_size <= 0:
+            return
+        self.entries[user.id] = (time.monotonic() + self.ttl, user)
+        self.entries.move_to_end(user.id)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+    
+    def invalidate(self, user_id: str):
+        self.entries.pop(user_id, None)
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "token_claim_hits": self.claim_hits,
+            "db_round_trips_saved": self.hits + self.claim_hits
+        }
+
+user_cache = UserCache()
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
         payload = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=["HS256"])
@@ -552,11 +1512,28 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
     
+    if JWT_USER_CLAIMS and all(key in payload for key in ("name", "email", "created_at")):
+        user_cache.claim_hits += 1
+        return User(id=user_id, name=payload["name"], email=payload["email"], created_at=payload["created_at"])
+    
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
+    
     user = await db.users.find_one({"id": user_id})
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
     
-    return User(**user)
+    user = User(**user)
+    user_cache.put(user)
+    return user
+
+async def require_metrics_token(x_metrics_token: Optional[str] = Header(None)):
+    """Operator access to platform-wide metrics; user accounts never see them"""
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_metrics_token is None or not secrets.compare_digest(x_metrics_token.encode(), METRICS_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid metrics token")
 
 # Authentication endpoints
 @api_router.post("/auth/register")
@@ -575,9 +1552,14 @@ async def register(user_data: UserCreate, background_tasks: BackgroundTasks):
     user_dict["password_hash"] = await hash_password(user_data.password)
     
     await db.users.insert_one(user_dict)
+    try:
+        await platform_stats.increment_users()
+    except Exception as e:
+        logger.error(f"Failed to update user counter: {str(e)}")
     
     # Create access token
-    access_token = create_access_token(data={"sub": user_dict["id"]})
+    user = User(**user_dict)
+    access_token = create_access_token(data=user_token_claims(user))
     
     # Send welcome email
     background_tasks.add_task(
@@ -586,8 +1568,6 @@ async def register(user_data: UserCreate, background_tasks: BackgroundTasks):
         user_data.email
     )
     
-    user = User(**user_dict)
-    
     return {
         "access_token": access_token,
         "token_type": "bearer",
@@ -595,13 +1575,17 @@ async def register(user_data: UserCreate, background_tasks: BackgroundTasks):
     }
 
 @api_router.post("/auth/login")
-async def login(user_data: UserLogin):
+async def login(user_data: UserLogin, background_tasks: BackgroundTasks):
     user_record = await db.users.find_one({"email": user_data.email})
     if not user_record or not await verify_password(user_data.password, user_record["password_hash"]):
         raise HTTPException(status_code=401, detail="Incorrect email or password")
     
     user = User(**user_record)
-    access_token = create_access_token(data={"sub": user.id})
+    
+    # Upgrade hashes made with an old work factor
+    if password_hasher.needs_rehash(user_record["password_hash"]):
+        background_tasks.add_task(rehash_password, user.id, user_data.password)
+    access_token = create_access_token(data=user_token_claims(user))
     
     return {
         "access_token": access_token,
@@ -656,6 +1640,7 @@ async def reset_password(request: PasswordReset):
         {"id": reset_record["user_id"]},
         {"$set": {"password_hash": new_password_hash}}
     )
+    user_cache.invalidate(reset_record["user_id"])
     
     # Mark token as used
     await db.password_resets.update_one(
@@ -666,73 +1651,133 @@ async def reset_password(request: PasswordReset):
     return {"message": "Password reset successfully"}
 
 # Document Export Service
+def build_export_styles(style: str) -> Dict[str, Any]:
+    """Stylesheet, paragraph styles and colours for one export style variant"""
+    designed = style == "designed"
+    accent = colors.darkblue if designed else colors.black
+    sheet = getSampleStyleSheet()
+    return {
+        # PDF
+        "sheet": sheet,
+        "title": ParagraphStyle(
+            'CustomTitle',
+            parent=sheet['Title'],
+            fontSize=24,
+            spaceAfter=30,
+            textColor=accent,
+            alignment=1  # Center alignment
+        ),
+        "heading": ParagraphStyle(
+            'CustomHeading',
+            parent=sheet['Heading1'],
+            fontSize=16,
+            spaceAfter=12,
+            textColor=accent
+        ),
+        "watermark": ParagraphStyle(
+            'Watermark',
+            parent=sheet['Normal'],
+            fontSize=8,
+            textColor=colors.lightgrey if designed else colors.black,
+            alignment=2  # Right alignment
+        ),
+        # PPTX
+        "pptx_heading_color": RGBColor(0, 51, 102) if designed else None,
+        "pptx_watermark_color": RGBColor(192, 192, 192) if designed else RGBColor(0, 0, 0),
+        "pptx_watermark_size": Pt(8),
+        "pptx_watermark_box": (Inches(7), Inches(6.5), Inches(2), Inches(0.5)),
+        # DOCX
+        "docx_heading_color": DocxRGBColor(0, 51, 102) if designed else DocxRGBColor(0, 0, 0),
+        "docx_watermark_color": DocxRGBColor(192, 192, 192) if designed else DocxRGBColor(0, 0, 0),
+        "docx_watermark_size": DocxPt(8)
+    }
+
+# Built once per variant and shared by every render in the process; styles are never mutated
+EXPORT_STYLE_REGISTRY = {style: build_export_styles(style) for style in ("designed", "black_and_white")}
+
+def export_styles(style: str) -> Dict[str, Any]:
+    # Anything but "designed" renders black and white
+    return EXPORT_STYLE_REGISTRY.get(style, EXPORT_STYLE_REGISTRY["black_and_white"])
+
+# Bump whenever rendered output changes so cached files and export ETags are not reused
+EXPORT_RENDER_VERSION = 2
+
+# Paragraph styles used by DOCX exports, resolved to style ids once per render
+DOCX_PARAGRAPH_STYLES = ("Title", "Heading 1", "Heading 2", "Heading 3", "List Bullet")
+
+class ExportTemplateError(RuntimeError):
+    """EXPORT_PPTX_TEMPLATE or EXPORT_DOCX_TEMPLATE cannot be used for exports"""
+
 class DocumentExportService:
+    """Renders analyses as PDF, PPTX and DOCX.
+    
+    PPTX and DOCX start from a master template per style: the branded layouts, heading
+    colours and watermark are applied once and the result is parsed once per process.
+    Each render fills in slides or paragraphs on that parsed master and removes them again
+    after saving, so renders in one process must not overlap (export workers run one at
+    a time).
+    """
     def __init__(self):
         self.watermark_text = "Created with Somna AI"
+        self.templates: Dict[Tuple[str, str], bytes] = {}
+        self.masters: Dict[Tuple[str, str], Any] = {}
+    
+    def template(self, fmt: str, style: str) -> bytes:
+        """Serialized master template for a format and style, built on first use"""
+        style = "designed" if style == "designed" else "black_and_white"
+        key = (fmt, style)
+        if key not in self.templates:
+            builder = self._build_pptx_template if fmt == "pptx" else self._build_docx_template
+            buffer = io.BytesIO()
+            builder(style).save(buffer)
+            self.templates[key] = buffer.getvalue()
+        return self.templates[key]
+    
+    def master(self, fmt: str, style: str):
+        """Parsed master template, reused by every render in this process"""
+        key = (fmt, "designed" if style == "designed" else "black_and_white")
+        if key not in self.masters:
+            opener = Presentation if fmt == "pptx" else Document
+            self.masters[key] = opener(io.BytesIO(self.template(fmt, style)))
+        return self.masters[key]
+    
+    def load_templates(self):
+        for fmt in ("pptx", "docx"):
+            for style in EXPORT_STYLE_REGISTRY:
+                self.master(fmt, style)
+    
+    @staticmethod
+    def _clear_slides(prs: Presentation):
+        # python-pptx has no public slide removal
+        slide_ids = prs.element.sldIdLst
+        for slide_id in list(slide_ids if slide_ids is not None else []):
+            prs.part.drop_rel(slide_id.rId)
+            slide_ids.remove(slide_id)
+    
+    @staticmethod
+    def _clear_body(doc: Document):
+        # Section properties hold the page setup, headers and footers
+        body = doc.element.body
+        for child in list(body):
+            if child.tag != docx_qn("w:sectPr"):
+                body.remove(child)
     
     def add_watermark_to_story(self, story, style="designed"):
         """Add watermark to the document story"""
-        if style == "designed":
-            watermark_style = ParagraphStyle(
-                'Watermark',
-                parent=getSampleStyleSheet()['Normal'],
-                fontSize=8,
-                textColor=colors.lightgrey,
-                alignment=2  # Right alignment
-            )
-        else:  # black_and_white
-            watermark_style = ParagraphStyle(
-                'Watermark',
-                parent=getSampleStyleSheet()['Normal'],
-                fontSize=8,
-                textColor=colors.black,
-                alignment=2
-            )
-        
         story.append(Spacer(1, 0.2*inch))
-        story.append(Paragraph(f"<i>{self.watermark_text}</i>", watermark_style))
+        story.append(Paragraph(f"<i>{self.watermark_text}</i>", export_styles(style)["watermark"]))
         
-    def generate_pdf_report(self, analysis: Dict[str, Any], style: str = "designed") -> bytes:
-        """Generate PDF report from analysis"""
-        buffer = io.BytesIO()
+    def generate_pdf_report(self, analysis: Dict[str, Any], style: str = "designed", output: Optional[BinaryIO] = None) -> Optional[bytes]:
+        """Generate PDF report from analysis; written to output if given, otherwise returned"""
+        buffer = output if output is not None else io.BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=A4)
-        styles = getSampleStyleSheet()
+        registry = export_styles(style)
+        styles = registry["sheet"]
+        title_style = registry["title"]
+        heading_style = registry["heading"]
         story = []
         
         # Title page
-        if style == "designed":
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Title'],
-                fontSize=24,
-                spaceAfter=30,
-                textColor=colors.darkblue,
-                alignment=1  # Center alignment
-            )
-            heading_style = ParagraphStyle(
-                'CustomHeading',
-                parent=styles['Heading1'],
-                fontSize=16,
-                spaceAfter=12,
-                textColor=colors.darkblue
-            )
-        else:  # black_and_white
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Title'],
-                fontSize=24,
-                spaceAfter=30,
-                textColor=colors.black,
-                alignment=1
-            )
-            heading_style = ParagraphStyle(
-                'CustomHeading',
-                parent=styles['Heading1'],
-                fontSize=16,
-                spaceAfter=12,
-                textColor=colors.black
-            )
-        
         story.append(Paragraph("Comprehensive Business Analysis Report", title_style))
         story.append(Spacer(1, 0.5*inch))
         story.append(Paragraph(f"Business: {analysis.get('business_input', 'N/A')}", styles['Normal']))
@@ -772,8 +1817,7 @@ class DocumentExportService:
         
         self.add_watermark_to_story(story, style)
         doc.build(story)
-        buffer.seek(0)
-        return buffer.read()
+        return None if output is not None else buffer.getvalue()
     
     def _add_analysis_content(self, story, content, styles):
         """Add comprehensive analysis content to story"""
@@ -816,74 +1860,128 @@ class DocumentExportService:
             # Handle raw response content
             story.append(Paragraph(content.get('analysis', 'No analysis available'), styles['Normal']))
     
-    def generate_pptx_report(self, analysis: Dict[str, Any], style: str = "designed") -> bytes:
-        """Generate PowerPoint report from analysis"""
-        prs = Presentation()
-        
-        # Title slide
-        title_slide_layout = prs.slide_layouts[0]
-        slide = prs.slides.add_slide(title_slide_layout)
-        title = slide.shapes.title
-        subtitle = slide.placeholders[1]
-        
-        title.text = "Business Analysis Report"
-        subtitle.text = f"Business: {analysis.get('business_input', 'N/A')}\nGenerated on: {datetime.now().strftime('%B %d, %Y')}"
-        
-        # Add watermark to title slide
-        self._add_pptx_watermark(slide, style)
-        
-        # Content slides
-        if 'comprehensive_results' in analysis:
-            for framework, results in list(analysis['comprehensive_results'].items())[:10]:  # Limit to 10 frameworks
+    def generate_pptx_report(self, analysis: Dict[str, Any], style: str = "designed", output: Optional[BinaryIO] = None) -> Optional[bytes]:
+        """Generate PowerPoint report from analysis; written to output if given, otherwise returned"""
+        prs = self.master("pptx", style)
+        try:
+            # Title slide
+            title_slide_layout = prs.slide_layouts[0]
+            slide = prs.slides.add_slide(title_slide_layout)
+            title = slide.shapes.title
+            subtitle = slide.placeholders[1]
+            
+            title.text = "Business Analysis Report"
+            subtitle.text = f"Business: {analysis.get('business_input', 'N/A')}\nGenerated on: {datetime.now().strftime('%B %d, %Y')}"
+            
+            # One content slide per framework; heading formatting and the watermark come from the master
+            if 'comprehensive_results' in analysis:
                 content_slide_layout = prs.slide_layouts[1]
-                slide = prs.slides.add_slide(content_slide_layout)
-                title = slide.shapes.title
-                content = slide.placeholders[1]
-                
-                title.text = framework.replace('_', ' ').title()
-                
-                # Add content
-                text_frame = content.text_frame
-                text_frame.clear()
-                
-                if isinstance(results, dict):
-                    for key, value in results.items():
-                        if isinstance(value, dict) and 'analysis' in value:
-                            p = text_frame.add_paragraph()
-                            p.text = f"{key.title()}: "
-                            p.font.bold = True
-                            if style == "designed":
-                                p.font.color.rgb = RGBColor(0, 51, 102)
-                            
-                            self._add_pptx_content(text_frame, value['analysis'])
-                
-                self._add_pptx_watermark(slide, style)
+                for framework, results in analysis['comprehensive_results'].items():
+                    slide = prs.slides.add_slide(content_slide_layout)
+                    title = slide.shapes.title
+                    content = slide.placeholders[1]
+                    
+                    title.text = framework.replace('_', ' ').title()
+                    
+                    # Add content
+                    text_frame = content.text_frame
+                    text_frame.clear()
+                    
+                    if isinstance(results, dict):
+                        for key, value in results.items():
+                            if isinstance(value, dict) and 'analysis' in value:
+                                p = text_frame.add_paragraph()
+                                p.text = f"{key.title()}: "
+                                
+                                self._add_pptx_content(text_frame, value['analysis'])
+            
+            # Save to output, or to a buffer returned as bytes
+            buffer = output if output is not None else io.BytesIO()
+            prs.save(buffer)
+            return None if output is not None else buffer.getvalue()
+        finally:
+            self._clear_slides(prs)
+    
+    def _build_pptx_template(self, style: str) -> Presentation:
+        """Master presentation: heading formats on the layouts and the watermark on the slide master"""
+        try:
+            prs = Presentation(EXPORT_PPTX_TEMPLATE or None)
+        except Exception as e:
+            raise ExportTemplateError(f"Cannot open EXPORT_PPTX_TEMPLATE {EXPORT_PPTX_TEMPLATE}: {str(e)}")
+        self._check_pptx_template(prs)
+        # A template's own slides are samples, not content
+        self._clear_slides(prs)
+        
+        registry = export_styles(style)
+        heading_color = registry["pptx_heading_color"]
+        fill = f'<a:solidFill><a:srgbClr val="{heading_color}"/></a:solidFill>' if heading_color is not None else ""
+        title_layout, content_layout = prs.slide_layouts[0], prs.slide_layouts[1]
+        self._set_pptx_level_format(title_layout.placeholders.get(idx=0), fill=fill)
+        self._set_pptx_level_format(content_layout.placeholders.get(idx=0), fill=fill)
+        # Level 0 of the body holds the model names
+        self._set_pptx_level_format(content_layout.placeholders.get(idx=1), fill=fill, bold=True)
         
-        # Save to buffer
-        buffer = io.BytesIO()
-        prs.save(buffer)
-        buffer.seek(0)
-        return buffer.read()
-    
-    def _add_pptx_watermark(self, slide, style):
-        """Add watermark to PowerPoint slide"""
-        left = Inches(7)
-        top = Inches(6.5)
-        width = Inches(2)
-        height = Inches(0.5)
+        self._add_pptx_watermark(prs.slide_master, style)
+        return prs
+    
+    @staticmethod
+    def _check_pptx_template(prs: Presentation):
+        """Reject templates without the layouts and placeholders the generator fills in"""
+        required = (("title", {0, 1}), ("title-and-content", {0, 1}))
+        if len(prs.slide_layouts) < len(required):
+            raise ExportTemplateError(
+                f"EXPORT_PPTX_TEMPLATE {EXPORT_PPTX_TEMPLATE} needs a title layout first and a title-and-content layout second"
+            )
+        for index, (name, placeholders) in enumerate(required):
+            layout = prs.slide_layouts[index]
+            missing = placeholders - {placeholder.placeholder_format.idx for placeholder in layout.placeholders}
+            if missing:
+                raise ExportTemplateError(
+                    f"EXPORT_PPTX_TEMPLATE {EXPORT_PPTX_TEMPLATE}: layout {index} ('{layout.name}', used as the {name} layout) "
+                    f"has no placeholder with idx {', '.join(str(idx) for idx in sorted(missing))}"
+                )
+    
+    @staticmethod
+    def _set_pptx_level_format(placeholder, fill: str = "", bold: bool = False):
+        """Default run formatting for the first outline level of a layout placeholder.
         
-        textbox = slide.shapes.add_textbox(left, top, width, height)
+        python-pptx has no API for list styles, so this edits the placeholder's XML.
+        """
+        tx_body = placeholder.element.txBody
+        lst_style = tx_body.find(qn("a:lstStyle"))
+        if lst_style is None:
+            lst_style = parse_xml(f"<a:lstStyle {nsdecls('a')}/>")
+            tx_body.find(qn("a:bodyPr")).addnext(lst_style)
+        existing = lst_style.find(qn("a:lvl1pPr"))
+        if existing is not None:
+            lst_style.remove(existing)
+        bold_attribute = ' b="1"' if bold else ""
+        level = parse_xml(f"<a:lvl1pPr {nsdecls('a')}><a:defRPr{bold_attribute}>{fill}</a:defRPr></a:lvl1pPr>")
+        default = lst_style.find(qn("a:defPPr"))
+        if default is not None:
+            default.addnext(level)
+        else:
+            lst_style.insert(0, level)
+    
+    def _add_pptx_watermark(self, slide_master, style):
+        """Add the watermark to the slide master so it shows on every slide"""
+        registry = export_styles(style)
+        # Master shape trees cannot add shapes; build the textbox on a scratch slide and move it
+        scratch = Presentation()
+        textbox = scratch.slides.add_slide(scratch.slide_layouts[6]).shapes.add_textbox(*registry["pptx_watermark_box"])
         text_frame = textbox.text_frame
         text_frame.clear()
         
-        p = text_frame.add_paragraph()
+        p = text_frame.paragraphs[0]
         p.text = self.watermark_text
-        p.font.size = Pt(8)
-        if style == "designed":
-            p.font.color.rgb = RGBColor(192, 192, 192)
-        else:
-            p.font.color.rgb = RGBColor(0, 0, 0)
+        p.font.size = registry["pptx_watermark_size"]
+        p.font.color.rgb = registry["pptx_watermark_color"]
         p.alignment = PP_ALIGN.RIGHT
+        
+        spTree = slide_master.element.cSld.spTree
+        textbox.element.nvSpPr.cNvPr.id = max(int(shape_id) for shape_id in spTree.xpath("//p:cNvPr/@id")) + 1
+        textbox.name = "Watermark"
+        spTree.insert_element_before(textbox.element, "p:extLst")
     
     def _add_pptx_content(self, text_frame, content):
         """Add content to PowerPoint text frame"""
@@ -903,105 +2001,917 @@ class DocumentExportService:
                             p.text = f"• {item}"
                         p.level = 2
     
-    def generate_docx_report(self, analysis: Dict[str, Any], style: str = "designed") -> bytes:
-        """Generate Word document report from analysis"""
-        doc = Document()
-        
-        # Title
-        title = doc.add_heading('Comprehensive Business Analysis Report', 0)
-        # Don't set color for now - there's a compatibility issue between pptx and docx RGBColor
+    def generate_docx_report(self, analysis: Dict[str, Any], style: str = "designed", output: Optional[BinaryIO] = None) -> Optional[bytes]:
+        """Generate Word document report from analysis; written to output if given, otherwise returned"""
+        doc = self.master("docx", style)
+        try:
+            style_ids = {name: doc.styles[name].style_id for name in DOCX_PARAGRAPH_STYLES}
+            
+            # Title
+            self._add_docx_paragraph(doc, 'Comprehensive Business Analysis Report', style_ids["Title"])
+            
+            # Business info
+            doc.add_paragraph(f"Business: {analysis.get('business_input', 'N/A')}")
+            doc.add_paragraph(f"Generated on: {datetime.now().strftime('%B %d, %Y')}")
+            doc.add_paragraph()
+            
+            # Add analysis sections
+            if 'comprehensive_results' in analysis:
+                for framework, results in analysis['comprehensive_results'].items():
+                    self._add_docx_paragraph(doc, framework.replace('_', ' ').title(), style_ids["Heading 1"])
+                    
+                    if isinstance(results, dict):
+                        for key, value in results.items():
+                            if isinstance(value, dict) and 'analysis' in value:
+                                self._add_docx_paragraph(doc, key.title(), style_ids["Heading 2"])
+                                
+                                self._add_docx_content(doc, value['analysis'], style_ids)
+            
+            # AI Consensus
+            if 'ai_consensus' in analysis:
+                self._add_docx_paragraph(doc, 'AI Consensus & Recommendations', style_ids["Heading 1"])
+                
+                consensus = analysis['ai_consensus']
+                doc.add_paragraph(f"Overall Confidence Score: {consensus.get('consensus_score', 'N/A')}")
+                
+                if 'key_recommendations' in consensus:
+                    self._add_docx_paragraph(doc, "Key Recommendations:", style_ids["Heading 2"])
+                    for rec in consensus['key_recommendations']:
+                        self._add_docx_paragraph(doc, rec, style_ids["List Bullet"])
+            
+            # Save to output, or to a buffer returned as bytes
+            buffer = output if output is not None else io.BytesIO()
+            doc.save(buffer)
+            return None if output is not None else buffer.getvalue()
+        finally:
+            self._clear_body(doc)
+    
+    def _build_docx_template(self, style: str) -> Document:
+        """Master document: heading colours in the styles and the watermark in the footer"""
+        try:
+            doc = Document(EXPORT_DOCX_TEMPLATE or None)
+        except Exception as e:
+            raise ExportTemplateError(f"Cannot open EXPORT_DOCX_TEMPLATE {EXPORT_DOCX_TEMPLATE}: {str(e)}")
+        missing = [
+            name for name in DOCX_PARAGRAPH_STYLES
+            if name not in doc.styles or doc.styles[name].type != WD_STYLE_TYPE.PARAGRAPH
+        ]
+        if missing:
+            raise ExportTemplateError(f"EXPORT_DOCX_TEMPLATE {EXPORT_DOCX_TEMPLATE} has no paragraph style {', '.join(missing)}")
+        # Keep a template's styles, headers and footers but none of its body
+        self._clear_body(doc)
         
-        # Business info
-        doc.add_paragraph(f"Business: {analysis.get('business_input', 'N/A')}")
-        doc.add_paragraph(f"Generated on: {datetime.now().strftime('%B %d, %Y')}")
-        doc.add_paragraph()
-        
-        # Add watermark
+        registry = export_styles(style)
+        for name in DOCX_PARAGRAPH_STYLES[:4]:
+            doc.styles[name].font.color.rgb = registry["docx_heading_color"]
         self._add_docx_watermark(doc, style)
-        
-        # Add analysis sections
-        if 'comprehensive_results' in analysis:
-            for framework, results in analysis['comprehensive_results'].items():
-                heading = doc.add_heading(framework.replace('_', ' ').title(), level=1)
-                # Don't set color for now
-                
-                if isinstance(results, dict):
-                    for key, value in results.items():
-                        if isinstance(value, dict) and 'analysis' in value:
-                            subheading = doc.add_heading(key.title(), level=2)
-                            # Don't set color for now
-                            
-                            self._add_docx_content(doc, value['analysis'])
-        
-        # AI Consensus
-        if 'ai_consensus' in analysis:
-            heading = doc.add_heading('AI Consensus & Recommendations', level=1)
-            # Don't set color for now
-            
-            consensus = analysis['ai_consensus']
-            doc.add_paragraph(f"Overall Confidence Score: {consensus.get('consensus_score', 'N/A')}")
-            
-            if 'key_recommendations' in consensus:
-                doc.add_paragraph("Key Recommendations:", style='Heading 2')
-                for rec in consensus['key_recommendations']:
-                    doc.add_paragraph(rec, style='List Bullet')
-        
-        # Add final watermark
-        self._add_docx_watermark(doc, style)
-        
-        # Save to buffer
-        buffer = io.BytesIO()
-        doc.save(buffer)
-        buffer.seek(0)
-        return buffer.read()
+        return doc
     
     def _add_docx_watermark(self, doc, style):
-        """Add watermark to Word document"""
-        paragraph = doc.add_paragraph()
-        run = paragraph.add_run(f"\n{self.watermark_text}")
-        run.font.size = DocxInches(0.1)
-        # Don't set color for now due to compatibility issues
-        paragraph.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-    
-    def _add_docx_content(self, doc, content):
+        """Add watermark to the footer of every section"""
+        registry = export_styles(style)
+        for section in doc.sections:
+            footer = section.footer
+            # Reuse the empty paragraph a new footer starts with
+            paragraph = footer.paragraphs[-1] if footer.paragraphs and not footer.paragraphs[-1].text else footer.add_paragraph()
+            run = paragraph.add_run(self.watermark_text)
+            run.font.size = registry["docx_watermark_size"]
+            run.font.color.rgb = registry["docx_watermark_color"]
+            paragraph.alignment = WD_ALIGN_PARAGRAPH.RIGHT
+    
+    @staticmethod
+    def _add_docx_paragraph(doc, text: str, style_id: str):
+        paragraph = doc.add_paragraph(text)
+        # The public paragraph.style setter scans every style in the document on each call
+        # (most of the DOCX render time); the id was resolved once and is written directly
+        paragraph._p.style = style_id
+        return paragraph
+    
+    def _add_docx_content(self, doc, content, style_ids: Dict[str, str]):
         """Add content to Word document"""
         if isinstance(content, dict):
             for key, value in content.items():
                 if isinstance(value, list):
-                    doc.add_paragraph(f"{key.replace('_', ' ').title()}:", style='Heading 3')
+                    self._add_docx_paragraph(doc, f"{key.replace('_', ' ').title()}:", style_ids["Heading 3"])
                     for item in value:
                         if isinstance(item, dict):
                             factor = item.get('factor', str(item))
-                            doc.add_paragraph(factor, style='List Bullet')
+                            self._add_docx_paragraph(doc, factor, style_ids["List Bullet"])
                         else:
-                            doc.add_paragraph(str(item), style='List Bullet')
+                            self._add_docx_paragraph(doc, str(item), style_ids["List Bullet"])
                 elif isinstance(value, str):
                     doc.add_paragraph(f"{key.replace('_', ' ').title()}: {value}")
         elif isinstance(content, str):
             doc.add_paragraph(content)
 
+# URL Enrichment Service
+URL_PATTERN = re.compile(r'(https?://[^\s<>"\']+|www\.[^\s<>"\']+)', re.IGNORECASE)
+
+class PageTextExtractor(HTMLParser):
+    """Collect title, meta description and visible text from HTML fed in chunks"""
+    SKIP_TAGS = {"script", "style", "noscript", "svg", "template", "iframe"}
+    
+    def __init__(self, max_chars: int):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.title = ""
+        self.description = ""
+        self.parts: List[str] = []
+        self.length = 0
+        self.skip_depth = 0
+        self.in_title = False
+    
+    @property
+    def full(self) -> bool:
+        return self.length >= self.max_chars
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag == "title":
+            self.in_title = True
+        elif tag == "meta" and not self.description:
+            attrs = dict(attrs)
+            name = (attrs.get("name") or attrs.get("property") or "").lower()
+            if name in ("description", "og:description"):
+                self.description = " ".join((attrs.get("content") or "").split())
+    
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+        elif tag == "title":
+            self.in_title = False
+    
+    def handle_data(self, data):
+        if self.in_title:
+            self.title += data
+            return
+        if self.skip_depth or self.full:
+            return
+        text = " ".join(data.split())
+        if text:
+            self.parts.append(text)
+            self.length += len(text) + 1
+    
+    def summary(self) -> Dict[str, str]:
+        return {
+            "title": " ".join(self.title.split()),
+            "description": self.description,
+            "text": " ".join(self.parts)[:self.max_chars]
+        }
+
+class UrlEnrichmentService:
+    """Fetch pages referenced in business_input and summarize them for the prompt context.
+    
+    Uses one pooled client, revalidates cached pages with conditional GETs (ETag /
+    Last-Modified) and stops reading once enough text has been extracted.
+    """
+    MAX_REDIRECTS = 3
+    
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None, allow_private: bool = URL_FETCH_ALLOW_PRIVATE):
+        self.transport = transport
+        self.allow_private = allow_private
+        self.client: Optional[httpx.AsyncClient] = None
+        self.cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                transport=self.transport,
+                timeout=URL_FETCH_TIMEOUT,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+                headers={"User-Agent": "SomnaAI-Enrichment/1.0", "Accept": "text/html,application/xhtml+xml,text/plain"}
+            )
+        return self.client
+    
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+    
+    @staticmethod
+    def extract_url(business_input: str) -> Optional[str]:
+        match = URL_PATTERN.search(business_input)
+        if not match:
+            return None
+        url = match.group(0).rstrip('.,;:!?)]')
+        if not url.lower().startswith(("http://", "https://")):
+            url = f"https://{url}"
+        return url
+    
+    async def _resolve_public(self, host: str) -> Optional[str]:
+        """Resolve host once; returns an address to connect to, or None if any address is non-public"""
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, None)
+        except OSError:
+            return None
+        addresses = [ipaddress.ip_address(info[4][0]) for info in infos]
+        for ip in addresses:
+            if ip.is_private or ip.is_loopback or ip.is_link_local or ip.is_reserved or ip.is_multicast:
+                return None
+        return str(addresses[0]) if addresses else None
+    
+    async def _pinned_request(self, url: str, headers: Dict[str, str]) -> Optional[Tuple[str, Dict[str, str], Dict[str, Any]]]:
+        """URL, headers and extensions that connect to the address that was checked.
+        
+        Connecting to the vetted IP (with the original Host header and TLS SNI) closes the
+        gap where DNS could be rebound to a private address between the check and the
+        connection. Returns None when the host is not allowed.
+        """
+        parsed = urlparse(url)
+        host = parsed.hostname
+        if not host:
+            return None
+        if self.allow_private:
+            return url, headers, {}
+        address = await self._resolve_public(host)
+        if address is None:
+            return None
+        ip_host = f"[{address}]" if ":" in address else address
+        netloc = f"{ip_host}:{parsed.port}" if parsed.port else ip_host
+        return (
+            parsed._replace(netloc=netloc).geturl(),
+            {**headers, "Host": parsed.netloc.rsplit("@", 1)[-1]},
+            {"sni_hostname": host}
+        )
+    
+    async def fetch_summary(self, url: str) -> Optional[Dict[str, Any]]:
+        """Fetch url (following a few redirects) and return a compact page summary"""
+        client = self._get_client()
+        for _ in range(self.MAX_REDIRECTS + 1):
+            cached = self.cache.get(url)
+            headers = {}
+            if cached and cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached and cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+            
+            pinned = await self._pinned_request(url, headers)
+            if pinned is None:
+                logger.warning(f"Refusing to fetch non-public URL {url}")
+                return None
+            request_url, headers, extensions = pinned
+            
+            async with client.stream("GET", request_url, headers=headers, extensions=extensions) as response:
+                if response.is_redirect and "location" in response.headers:
+                    url = urljoin(url, response.headers["location"])
+                    continue
+                if response.status_code == 304 and cached:
+                    self.cache.move_to_end(url)
+                    return cached["summary"]
+                if response.status_code != 200:
+                    logger.warning(f"URL enrichment got {response.status_code} for {url}")
+                    return None
+                content_type = response.headers.get("content-type", "text/html").lower()
+                if "html" not in content_type and "text" not in content_type:
+                    return None
+                
+                extractor = PageTextExtractor(URL_SUMMARY_CHARS)
+                decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+                received = 0
+                async for chunk in response.aiter_bytes():
+                    received += len(chunk)
+                    extractor.feed(decoder.decode(chunk))
+                    if extractor.full or received >= URL_FETCH_MAX_BYTES:
+                        break
+                extractor.feed(decoder.decode(b"", final=True))
+                
+                summary = {"url": url, **extractor.summary()}
+                etag = response.headers.get("etag")
+                last_modified = response.headers.get("last-modified")
+                if etag or last_modified:
+                    self.cache[url] = {"etag": etag, "last_modified": last_modified, "summary": summary}
+                    self.cache.move_to_end(url)
+                    while len(self.cache) > URL_CACHE_SIZE:
+                        self.cache.popitem(last=False)
+                return summary
+        
+        logger.warning(f"Too many redirects fetching {url}")
+        return None
+    
+    async def enrich(self, business_input: str) -> Optional[Dict[str, Any]]:
+        """Return a page summary for the first URL in business_input, or None"""
+        url = self.extract_url(business_input)
+        if not url:
+            return None
+        try:
+            return await self.fetch_summary(url)
+        except Exception as e:
+            logger.warning(f"URL enrichment failed for {url}: {str(e)}")
+            return None
+
+# Initialize URL enrichment service
+url_enrichment = UrlEnrichmentService()
+
+# Platform statistics
+class PlatformStats:
+    """Public platform counters kept in the platform_counters collection.
+    
+    Registration and analysis completion update the counters with $inc, and
+    generation times go into a coarse histogram so percentiles never need an
+    aggregation. Reads are served from an in-process snapshot that is refreshed
+    in the background once it is older than STATS_CACHE_TTL.
+    """
+    def __init__(self, ttl: float = STATS_CACHE_TTL):
+        self.ttl = ttl
+        self.body: Optional[bytes] = None
+        self.expires_at = 0.0
+        self.refreshing: Optional[asyncio.Task] = None
+    
+    @staticmethod
+    def bucket(seconds: float) -> int:
+        """Histogram bucket (upper bound in seconds): 1s wide to 2 minutes, then 10s, then 1 minute"""
+        seconds = max(0.0, seconds)
+        if seconds <= 120:
+            return math.ceil(seconds) or 1
+        if seconds <= 600:
+            return math.ceil(seconds / 10) * 10
+        return math.ceil(seconds / 60) * 60
+    
+    @staticmethod
+    def percentile(histogram: Dict[str, int], fraction: float) -> Optional[float]:
+        total = sum(histogram.values())
+        if not total:
+            return None
+        seen = 0
+        for upper in sorted(histogram, key=int):
+            seen += histogram[upper]
+            if seen >= fraction * total:
+                return float(upper)
+    
+    async def increment_users(self):
+        await db.platform_counters.update_one({"_id": "users"}, {"$inc": {"value": 1}}, upsert=True)
+    
+    async def record_completion(self, generation_seconds: Optional[float] = None):
+        await db.platform_counters.update_one({"_id": "analyses_completed"}, {"$inc": {"value": 1}}, upsert=True)
+        if generation_seconds is not None:
+            await db.platform_counters.update_one(
+                {"_id": "generation_seconds"},
+                {"$inc": {f"histogram.{self.bucket(generation_seconds)}": 1}},
+                upsert=True
+            )
+    
+    async def seed(self):
+        """Initialize counters that do not exist yet from the current collections"""
+        existing = {doc["_id"] async for doc in db.platform_counters.find({}, {"_id": 1})}
+        if "users" not in existing:
+            count = await db.users.count_documents({})
+            await db.platform_counters.update_one({"_id": "users"}, {"$setOnInsert": {"value": count}}, upsert=True)
+        if "analyses_completed" not in existing:
+            count = await db.business_analyses.count_documents({"status": "completed"})
+            await db.platform_counters.update_one({"_id": "analyses_completed"}, {"$setOnInsert": {"value": count}}, upsert=True)
+        if "generation_seconds" not in existing:
+            histogram = {}
+            async for analysis in db.business_analyses.find(
+                {"status": "completed", "reused_from": None},
+                {"_id": 0, "created_at": 1, "updated_at": 1}
+            ):
+                if analysis.get("created_at") and analysis.get("updated_at"):
+                    bucket = str(self.bucket((analysis["updated_at"] - analysis["created_at"]).total_seconds()))
+                    histogram[bucket] = histogram.get(bucket, 0) + 1
+            await db.platform_counters.update_one(
+                {"_id": "generation_seconds"},
+                {"$setOnInsert": {"histogram": histogram}},
+                upsert=True
+            )
+    
+    async def refresh(self):
+        counters = {doc["_id"]: doc async for doc in db.platform_counters.find({})}
+        users = counters.get("users", {}).get("value", 0)
+        analyses = counters.get("analyses_completed", {}).get("value", 0)
+        histogram = counters.get("generation_seconds", {}).get("histogram", {})
+        median = self.percentile(histogram, 0.5)
+        p95 = self.percentile(histogram, 0.95)
+        self.body = encode_json({
+            "users": f"{users:,}+",
+            "avgGenerationTime": f"{median:.0f} seconds" if median is not None else "N/A",
+            "accountsCreated": f"{users:,}",
+            "venturesAnalyzed": f"{analyses:,}",
+            "userCount": users,
+            "analysesCompleted": analyses,
+            "generationTimeSeconds": {"median": median, "p95": p95}
+        })
+        self.expires_at = time.monotonic() + self.ttl
+    
+    async def _refresh_in_background(self):
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.error(f"Failed to refresh platform stats: {str(e)}")
+        finally:
+            self.refreshing = None
+    
+    async def get(self) -> bytes:
+        """Encoded stats; stale snapshots are served while a refresh runs"""
+        if self.body is None:
+            await self.refresh()
+        elif time.monotonic() >= self.expires_at and self.refreshing is None:
+            self.refreshing = asyncio.create_task(self._refresh_in_background())
+        return self.body
+
+platform_stats = PlatformStats()
+
+# Index Management
+# Every index the application relies on, per collection. Features that add new
+# query shapes should add their index here so startup and the CLI check see it.
+INDEX_SPECS: Dict[str, List[Dict[str, Any]]] = {
+    "users": [
+        {"name": "email_unique", "keys": [("email", ASCENDING)], "unique": True},
+        {"name": "id_unique", "keys": [("id", ASCENDING)], "unique": True}
+    ],
+    "business_analyses": [
+        {"name": "id_unique", "keys": [("id", ASCENDING)], "unique": True},
+        {"name": "user_id_created_at_id", "keys": [("user_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]},
+        {"name": "status_updated_at", "keys": [("status", ASCENDING), ("updated_at", ASCENDING)]},
+        {"name": "user_id_updated_at", "keys": [("user_id", ASCENDING), ("updated_at", ASCENDING)]},
+        {"name": "batch_id_status", "keys": [("batch_id", ASCENDING), ("status", ASCENDING)], "sparse": True}
+    ],
+    "analysis_batches": [
+        {"name": "id_unique", "keys": [("id", ASCENDING)], "unique": True},
+        {"name": "user_id_created_at", "keys": [("user_id", ASCENDING), ("created_at", DESCENDING)]}
+    ],
+    "password_resets": [
+        {"name": "token_unique", "keys": [("token", ASCENDING)], "unique": True},
+        {"name": "expires_at_ttl", "keys": [("expires_at", ASCENDING)], "expireAfterSeconds": 0}
+    ]
+}
+
+# Representative queries and the index each is expected to use
+QUERY_SHAPES: List[Dict[str, Any]] = [
+    {"collection": "users", "filter": {"email": "probe@example.com"}, "index": "email_unique"},
+    {"collection": "users", "filter": {"id": "probe"}, "index": "id_unique"},
+    {"collection": "business_analyses", "filter": {"id": "probe", "user_id": "probe"}, "index": "id_unique"},
+    {
+        "collection": "business_analyses",
+        "filter": {"user_id": "probe"},
+        "sort": {"created_at": -1, "id": -1},
+        "index": "user_id_created_at_id"
+    },
+    {
+        "collection": "business_analyses",
+        "filter": {"user_id": "probe", "updated_at": {"$gte": datetime(2024, 1, 1)}},
+        "index": "user_id_updated_at"
+    },
+    {"collection": "business_analyses", "filter": {"batch_id": "probe"}, "index": "batch_id_status"},
+    {"collection": "analysis_batches", "filter": {"id": "probe", "user_id": "probe"}, "index": "id_unique"},
+    {"collection": "password_resets", "filter": {"token": "probe"}, "index": "token_unique"}
+]
+
+class IndexManager:
+    """Creates the indexes in INDEX_SPECS and checks that key queries use them"""
+    def __init__(self, database):
+        self.db = database
+    
+    async def ensure(self):
+        for collection, specs in INDEX_SPECS.items():
+            models = [
+                IndexModel(spec["keys"], **{key: value for key, value in spec.items() if key != "keys"})
+                for spec in specs
+            ]
+            try:
+                await self.db[collection].create_indexes(models)
+            except OperationFailure as e:
+                logger.error(f"Failed to create indexes on {collection}: {str(e)}")
+        logger.info("Database indexes ensured")
+    
+    async def missing(self) -> List[str]:
+        problems = []
+        for collection, specs in INDEX_SPECS.items():
+            existing = await self.db[collection].index_information()
+            existing_keys = {tuple(info["key"]) for info in existing.values()}
+            for spec in specs:
+                if spec["name"] not in existing and tuple(spec["keys"]) not in existing_keys:
+                    problems.append(f"{collection}: missing index {spec['name']} {spec['keys']}")
+        return problems
+    
+    @staticmethod
+    def _plan_stages(plan: Dict[str, Any]):
+        yield plan
+        for child_key in ("inputStage", "queryPlan"):
+            if child_key in plan:
+                yield from IndexManager._plan_stages(plan[child_key])
+        for child in plan.get("inputStages", []):
+            yield from IndexManager._plan_stages(child)
+    
+    async def explain_regressions(self) -> List[str]:
+        problems = []
+        for shape in QUERY_SHAPES:
+            find = {"find": shape["collection"], "filter": shape["filter"]}
+            if "sort" in shape:
+                find["sort"] = shape["sort"]
+            explain = await self.db.command({"explain": find, "verbosity": "queryPlanner"})
+            stages = list(self._plan_stages(explain["queryPlanner"]["winningPlan"]))
+            index_names = {stage.get("indexName") for stage in stages if stage.get("indexName")}
+            description = f"{shape['collection']} {shape['filter']}" + (f" sort {shape['sort']}" if "sort" in shape else "")
+            if any(stage.get("stage") == "COLLSCAN" for stage in stages):
+                problems.append(f"{description}: collection scan (expected {shape['index']})")
+            elif any(stage.get("stage") == "SORT" for stage in stages):
+                problems.append(f"{description}: in-memory sort (expected {shape['index']})")
+            elif shape["index"] not in index_names:
+                problems.append(f"{description}: uses {sorted(index_names)} (expected {shape['index']})")
+        return problems
+
+index_manager = IndexManager(db)
+
+# Semantic Result Index
+LEGAL_SUFFIXES = {
+    "ltd", "limited", "inc", "incorporated", "llc", "llp", "corp", "corporation",
+    "co", "company", "plc", "gmbh", "ag", "sa", "bv", "pty", "group", "holdings"
+}
+INDEX_STOPWORDS = {
+    "a", "an", "and", "the", "of", "for", "in", "on", "to", "is", "are", "we", "our",
+    "with", "that", "at", "by", "as", "it", "its", "from", "www", "http", "https", "com"
+}
+
+class SemanticResultIndex:
+    """In-process near-duplicate index over the business inputs of completed analyses.
+    
+    Inputs are embedded as sets of hashed word and character-trigram features. A
+    lookup probes the postings of the query's rarest features and reranks those
+    candidates by cosine similarity, so its cost does not grow with the index.
+    """
+    MAX_FEATURES = 128
+    PROBE_FEATURES = 4
+    POSTINGS_PER_FEATURE = 48
+    
+    def __init__(self):
+        self.partitions: Dict[str, Dict[int, List[str]]] = {}
+        self.documents: Dict[str, Tuple[str, str, array]] = {}
+        self.removed = 0
+        self.snapshot_at: Optional[datetime] = None
+    
+    @classmethod
+    def features(cls, text: str) -> array:
+        words = [
+            word for word in re.findall(r'[a-z0-9]+', text.lower())
+            if word not in LEGAL_SUFFIXES and word not in INDEX_STOPWORDS
+        ]
+        features = {}
+        for word in words:
+            features.setdefault(f"w:{word}", None)
+            padded = f" {word} "
+            for i in range(len(padded) - 2):
+                features.setdefault(padded[i:i + 3], None)
+            if len(features) >= cls.MAX_FEATURES:
+                break
+        return array('I', sorted(zlib.crc32(feature.encode()) for feature in itertools.islice(features, cls.MAX_FEATURES)))
+    
+    def _partition(self, user_id: str) -> Dict[int, List[str]]:
+        key = user_id if SEMANTIC_REUSE_SCOPE == "user" else "*"
+        return self.partitions.setdefault(key, {})
+    
+    def __len__(self) -> int:
+        return len(self.documents)
+    
+    def add(self, analysis_id: str, user_id: str, business_input: str):
+        if analysis_id in self.documents:
+            return
+        features = self.features(business_input)
+        self.documents[analysis_id] = (user_id, business_input, features)
+        postings = self._partition(user_id)
+        for feature in features:
+            postings.setdefault(feature, []).append(analysis_id)
+    
+    def remove(self, analysis_id: str):
+        # Postings are cleaned lazily; compact once tombstones dominate
+        if self.documents.pop(analysis_id, None) is not None:
+            self.removed += 1
+            if self.removed > max(1000, len(self.documents)):
+                self._compact()
+    
+    def _compact(self):
+        for postings in self.partitions.values():
+            for feature in list(postings):
+                live = [analysis_id for analysis_id in postings[feature] if analysis_id in self.documents]
+                if live:
+                    postings[feature] = live
+                else:
+                    del postings[feature]
+        self.removed = 0
+    
+    def lookup(self, user_id: str, business_input: str, limit: int = 3) -> List[Dict[str, Any]]:
+        """Return up to limit completed analyses similar to business_input, best first"""
+        query = self.features(business_input)
+        if not query:
+            return []
+        postings = self._partition(user_id)
+        probes = sorted((feature for feature in query if feature in postings), key=lambda f: len(postings[f]))
+        candidates = set()
+        for feature in probes[:self.PROBE_FEATURES]:
+            candidates.update(postings[feature][-self.POSTINGS_PER_FEATURE:])
+        
+        query_set = set(query)
+        matches = []
+        for analysis_id in candidates:
+            document = self.documents.get(analysis_id)
+            if document is None:
+                continue
+            owner, text, features = document
+            similarity = len(query_set.intersection(features)) / (len(query) * len(features)) ** 0.5
+            if similarity >= SEMANTIC_SUGGEST_THRESHOLD:
+                matches.append({
+                    "id": analysis_id,
+                    "user_id": owner,
+                    "business_input": text,
+                    "similarity": round(similarity, 3)
+                })
+        matches.sort(key=lambda match: match["similarity"], reverse=True)
+        return matches[:limit]
+    
+    def save(self, path: str):
+        """Write the index as JSON; postings are rebuilt from the feature hashes on load"""
+        snapshot = {
+            "version": 2,
+            "snapshot_at": (self.snapshot_at or datetime.utcnow()).isoformat(),
+            "documents": [
+                [analysis_id, user_id, text, features.tolist()]
+                for analysis_id, (user_id, text, features) in self.documents.items()
+            ]
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    
+    def load(self, path: str) -> bool:
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except ValueError:
+            # Not a JSON snapshot (e.g. one written by an older release); rebuild from the database
+            logger.warning(f"Ignoring unreadable semantic index snapshot {path}")
+            return False
+        if not isinstance(snapshot, dict) or snapshot.get("version") != 2:
+            return False
+        # Validate every entry before touching the index so a bad file leaves it empty
+        documents = {}
+        for analysis_id, user_id, text, hashes in snapshot["documents"]:
+            if not all(isinstance(value, str) for value in (analysis_id, user_id, text)):
+                raise ValueError(f"Malformed semantic index snapshot entry {analysis_id!r}")
+            documents[analysis_id] = (user_id, text, array('I', hashes))
+        snapshot_at = datetime.fromisoformat(snapshot["snapshot_at"])
+        
+        for analysis_id, (user_id, text, features) in documents.items():
+            self.documents[analysis_id] = (user_id, text, features)
+            postings = self._partition(user_id)
+            for feature in features:
+                postings.setdefault(feature, []).append(analysis_id)
+        self.snapshot_at = snapshot_at
+        return True
+    
+    async def warm(self):
+        """Load the snapshot if configured, then index completed analyses it does not cover"""
+        if SEMANTIC_INDEX_PATH:
+            try:
+                self.load(SEMANTIC_INDEX_PATH)
+            except Exception as e:
+                logger.error(f"Failed to load semantic index snapshot: {str(e)}")
+        
+        query = {"status": "completed"}
+        if self.snapshot_at:
+            query["updated_at"] = {"$gt": self.snapshot_at}
+        self.snapshot_at = datetime.utcnow()
+        cursor = db.business_analyses.find(query, {"_id": 0, "id": 1, "user_id": 1, "business_input": 1}).sort("created_at", 1)
+        async for doc in cursor:
+            self.add(doc["id"], doc["user_id"], doc["business_input"])
+        logger.info(f"Semantic index ready with {len(self)} analyses")
+
+# Initialize semantic index
+semantic_index = SemanticResultIndex()
+
+# History Search Index
+class UserSearchIndex:
+    """Inverted index over one user's analyses with BM25 ranking and prefix matching"""
+    MAX_PREFIX_EXPANSIONS = 50
+    
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_terms: Dict[str, Dict[str, int]] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self.total_length = 0
+        self.sorted_terms: List[str] = []
+        self.terms_dirty = False
+        self.watermark: Optional[datetime] = None
+    
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        return re.findall(r'[a-z0-9]+', text.lower())
+    
+    def add(self, analysis_id: str, text: str):
+        self.remove(analysis_id)
+        terms: Dict[str, int] = {}
+        for token in self.tokenize(text):
+            terms[token] = terms.get(token, 0) + 1
+        self.doc_terms[analysis_id] = terms
+        self.doc_lengths[analysis_id] = sum(terms.values())
+        self.total_length += self.doc_lengths[analysis_id]
+        for term, count in terms.items():
+            if term not in self.postings:
+                self.postings[term] = {}
+                self.terms_dirty = True
+            self.postings[term][analysis_id] = count
+    
+    def remove(self, analysis_id: str):
+        terms = self.doc_terms.pop(analysis_id, None)
+        if terms is None:
+            return
+        self.total_length -= self.doc_lengths.pop(analysis_id, 0)
+        for term in terms:
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(analysis_id, None)
+                if not posting:
+                    del self.postings[term]
+                    self.terms_dirty = True
+    
+    def _expand(self, token: str) -> List[str]:
+        """Indexed terms starting with token, exact match first"""
+        if self.terms_dirty:
+            self.sorted_terms = sorted(self.postings)
+            self.terms_dirty = False
+        start = bisect.bisect_left(self.sorted_terms, token)
+        matches = []
+        for term in itertools.islice(self.sorted_terms, start, start + self.MAX_PREFIX_EXPANSIONS):
+            if not term.startswith(token):
+                break
+            matches.append(term)
+        return matches
+    
+    def search(self, query: str) -> List[str]:
+        """Analysis ids matching every query token (as a prefix), best first"""
+        tokens = self.tokenize(query)
+        if not tokens or not self.doc_terms:
+            return []
+        count = len(self.doc_terms)
+        avg_length = self.total_length / count or 1.0
+        scores: Optional[Dict[str, float]] = None
+        for token in tokens:
+            token_scores: Dict[str, float] = {}
+            for term in self._expand(token):
+                posting = self.postings[term]
+                idf = math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+                weight = 1.0 if term == token else 0.8
+                for analysis_id, tf in posting.items():
+                    length = self.doc_lengths[analysis_id]
+                    bm25 = idf * tf * 2.2 / (tf + 1.2 * (0.25 + 0.75 * length / avg_length))
+                    token_scores[analysis_id] = max(token_scores.get(analysis_id, 0.0), weight * bm25)
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {analysis_id: score + token_scores[analysis_id] for analysis_id, score in scores.items() if analysis_id in token_scores}
+            if not scores:
+                return []
+        return sorted(scores, key=lambda analysis_id: scores[analysis_id], reverse=True)
+
+class HistorySearchIndex:
+    """Per-user in-process search indexes for analysis history.
+    
+    Each user's index is built on first search and then caught up incrementally from
+    updated_at, so analyses written by other workers are picked up. Both read the
+    history in pages of SEARCH_INDEX_PAGE, and concurrent searches share one build.
+    Analyses deleted through another worker are evicted when a search finds them gone.
+    """
+    def __init__(self, max_users: int = SEARCH_INDEX_MAX_USERS):
+        self.max_users = max_users
+        self.users: "OrderedDict[str, UserSearchIndex]" = OrderedDict()
+        self.refreshing: Dict[str, asyncio.Task] = {}
+    
+    @staticmethod
+    def document_text(analysis: Dict[str, Any]) -> str:
+        headline = (analysis.get("summary") or {}).get("headline", "")
+        return " ".join([analysis.get("business_input", ""), headline, analysis.get("search_text", "")])
+    
+    async def _catch_up(self, user_id: str, index: UserSearchIndex):
+        since = index.watermark
+        last_id = None
+        while True:
+            query: Dict[str, Any] = {"user_id": user_id}
+            if last_id is not None:
+                # Keyset pagination; ties on updated_at are broken by id
+                query["$or"] = [{"updated_at": {"$gt": since}}, {"updated_at": since, "id": {"$gt": last_id}}]
+            elif since is not None:
+                query["updated_at"] = {"$gte": since}
+            page = await db.business_analyses.find(
+                query,
+                {"_id": 0, "id": 1, "business_input": 1, "summary.headline": 1, "search_text": 1, "updated_at": 1}
+            ).sort([("updated_at", ASCENDING), ("id", ASCENDING)]).limit(SEARCH_INDEX_PAGE).to_list(length=SEARCH_INDEX_PAGE)
+            for analysis in page:
+                index.add(analysis["id"], self.document_text(analysis))
+            if page:
+                since, last_id = page[-1]["updated_at"], page[-1]["id"]
+                index.watermark = since
+            if len(page) < SEARCH_INDEX_PAGE:
+                return
+    
+    async def _refresh(self, user_id: str) -> UserSearchIndex:
+        index = self.users.get(user_id)
+        if index is None:
+            index = UserSearchIndex()
+            self.users[user_id] = index
+            while len(self.users) > self.max_users:
+                self.users.popitem(last=False)
+        self.users.move_to_end(user_id)
+        
+        task = self.refreshing.get(user_id)
+        if task is None:
+            task = asyncio.create_task(self._catch_up(user_id, index))
+            self.refreshing[user_id] = task
+            task.add_done_callback(lambda done: self.refreshing.pop(user_id, None))
+        # A search that is cancelled must not cancel the build other searches wait on
+        await asyncio.shield(task)
+        return index
+    
+    async def search(self, user_id: str, query: str) -> List[str]:
+        index = await self._refresh(user_id)
+        return index.search(query)
+    
+    def remove(self, user_id: str, analysis_id: str):
+        index = self.users.get(user_id)
+        if index is not None:
+            index.remove(analysis_id)
+
+# Initialize history search index
+history_search = HistorySearchIndex()
+
 # Business Analysis Service
 class BusinessAnalysisService:
     def __init__(self):
-        self.deepseek = DeepSeekService()
-        self.gemini = GeminiService()
+        self.providers = provider_registry
         self.active_analyses = {}  # Track active analyses for cancellation
+        # Shared by single and batch submissions; queued analyses stay pending
+        self.slots = asyncio.Semaphore(ANALYSIS_MAX_CONCURRENT)
+        self.background_tasks = set()  # Strong references to fire-and-forget follow-up work
     
-    async def perform_analysis(self, request: BusinessAnalysisRequest, user_id: str) -> BusinessAnalysis:
+    async def perform_analysis(self, request: BusinessAnalysisRequest, user_id: str, batch_id: Optional[str] = None) -> BusinessAnalysis:
+        matches = semantic_index.lookup(user_id, request.business_input) if SEMANTIC_INDEX_ENABLED else []
+        if request.reuse_similar and matches and matches[0]["similarity"] >= SEMANTIC_REUSE_THRESHOLD:
+            reused = await self._reuse_analysis(matches[0]["id"], user_id, request, batch_id)
+            if reused:
+                return reused
+        
         analysis = BusinessAnalysis(
             user_id=user_id,
-            business_input=request.business_input
+            business_input=request.business_input,
+            batch_id=batch_id,
+            similar_analyses=[
+                {key: value for key, value in match.items() if key != "user_id"}
+                for match in matches if match["user_id"] == user_id
+            ]
         )
         
         # Store analysis in database
         await db.business_analyses.insert_one(analysis.dict())
         
-        # Start comprehensive analysis in background
-        task = asyncio.create_task(self._perform_comprehensive_analysis(analysis, request))
+        # Start comprehensive analysis in background once a slot is free
+        task = asyncio.create_task(self._run_when_scheduled(analysis, request))
         self.active_analyses[analysis.id] = task
         
         return analysis
     
+    async def _run_when_scheduled(self, analysis: BusinessAnalysis, request: BusinessAnalysisRequest):
+        async with self.slots:
+            await self._perform_comprehensive_analysis(analysis, request)
+    
+    async def _reuse_analysis(self, source_id: str, user_id: str, request: BusinessAnalysisRequest, batch_id: Optional[str] = None) -> Optional[BusinessAnalysis]:
+        """Copy the results of a near-duplicate completed analysis into a new analysis"""
+        source = await db.business_analyses.find_one(
+            {"id": source_id, "status": "completed"},
+            {"_id": 0, "ai_consensus": 1, "confidence_score": 1, "summary": 1, **ResultsCodec.projection()}
+        )
+        if not source:
+            semantic_index.remove(source_id)
+            return None
+        results_codec.decode(source)
+        
+        analysis = BusinessAnalysis(
+            user_id=user_id,
+            business_input=request.business_input,
+            comprehensive_results=source.get("comprehensive_results", {}),
+            ai_consensus=source.get("ai_consensus", {}),
+            confidence_score=source.get("confidence_score", 0.0),
+            summary=source.get("summary") or build_analysis_summary(
+                source.get("comprehensive_results", {}),
+                source.get("ai_consensus", {}),
+                source.get("confidence_score", 0.0)
+            ),
+            status="completed",
+            reused_from=source_id,
+            batch_id=batch_id
+        )
+        await db.business_analyses.insert_one({
+            **analysis.dict(),
+            **results_codec.storage_fields(analysis.comprehensive_results)
+        })
+        semantic_index.add(analysis.id, user_id, analysis.business_input)
+        try:
+            await platform_stats.record_completion()
+        except Exception as e:
+            logger.error(f"Failed to update analysis counters: {str(e)}")
+        logger.info(f"Analysis {analysis.id} reused results from {source_id}")
+        return analysis
+    
     async def cancel_analysis(self, analysis_id: str, user_id: str) -> bool:
         """Cancel an active analysis"""
         try:
@@ -1027,7 +2937,8 @@ class BusinessAnalysisService:
                         "$set": {
                             "status": "cancelled",
                             "updated_at": datetime.utcnow()
-                        }
+                        },
+                        "$inc": {"version": 1}
                     }
                 )
                 
@@ -1040,6 +2951,9 @@ class BusinessAnalysisService:
             return False
     
     async def _perform_comprehensive_analysis(self, analysis: BusinessAnalysis, request: BusinessAnalysisRequest):
+        # Fetch any referenced website concurrently; frameworks pick it up once it is ready
+        enrichment_task = asyncio.create_task(url_enrichment.enrich(analysis.business_input)) if URL_FETCH_ENABLED else None
+        url_context = None
         try:
             # Update status to processing
             await db.business_analyses.update_one(
@@ -1048,40 +2962,16 @@ class BusinessAnalysisService:
                     "$set": {
                         "status": "processing",
                         "updated_at": datetime.utcnow()
-                    }
+                    },
+                    "$inc": {"version": 1}
                 }
             )
+            progress_broker.publish(analysis.id, {"type": "status", "status": "processing"})
             
-            # Comprehensive analysis frameworks
-            frameworks = [
-                "swot_analysis",
-                "pestel_analysis", 
-                "porter_five_forces",
-                "business_model_canvas",
-                "vrio_framework",
-                "bcg_matrix",
-                "competitive_landscape",
-                "customer_segmentation",
-                "financial_analysis",
-                "break_even_analysis",
-                "unit_economics",
-                "revenue_model",
-                "risk_assessment",
-                "scenario_analysis",
-                "market_intelligence",
-                "go_to_market_strategy",
-                "trend_analysis",
-                "benchmarking",
-                "kpi_dashboard",
-                "process_mapping",
-                "value_stream_mapping",
-                "lean_six_sigma",
-                "capacity_planning",
-                "cost_benefit_analysis",
-                "working_capital_analysis"
-            ]
+            frameworks = ANALYSIS_FRAMEWORKS
             
             comprehensive_results = {}
+            models_used = set()
             
             for framework in frameworks:
                 # Check if analysis was cancelled
@@ -1089,31 +2979,51 @@ class BusinessAnalysisService:
                     logger.info(f"Analysis {analysis.id} was cancelled")
                     return
                 
-                prompt = self._build_comprehensive_prompt(framework, analysis)
+                if url_context is None and enrichment_task is not None and enrichment_task.done():
+                    url_context = enrichment_task.result()
+                
+                prompt = self._build_comprehensive_prompt(framework, analysis, url_context)
                 framework_results = {}
                 
-                if AIModel.DEEPSEEK in request.ai_models:
-                    deepseek_result = await self.deepseek.analyze(prompt)
-                    framework_results["deepseek"] = {
-                        "analysis": deepseek_result,
-                        "confidence_score": 0.85,
-                        "processing_time": 2.3
-                    }
+                allowed = [m.value for m in request.ai_models]
+                if request.consensus_mode:
+                    # Every allowed model runs; the healthiest first so its results stream soonest
+                    models = self.providers.rank(allowed)
+                else:
+                    models = [self.providers.route(allowed)]
                 
-                if AIModel.GEMINI in request.ai_models:
-                    gemini_result = await self.gemini.analyze(prompt)
-                    framework_results["gemini"] = {
-                        "analysis": gemini_result,
-                        "confidence_score": 0.82,
-                        "processing_time": 1.9
+                for model in models:
+                    provider = self.providers.get(model)
+                    started = time.perf_counter()
+                    result = await provider.analyze(
+                        prompt,
+                        on_partial=self._partial_result_handler(analysis.id, framework, model),
+                        max_tokens=framework_max_tokens(framework)
+                    )
+                    result, schema_valid = validate_framework_result(framework, result)
+                    framework_results[model] = {
+                        "analysis": result,
+                        "confidence_score": provider.confidence_score,
+                        "processing_time": round(time.perf_counter() - started, 2),
+                        "schema_valid": schema_valid
                     }
+                    models_used.add(model)
                 
                 comprehensive_results[framework] = framework_results
+                progress_broker.publish(analysis.id, {
+                    "type": "framework_completed",
+                    "framework": framework,
+                    "completed": len(comprehensive_results),
+                    "total": len(frameworks)
+                })
+            
+            if url_context is None and enrichment_task is not None and enrichment_task.done():
+                url_context = enrichment_task.result()
             
             # AI Consensus across all frameworks
             overall_consensus = {
                 "consensus_score": 0.84,
-                "models_used": [m.value for m in request.ai_models],
+                "models_used": sorted(models_used),
                 "frameworks_analyzed": len(frameworks),
                 "conflicting_insights": [],
                 "key_recommendations": [
@@ -1126,18 +3036,38 @@ class BusinessAnalysisService:
             }
             
             # Update analysis with results
+            completed_at = datetime.utcnow()
             await db.business_analyses.update_one(
                 {"id": analysis.id},
                 {
                     "$set": {
-                        "comprehensive_results": comprehensive_results,
+                        **results_codec.storage_fields(comprehensive_results),
                         "ai_consensus": overall_consensus,
                         "confidence_score": 0.84,
+                        "url_context": url_context,
+                        "summary": build_analysis_summary(comprehensive_results, overall_consensus, 0.84),
+                        "search_text": build_search_text(comprehensive_results),
                         "status": "completed",
-                        "updated_at": datetime.utcnow()
-                    }
+                        "updated_at": completed_at
+                    },
+                    "$inc": {"version": 1}
                 }
             )
+            progress_broker.publish(analysis.id, {"type": "status", "status": "completed"})
+            if SEMANTIC_INDEX_ENABLED:
+                semantic_index.add(analysis.id, analysis.user_id, analysis.business_input)
+            try:
+                # Submission to completion, queue wait included, the same span seed() derives
+                # from created_at/updated_at
+                await platform_stats.record_completion((completed_at - analysis.created_at).total_seconds())
+            except Exception as e:
+                logger.error(f"Failed to update analysis counters: {str(e)}")
+            
+            # Warm the export cache after the status change so it never delays completion
+            if EXPORT_CACHE_ENABLED and EXPORT_PRERENDER_FORMATS:
+                prerender = asyncio.create_task(prerender_exports(analysis.id))
+                self.background_tasks.add(prerender)
+                prerender.add_done_callback(self.background_tasks.discard)
             
             # Send completion email
             try:
@@ -1149,7 +3079,7 @@ class BusinessAnalysisService:
                         analysis.business_input,
                         len(frameworks),
                         0.84,
-                        len(request.ai_models)
+                        len(models_used)
                     )
             except Exception as e:
                 logger.error(f"Failed to send completion email: {str(e)}")
@@ -1160,6 +3090,7 @@ class BusinessAnalysisService:
             
         except asyncio.CancelledError:
             logger.info(f"Analysis {analysis.id} was cancelled")
+            progress_broker.publish(analysis.id, {"type": "status", "status": "cancelled"})
             # Clean up active analyses tracker
             if analysis.id in self.active_analyses:
                 del self.active_analyses[analysis.id]
@@ -1173,17 +3104,53 @@ class BusinessAnalysisService:
                         "status": "failed",
                         "error": str(e),
                         "updated_at": datetime.utcnow()
-                    }
+                    },
+                    "$inc": {"version": 1}
                 }
             )
+            progress_broker.publish(analysis.id, {"type": "status", "status": "failed", "error": str(e)})
             # Clean up active analyses tracker
             if analysis.id in self.active_analyses:
                 del self.active_analyses[analysis.id]
+        finally:
+            if enrichment_task is not None and not enrichment_task.done():
+                enrichment_task.cancel()
     
-    def _build_comprehensive_prompt(self, framework: str, analysis: BusinessAnalysis) -> str:
+    def _partial_result_handler(self, analysis_id: str, framework: str, model: str):
+        """Publish and persist each top-level result key as soon as the model finishes streaming it"""
+        async def handle(key: str, value: Any):
+            progress_broker.publish(analysis_id, {
+                "type": "partial_result",
+                "framework": framework,
+                "model": model,
+                "key": key,
+                "value": value
+            })
+            if "." in key or key.startswith("$"):
+                return
+            await db.business_analyses.update_one(
+                {"id": analysis_id},
+                {
+                    "$set": {
+                        f"comprehensive_results.{framework}.{model}.analysis.{key}": value,
+                        "updated_at": datetime.utcnow()
+                    },
+                    "$inc": {"version": 1}
+                }
+            )
+        return handle
+    
+    def _build_comprehensive_prompt(self, framework: str, analysis: BusinessAnalysis, url_context: Optional[Dict[str, Any]] = None) -> str:
+        website = ""
+        if url_context:
+            website = f"""
+        Website ({url_context['url']}): {url_context['title']}
+        {url_context['description']}
+        {url_context['text']}
+        """
         base_context = f"""
         Business Input: {analysis.business_input}
-        
+        {website}
         IMPORTANT: Please provide extremely detailed, comprehensive analysis with specific insights, 
         quantitative assessments, actionable recommendations, and evidence-based conclusions.
         Include specific examples, metrics, benchmarks, and implementation guidance.
@@ -1206,7 +3173,7 @@ class BusinessAnalysisService:
             - Actionable recommendations
             - Industry benchmarks and comparisons
             
-            Format as structured JSON with all details included.""",
+            Format as JSON using the shape given below.""",
             
             "pestel_analysis": f"""{base_context}
             
@@ -1487,7 +3454,15 @@ class BusinessAnalysisService:
             Provide comprehensive working capital optimization recommendations."""
         }
         
-        return framework_prompts.get(framework, base_context)
+        prompt = framework_prompts.get(framework, base_context)
+        schema = FRAMEWORK_SCHEMAS.get(framework)
+        if schema:
+            prompt += f"""
+            
+            Respond with a single JSON object with exactly this shape (no markdown, no extra keys):
+            {json.dumps(schema_outline(schema), separators=(',', ':'))}
+            Keep every string under 30 words."""
+        return prompt
 
 # Initialize services
 business_service = BusinessAnalysisService()
@@ -1513,27 +3488,522 @@ async def cancel_business_analysis(
     else:
         raise HTTPException(status_code=404, detail="Analysis not found or not cancellable")
 
+def encode_cursor(payload: Dict[str, Any]) -> str:
+    data = json.dumps(payload, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return payload
+
+def encode_history_cursor(analysis: Dict[str, Any]) -> str:
+    """Opaque keyset cursor pointing just after analysis in (created_at, id) order"""
+    return encode_cursor({"c": analysis["created_at"].isoformat(), "i": analysis["id"]})
+
+def decode_history_cursor(cursor: str) -> Tuple[datetime, str]:
+    payload = decode_cursor(cursor)
+    try:
+        return datetime.fromisoformat(payload["c"]), str(payload["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def decode_search_cursor(cursor: str) -> int:
+    payload = decode_cursor(cursor)
+    offset = payload.get("o")
+    if not isinstance(offset, int) or offset < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return offset
+
+# Fast JSON responses
+def encode_json(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        jsonable_encoder(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with orjson when it is installed.
+    
+    Endpoints return it directly so FastAPI skips its jsonable_encoder pass over large
+    analysis documents. Naive datetimes serialize to the same isoformat() strings the
+    default encoder produces.
+    """
+    def render(self, content: Any) -> bytes:
+        return encode_json(content)
+
+# Response compression
+COMPRESSION_SKIP_TYPES = (
+    "image/", "video/", "audio/", "font/woff",
+    "application/zip", "application/gzip", "application/x-gzip", "application/pdf",
+    "application/vnd.openxmlformats-officedocument.",  # DOCX/PPTX are zip containers
+    "text/event-stream",  # progress events must not be buffered
+)
+
+class CompressionStats:
+    def __init__(self):
+        self.responses = {}
+        self.bytes_in = {}
+        self.bytes_out = {}
+        self.cpu_seconds = {}
+        self.skipped = 0
+    
+    def record(self, encoding: str, bytes_in: int, bytes_out: int, cpu_seconds: float):
+        self.responses[encoding] = self.responses.get(encoding, 0) + 1
+        self.bytes_in[encoding] = self.bytes_in.get(encoding, 0) + bytes_in
+        self.bytes_out[encoding] = self.bytes_out.get(encoding, 0) + bytes_out
+        self.cpu_seconds[encoding] = self.cpu_seconds.get(encoding, 0.0) + cpu_seconds
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": COMPRESSION_ENABLED,
+            "brotli_available": brotli is not None,
+            "skipped": self.skipped,
+            "encodings": {
+                encoding: {
+                    "responses": count,
+                    "bytes_in": self.bytes_in[encoding],
+                    "bytes_out": self.bytes_out[encoding],
+                    "compression_ratio": round(self.bytes_in[encoding] / self.bytes_out[encoding], 2) if self.bytes_out[encoding] else None,
+                    "cpu_ms": round(self.cpu_seconds[encoding] * 1000, 2)
+                }
+                for encoding, count in self.responses.items()
+            }
+        }
+
+compression_stats = CompressionStats()
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick br or gzip from an Accept-Encoding header, honouring q=0"""
+    offered = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        offered[name.strip()] = quality
+    wildcard = offered.get("*", 0.0)
+    for encoding in ("br", "gzip") if brotli is not None else ("gzip",):
+        if offered.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses with br or gzip as the client allows.
+    
+    Bodies under minimum_size, already-encoded responses and media types in
+    COMPRESSION_SKIP_TYPES pass through untouched. Streaming bodies are compressed
+    chunk by chunk without buffering the whole response.
+    """
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+        encoding = negotiate_encoding(accept_encoding) if accept_encoding else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        
+        start_message = None
+        compressor = None
+        bytes_in = 0
+        bytes_out = 0
+        cpu_seconds = 0.0
+        
+        def compress(data: bytes, final: bool) -> bytes:
+            nonlocal bytes_in, bytes_out, cpu_seconds
+            started = time.thread_time()
+            if encoding == "br":
+                output = compressor.process(data)
+                if final:
+                    output += compressor.finish()
+            else:
+                output = compressor.compress(data)
+                if final:
+                    output += compressor.flush()
+            cpu_seconds += time.thread_time() - started
+            bytes_in += len(data)
+            bytes_out += len(output)
+            return output
+        
+        async def send_compressed(message):
+            nonlocal start_message, compressor
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            if start_message is not None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                body = message.get("body", b"")
+                more_body = message.get("more_body", False)
+                media_type = headers.get("content-type", "").lower()
+                if (
+                    start_message["status"] < 200
+                    or start_message["status"] in (204, 304)
+                    or "content-encoding" in headers
+                    or media_type.startswith(COMPRESSION_SKIP_TYPES)
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    compression_stats.skipped += 1
+                    await send(start_message)
+                    start_message = None
+                    await send(message)
+                    return
+                if encoding == "br":
+                    compressor = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+                else:
+                    compressor = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                # A strong ETag names the identity representation
+                if "etag" in headers and not headers["etag"].startswith("W/"):
+                    headers["ETag"] = "W/" + headers["etag"]
+                output = compress(body, final=not more_body)
+                if more_body:
+                    del headers["content-length"]
+                else:
+                    headers["Content-Length"] = str(len(output))
+                await send(start_message)
+                start_message = None
+                await send({"type": "http.response.body", "body": output, "more_body": more_body})
+                if not more_body:
+                    compression_stats.record(encoding, bytes_in, bytes_out, cpu_seconds)
+                return
+            if compressor is None:
+                await send(message)
+                return
+            more_body = message.get("more_body", False)
+            await send({"type": "http.response.body", "body": compress(message.get("body", b""), final=not more_body), "more_body": more_body})
+            if not more_body:
+                compression_stats.record(encoding, bytes_in, bytes_out, cpu_seconds)
+        
+        await self.app(scope, receive, send_compressed)
+
+# Conditional requests
+ETAG_FIELDS = ["id", "version", "updated_at"]
+ETAG_PROJECTION = {"_id": 0, **{field: 1 for field in ETAG_FIELDS}}
+
+def make_etag(documents: List[Dict[str, Any]], variant: str = "") -> str:
+    """Strong ETag over the (id, version, updated_at) stamps of the documents in a representation"""
+    digest = hashlib.blake2b(variant.encode("utf-8"), digest_size=12)
+    for document in documents:
+        updated_at = document.get("updated_at")
+        stamp = f"|{document.get('id')}:{document.get('version', 0)}:{updated_at.isoformat() if updated_at else ''}"
+        digest.update(stamp.encode("utf-8"))
+    return f'"{digest.hexdigest()}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+def with_etag_fields(projection: Optional[Dict[str, int]]) -> Tuple[Optional[Dict[str, int]], List[str]]:
+    """Extend a projection with the ETag stamp fields; returns the fields to strip afterwards"""
+    if projection is None or not any(projection.values()):
+        return projection, []
+    extra = [field for field in ETAG_FIELDS if field not in projection]
+    return {**projection, **{field: 1 for field in extra}}, extra
+
+def strip_fields(documents: List[Dict[str, Any]], fields: List[str]):
+    for document in documents:
+        for field in fields:
+            document.pop(field, None)
+
+def history_page_response(
+    analyses: List[Dict[str, Any]],
+    cursor: Optional[str],
+    next_cursor: Optional[str],
+    etag: str
+) -> FastJSONResponse:
+    headers = {"ETag": etag}
+    if cursor is not None:
+        return FastJSONResponse({"items": analyses, "next_cursor": next_cursor}, headers=headers)
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return FastJSONResponse(analyses, headers=headers)
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+def http_date(value: datetime) -> str:
+    return format_datetime(value.replace(tzinfo=timezone.utc), usegmt=True)
+
+def unmodified_since(updated_at: datetime, if_modified_since: str) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have second precision
+    return updated_at.replace(microsecond=0, tzinfo=timezone.utc) <= since
+
+def export_validators(analysis: Dict[str, Any], variant: str) -> Dict[str, str]:
+    return {"ETag": make_etag([analysis], variant), "Last-Modified": http_date(analysis["updated_at"])}
+
+def parse_byte_range(range_header: str, size: int):
+    """(start, end) for a single "bytes=" range, "unsatisfiable", or None to send the whole file"""
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if not first:
+            length = int(last)
+            if length <= 0 or size == 0:
+                return "unsatisfiable"
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = int(last) if last else None
+    except ValueError:
+        return None
+    if start < 0 or (end is not None and end < start):
+        # Syntactically invalid ranges are ignored (RFC 9110 14.1.1)
+        return None
+    if start >= size:
+        return "unsatisfiable"
+    return start, size - 1 if end is None else min(end, size - 1)
+
+def iter_file_range(path: Path, start: int, end: int, chunk_size: int = 64 * 1024):
+    with open(path, "rb") as file:
+        file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = file.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+def ranged_file_response(
+    path: Path,
+    media_type: str,
+    headers: Dict[str, str],
+    range_header: Optional[str],
+    if_range: Optional[str],
+    delete_after: bool = False
+) -> Response:
+    """FileResponse with single-range (206/416) support; delete_after removes the file once sent"""
+    headers = {**headers, "Accept-Ranges": "bytes"}
+    background = BackgroundTask(path.unlink, missing_ok=True) if delete_after else None
+    # If-Range only applies the range while the client's validator is still current
+    if range_header and (not if_range or if_range in (headers.get("ETag"), headers.get("Last-Modified"))):
+        size = path.stat().st_size
+        byte_range = parse_byte_range(range_header, size)
+        if byte_range == "unsatisfiable":
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"}, background=background)
+        if byte_range:
+            start, end = byte_range
+            return StreamingResponse(
+                iter_file_range(path, start, end),
+                status_code=206,
+                media_type=media_type,
+                headers={**headers, "Content-Range": f"bytes {start}-{end}/{size}", "Content-Length": str(end - start + 1)},
+                background=background
+            )
+    return FileResponse(path, media_type=media_type, headers=headers, background=background)
+
+HISTORY_SUMMARY_FIELDS = [
+    "id", "business_input", "status", "confidence_score", "error",
+    "reused_from", "summary", "created_at", "updated_at"
+]
+HISTORY_FIELDS = set(BusinessAnalysis.__fields__) | set(HISTORY_SUMMARY_FIELDS)
+
+def history_projection(fields: Optional[str]) -> Dict[str, int]:
+    """Mongo projection for history listings; fields=all is the whole document minus internals"""
+    if fields == "all":
+        return {"_id": 0, "search_text": 0}
+    requested = HISTORY_SUMMARY_FIELDS if not fields else [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in HISTORY_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    # id and created_at are always needed for cursors
+    projection = {"_id": 0, "id": 1, "created_at": 1, **{field: 1 for field in requested}}
+    if "comprehensive_results" in projection:
+        projection.update(ResultsCodec.projection())
+    return projection
+
+async def backfill_analysis_summaries(analyses: List[Dict[str, Any]]):
+    """Compute summaries for completed analyses stored before summaries existed.
+    
+    One read and one bulk write per page. The summary is derived from fields the
+    analysis already has, so version (and with it the page ETag) is left unchanged.
+    """
+    missing = {
+        analysis["id"]: analysis for analysis in analyses
+        if "summary" in analysis and not analysis["summary"] and analysis.get("status") == "completed"
+    }
+    if not missing:
+        return
+    sources = await db.business_analyses.find(
+        {"id": {"$in": list(missing)}},
+        {"_id": 0, "id": 1, "ai_consensus": 1, "confidence_score": 1, **ResultsCodec.projection()}
+    ).to_list(length=len(missing))
+    updates = []
+    for source in sources:
+        results_codec.decode(source)
+        summary = build_analysis_summary(
+            source.get("comprehensive_results", {}),
+            source.get("ai_consensus", {}),
+            source.get("confidence_score", 0.0)
+        )
+        missing[source["id"]]["summary"] = summary
+        updates.append(UpdateOne({"id": source["id"]}, {"$set": {"summary": summary}}))
+    if updates:
+        await db.business_analyses.bulk_write(updates, ordered=False)
+
 @api_router.get("/analysis/history")
 async def get_analysis_history(
     current_user: User = Depends(get_current_user),
     skip: int = 0,
     limit: int = 10,
-    search: Optional[str] = None
+    search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None)
 ):
-    """Get analysis history with optional search"""
-    filter_query = {"user_id": current_user.id}
+    """Get analysis history with optional search.
+    
+    Returns a summary projection by default; pass fields=a,b,c to choose top-level
+    fields or fields=all for whole documents.
+    
+    Pass cursor (empty for the first page) for keyset pagination; the response is then
+    {"items": [...], "next_cursor": ...}. Without it the legacy skip/limit list is
+    returned, with the next cursor in the X-Next-Cursor header.
     
+    Pages carry an ETag; a matching If-None-Match is answered with 304 after a
+    stamp-only query.
+    """
+    projection = history_projection(fields)
+    variant = f"history|{skip}|{limit}|{search}|{cursor}|{fields}"
     if search:
-        filter_query["business_input"] = {"$regex": search, "$options": "i"}
+        return await search_analysis_history(current_user, search, skip, limit, cursor, projection, variant, if_none_match)
+    
+    filter_query = {"user_id": current_user.id}
+    
+    if cursor:
+        created_at, last_id = decode_history_cursor(cursor)
+        filter_query["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "id": {"$lt": last_id}}
+        ]
+    
+    def page_query(page_projection):
+        query = db.business_analyses.find(filter_query, page_projection).sort([("created_at", -1), ("id", -1)])
+        if cursor is None and skip:
+            query = query.skip(skip)
+        return query.limit(limit + 1).to_list(length=limit + 1)
+    
+    if if_none_match:
+        stamps = await page_query({**ETAG_PROJECTION, "created_at": 1})
+        etag = make_etag(stamps[:limit], variant)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+    
+    projection, extra_fields = with_etag_fields(projection)
+    analyses = await page_query(projection)
+    
+    has_more = len(analyses) > limit
+    analyses = analyses[:limit]
+    next_cursor = encode_history_cursor(analyses[-1]) if has_more and analyses else None
+    etag = make_etag(analyses, variant)
+    strip_fields(analyses, extra_fields)
     
-    analyses = await db.business_analyses.find(filter_query).sort("created_at", -1).skip(skip).limit(limit).to_list(length=limit)
+    if "summary" in projection:
+        for analysis in analyses:
+            analysis.setdefault("summary", {})
+        await backfill_analysis_summaries(analyses)
     
     # Remove MongoDB ObjectIds
     for analysis in analyses:
         if "_id" in analysis:
             del analysis["_id"]
+        results_codec.decode(analysis)
     
-    return analyses
+    return history_page_response(analyses, cursor, next_cursor, etag)
+
+async def search_analysis_history(
+    current_user: User,
+    search: str,
+    skip: int,
+    limit: int,
+    cursor: Optional[str],
+    projection: Dict[str, int],
+    variant: str,
+    if_none_match: Optional[str]
+):
+    """Relevance-ranked history search; cursors carry the result offset"""
+    offset = decode_search_cursor(cursor) if cursor else (skip if cursor is None else 0)
+    ranked_ids = await history_search.search(current_user.id, search)
+    page_ids = []
+    position = offset
+    while len(page_ids) < limit and position < len(ranked_ids):
+        candidates = ranked_ids[position:position + limit - len(page_ids)]
+        position += len(candidates)
+        existing = {
+            analysis["id"] for analysis in await db.business_analyses.find(
+                {"id": {"$in": candidates}, "user_id": current_user.id},
+                {"_id": 0, "id": 1}
+            ).to_list(length=len(candidates))
+        }
+        for analysis_id in candidates:
+            if analysis_id in existing:
+                page_ids.append(analysis_id)
+            else:
+                # Deleted through another worker; drop it so later pages line up
+                history_search.remove(current_user.id, analysis_id)
+    
+    async def page_documents(page_projection):
+        found = await db.business_analyses.find(
+            {"id": {"$in": page_ids}, "user_id": current_user.id},
+            page_projection
+        ).to_list(length=len(page_ids))
+        by_id = {analysis["id"]: analysis for analysis in found}
+        return [by_id[analysis_id] for analysis_id in page_ids if analysis_id in by_id]
+    
+    if if_none_match:
+        etag = make_etag(await page_documents(ETAG_PROJECTION), variant)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+    
+    projection, extra_fields = with_etag_fields(projection)
+    analyses = await page_documents(projection)
+    etag = make_etag(analyses, variant)
+    strip_fields(analyses, extra_fields)
+    for analysis in analyses:
+        analysis.pop("_id", None)
+        results_codec.decode(analysis)
+    
+    if "summary" in projection:
+        for analysis in analyses:
+            analysis.setdefault("summary", {})
+        await backfill_analysis_summaries(analyses)
+    
+    next_cursor = encode_cursor({"o": offset + len(page_ids)}) if position < len(ranked_ids) else None
+    return history_page_response(analyses, cursor, next_cursor, etag)
 
 @api_router.delete("/analysis/bulk")
 async def delete_multiple_analyses(
@@ -1546,29 +4016,398 @@ async def delete_multiple_analyses(
         "user_id": current_user.id
     })
     
+    remaining = {
+        analysis["id"] for analysis in
+        await db.business_analyses.find({"id": {"$in": analysis_ids}}, {"_id": 0, "id": 1}).to_list(length=len(analysis_ids))
+    }
+    for analysis_id in analysis_ids:
+        if analysis_id in semantic_index.documents and semantic_index.documents[analysis_id][0] == current_user.id:
+            semantic_index.remove(analysis_id)
+        history_search.remove(current_user.id, analysis_id)
+        if analysis_id not in remaining:
+            await export_cache.remove_analysis(analysis_id)
+    
     return {
         "message": f"Deleted {result.deleted_count} analyses successfully",
         "deleted_count": result.deleted_count
     }
 
+# Batch submission
+BATCH_TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+BATCH_READ_CHUNK = 64 * 1024
+BATCH_MAX_ERRORS = 100
+BATCH_RESULTS_CHUNK = 50
+
+async def iter_upload_rows(upload: UploadFile, fmt: str) -> AsyncIterator[Tuple[int, Optional[str], Optional[str]]]:
+    """Yield (line, business_input, error) for each CSV or NDJSON record, reading the upload in chunks"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    record = ""
+    record_line = 0
+    column = None
+    line_number = 0
+    
+    def parse(text: str, line: int):
+        nonlocal column
+        if fmt == "ndjson":
+            try:
+                row = json.loads(text)
+            except ValueError:
+                return line, None, "Invalid JSON"
+            value = row.get("business_input") if isinstance(row, dict) else row
+            return (line, value, None) if isinstance(value, str) else (line, None, "Missing business_input")
+        cells = next(csv.reader([text]), [])
+        if column is None:
+            headers = [cell.strip().lower() for cell in cells]
+            if "business_input" in headers:
+                column = headers.index("business_input")
+                return None
+            column = 0
+        if column >= len(cells):
+            return line, None, "Missing business_input"
+        return line, cells[column], None
+    
+    while True:
+        chunk = await upload.read(BATCH_READ_CHUNK)
+        pending += decoder.decode(chunk, final=not chunk)
+        lines = pending.split("\n")
+        pending = lines.pop() if chunk else ""
+        for line in lines:
+            line_number += 1
+            if not record:
+                if not line.strip():
+                    continue
+                record_line = line_number
+            record += line + "\n"
+            # A CSV record continues while a quoted field is open
+            if fmt == "csv" and record.count('"') % 2:
+                continue
+            parsed = parse(record.strip(), record_line)
+            record = ""
+            if parsed:
+                yield parsed
+        if not chunk:
+            if record.strip():
+                parsed = parse(record.strip(), record_line)
+                if parsed:
+                    yield parsed
+            return
+
+def batch_input_key(business_input: str) -> str:
+    return " ".join(business_input.split()).casefold()
+
+class BatchSubmissionService:
+    """Creates one analysis per distinct input of an uploaded portfolio and tracks them as a batch"""
+    
+    async def submit(
+        self,
+        user_id: str,
+        rows: AsyncIterator[Tuple[int, Optional[str], Optional[str]]],
+        options: Dict[str, Any],
+        filename: Optional[str]
+    ) -> Dict[str, Any]:
+        batch_id = str(uuid.uuid4())
+        requests = []
+        seen = set()
+        errors = []
+        rows_read = 0
+        duplicates = 0
+        truncated = False
+        
+        # Read and validate the whole upload before anything is started, so a failed upload
+        # leaves no analyses behind
+        async for line, business_input, error in rows:
+            rows_read += 1
+            if error is None:
+                key = batch_input_key(business_input)
+                if key in seen:
+                    duplicates += 1
+                    continue
+                if len(requests) >= BATCH_MAX_ITEMS:
+                    truncated = True
+                    break
+                try:
+                    request = BusinessAnalysisRequest(business_input=business_input.strip(), **options)
+                except ValidationError as e:
+                    error = e.errors()[0]["msg"]
+                else:
+                    seen.add(key)
+                    requests.append(request)
+                    continue
+            if len(errors) < BATCH_MAX_ERRORS:
+                errors.append({"line": line, "error": error})
+        
+        if not requests:
+            raise HTTPException(status_code=400, detail={"message": "No valid business inputs found", "errors": errors})
+        
+        now = datetime.utcnow()
+        batch = {
+            "id": batch_id,
+            "user_id": user_id,
+            "filename": filename,
+            "status": "processing",
+            "rows": rows_read,
+            "total": len(requests),
+            "duplicates": duplicates,
+            "truncated": truncated,
+            "errors": errors,
+            "analysis_ids": [],
+            "created_at": now,
+            "updated_at": now
+        }
+        await db.analysis_batches.insert_one(batch)
+        batch.pop("_id", None)
+        
+        analysis_ids = batch["analysis_ids"]
+        try:
+            for request in requests:
+                analysis = await business_service.perform_analysis(request, user_id, batch_id)
+                analysis_ids.append(analysis.id)
+        finally:
+            # Record the analyses that did start, even if a later one failed to
+            batch["total"] = len(analysis_ids)
+            await db.analysis_batches.update_one(
+                {"id": batch_id},
+                {"$set": {"analysis_ids": analysis_ids, "total": batch["total"]}}
+            )
+        logger.info(f"Batch {batch_id}: {len(analysis_ids)} analyses from {rows_read} rows ({duplicates} duplicates)")
+        return batch
+    
+    async def progress(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        """Aggregate the statuses of the batch's analyses; marks the batch completed when all finish"""
+        by_status = {
+            group["_id"]: group["count"]
+            async for group in db.business_analyses.aggregate([
+                {"$match": {"batch_id": batch["id"]}},
+                {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+            ])
+        }
+        finished = sum(by_status.get(status, 0) for status in BATCH_TERMINAL_STATUSES)
+        if batch["status"] != "completed" and finished >= batch["total"]:
+            batch["status"] = "completed"
+            batch["updated_at"] = datetime.utcnow()
+            await db.analysis_batches.update_one(
+                {"id": batch["id"]},
+                {"$set": {"status": "completed", "updated_at": batch["updated_at"]}}
+            )
+        batch["progress"] = {
+            "by_status": by_status,
+            "finished": finished,
+            "percent": round(finished / batch["total"] * 100, 1) if batch["total"] else 100.0
+        }
+        return batch
+    
+    async def iter_results(self, batch: Dict[str, Any], user_id: str):
+        """NDJSON lines with every analysis of the batch, in upload order"""
+        analysis_ids = batch["analysis_ids"]
+        for start in range(0, len(analysis_ids), BATCH_RESULTS_CHUNK):
+            chunk = analysis_ids[start:start + BATCH_RESULTS_CHUNK]
+            found = await db.business_analyses.find(
+                {"id": {"$in": chunk}, "user_id": user_id},
+                {"_id": 0, "search_text": 0}
+            ).to_list(length=len(chunk))
+            by_id = {analysis["id"]: analysis for analysis in found}
+            for analysis_id in chunk:
+                if analysis_id in by_id:
+                    yield encode_json(results_codec.decode(by_id[analysis_id])) + b"\n"
+
+batch_service = BatchSubmissionService()
+
+async def get_user_batch(batch_id: str, user_id: str, projection: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    batch = await db.analysis_batches.find_one({"id": batch_id, "user_id": user_id}, {"_id": 0, **(projection or {})})
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch
+
+@api_router.post("/analysis/batch")
+async def create_analysis_batch(
+    file: UploadFile = File(...),
+    upload_format: Optional[str] = Query(None, alias="format"),  # "csv" or "ndjson"; inferred from the file name when omitted
+    consensus_mode: bool = True,
+    reuse_similar: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    """Submit a portfolio of businesses, one per CSV row or NDJSON line.
+    
+    CSV uploads use a business_input column when the header has one, otherwise the
+    first column. Identical inputs are analyzed once.
+    """
+    if upload_format is None:
+        name = (file.filename or "").lower()
+        upload_format = "ndjson" if name.endswith((".ndjson", ".jsonl")) or "ndjson" in (file.content_type or "") else "csv"
+    if upload_format not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+    
+    batch = await batch_service.submit(
+        current_user.id,
+        iter_upload_rows(file, upload_format),
+        {"consensus_mode": consensus_mode, "reuse_similar": reuse_similar},
+        file.filename
+    )
+    return FastJSONResponse(batch)
+
+@api_router.get("/analysis/batch/{batch_id}")
+async def get_analysis_batch(
+    batch_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Batch record with aggregate progress across its analyses"""
+    batch = await get_user_batch(batch_id, current_user.id, {"analysis_ids": 0})
+    return FastJSONResponse(await batch_service.progress(batch))
+
+@api_router.get("/analysis/batch/{batch_id}/results")
+async def download_analysis_batch_results(
+    batch_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Stream every analysis of a finished batch as NDJSON"""
+    batch = await batch_service.progress(await get_user_batch(batch_id, current_user.id))
+    if batch["status"] != "completed":
+        raise HTTPException(status_code=409, detail=f"Batch is still processing ({batch['progress']['percent']}% done)")
+    
+    return StreamingResponse(
+        batch_service.iter_results(batch, current_user.id),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f"attachment; filename=batch_{batch_id}.ndjson"}
+    )
+
+ANALYSIS_FIELDS = set(BusinessAnalysis.__fields__)
+
+def analysis_projection(fields: Optional[str]) -> Tuple[Dict[str, int], Optional[List[str]]]:
+    """Mongo projection and framework subset for a fields= selector on a single analysis.
+    
+    Accepts top-level field names plus comprehensive_results.<framework> entries;
+    no selector means the whole document.
+    """
+    if not fields:
+        return {"_id": 0, "search_text": 0}, None
+    projection = {"_id": 0, "id": 1}
+    frameworks = []
+    unknown = []
+    for field in (field.strip() for field in fields.split(",")):
+        if not field:
+            continue
+        if field.startswith("comprehensive_results."):
+            framework = field.split(".", 1)[1]
+            if framework in ANALYSIS_FRAMEWORKS:
+                frameworks.append(framework)
+            else:
+                unknown.append(field)
+        elif field == "comprehensive_results":
+            projection.update(ResultsCodec.projection())
+        elif field in ANALYSIS_FIELDS:
+            projection[field] = 1
+        else:
+            unknown.append(field)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    if "comprehensive_results" in projection:
+        return projection, None
+    if frameworks:
+        projection.update(ResultsCodec.projection(frameworks))
+    return projection, frameworks or None
+
 @api_router.get("/analysis/{analysis_id}")
 async def get_analysis(
+    analysis_id: str,
+    current_user: User = Depends(get_current_user),
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None)
+):
+    """Get an analysis; fields=a,b,comprehensive_results.swot_analysis limits what is loaded"""
+    projection, frameworks = analysis_projection(fields)
+    filter_query = {"id": analysis_id, "user_id": current_user.id}
+    variant = f"analysis|{fields}"
+    
+    if if_none_match:
+        stamp = await db.business_analyses.find_one(filter_query, ETAG_PROJECTION)
+        if not stamp:
+            raise HTTPException(status_code=404, detail="Analysis not found")
+        etag = make_etag([stamp], variant)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+    
+    projection, extra_fields = with_etag_fields(projection)
+    analysis = await db.business_analyses.find_one(filter_query, projection)
+    
+    if not analysis:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    
+    etag = make_etag([analysis], variant)
+    strip_fields([analysis], extra_fields)
+    return FastJSONResponse(results_codec.decode(analysis, frameworks), headers={"ETag": etag})
+
+@api_router.get("/analysis/{analysis_id}/frameworks/{framework}")
+async def get_analysis_framework(
+    analysis_id: str,
+    framework: str,
+    current_user: User = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(None)
+):
+    """Get the results of a single framework, loading only that framework from storage"""
+    if framework not in ANALYSIS_FRAMEWORKS:
+        raise HTTPException(status_code=404, detail="Unknown framework")
+    
+    filter_query = {"id": analysis_id, "user_id": current_user.id}
+    variant = f"framework|{framework}"
+    if if_none_match:
+        stamp = await db.business_analyses.find_one(filter_query, ETAG_PROJECTION)
+        if not stamp:
+            raise HTTPException(status_code=404, detail="Analysis not found")
+        etag = make_etag([stamp], variant)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+    
+    analysis = await db.business_analyses.find_one(
+        filter_query,
+        {"status": 1, **ETAG_PROJECTION, **ResultsCodec.projection([framework])}
+    )
+    
+    if not analysis:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    
+    results_codec.decode(analysis, [framework])
+    return FastJSONResponse({
+        "analysis_id": analysis_id,
+        "framework": framework,
+        "status": analysis.get("status"),
+        "results": analysis.get("comprehensive_results", {}).get(framework)
+    }, headers={"ETag": make_etag([analysis], variant)})
+
+@api_router.get("/analysis/{analysis_id}/events")
+async def stream_analysis_events(
     analysis_id: str,
     current_user: User = Depends(get_current_user)
 ):
-    analysis = await db.business_analyses.find_one({
-        "id": analysis_id,
-        "user_id": current_user.id
-    })
+    """Stream analysis progress as server-sent events"""
+    queue = progress_broker.subscribe(analysis_id)
+    analysis = await db.business_analyses.find_one(
+        {"id": analysis_id, "user_id": current_user.id},
+        {"status": 1}
+    )
     
     if not analysis:
+        progress_broker.unsubscribe(analysis_id, queue)
         raise HTTPException(status_code=404, detail="Analysis not found")
     
-    # Remove MongoDB ObjectId
-    if "_id" in analysis:
-        del analysis["_id"]
+    async def event_stream():
+        try:
+            yield f"data: {json.dumps({'type': 'status', 'status': analysis['status']})}\n\n"
+            if analysis["status"] in ("completed", "failed", "cancelled"):
+                return
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=PROGRESS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"data: {json.dumps(event, default=str)}\n\n"
+                if event.get("type") == "status" and event.get("status") in ("completed", "failed", "cancelled"):
+                    return
+        finally:
+            progress_broker.unsubscribe(analysis_id, queue)
     
-    return analysis
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
 
 @api_router.delete("/analysis/{analysis_id}")
 async def delete_analysis(
@@ -1584,90 +4423,701 @@ async def delete_analysis(
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Analysis not found")
     
+    semantic_index.remove(analysis_id)
+    history_search.remove(current_user.id, analysis_id)
+    await export_cache.remove_analysis(analysis_id)
+    
     return {"message": "Analysis deleted successfully"}
 
+# Export rendering and cache
+EXPORT_MEDIA_TYPES = {
+    "pdf": "application/pdf",
+    "pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+}
+EXPORT_STYLES = tuple(EXPORT_STYLE_REGISTRY)
+
+def render_export(analysis: Dict[str, Any], fmt: str, style: str, output: BinaryIO):
+    renderers = {
+        "pdf": export_service.generate_pdf_report,
+        "pptx": export_service.generate_pptx_report,
+        "docx": export_service.generate_docx_report
+    }
+    renderers[fmt](analysis, style, output)
+
+def preload_export_templates():
+    """Worker initializer: parse the master templates before the first render"""
+    try:
+        export_service.load_templates()
+    except Exception as e:
+        # Leave the worker usable; the render that needs the template reports the error
+        logger.error(f"Failed to load export templates: {str(e)}")
+
+def timed_render_export(analysis: Dict[str, Any], fmt: str, style: str, destination: Optional[str] = None) -> Tuple[Union[bytes, str], float]:
+    """Worker-process entry point; returns the document, or the path of the file holding it,
+    and its render time.
+    
+    With a destination the document is written straight to that file. Otherwise it is
+    spooled in memory and returned as bytes, unless it outgrows EXPORT_SPOOL_MAX_BYTES and
+    is handed back as a temp file the caller must delete.
+    """
+    started = time.perf_counter()
+    if destination is not None:
+        with open(destination, "wb") as output:
+            render_export(analysis, fmt, style, output)
+        return destination, time.perf_counter() - started
+    with tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_BYTES) as spool:
+        render_export(analysis, fmt, style, spool)
+        in_memory = spool.seek(0, io.SEEK_END) <= EXPORT_SPOOL_MAX_BYTES
+        spool.seek(0)
+        if in_memory:
+            return spool.read(), time.perf_counter() - started
+        with tempfile.NamedTemporaryFile(suffix=f".{fmt}", delete=False) as spilled:
+            shutil.copyfileobj(spool, spilled)
+        return spilled.name, time.perf_counter() - started
+
+def discard_export(content: Union[bytes, Path]):
+    """Delete a render that spilled to a temp file"""
+    if isinstance(content, Path):
+        content.unlink(missing_ok=True)
+
+class ExportRenderer:
+    """Renders exports in a bounded process pool so reportlab/python-pptx/python-docx never
+    run on the event loop.
+    
+    At most max_pending renders may be waiting or running; beyond that interactive
+    requests get 503 with Retry-After and queued (bulk) renders wait for a slot. Queued
+    renders hold at most max_pending - interactive_reserve of those slots and give way to
+    interactive ones for free workers. Jobs are handed to the pool only when a worker is
+    free, so the timeout covers rendering rather than waiting. A render that exceeds it
+    fails the request but keeps its worker until it actually finishes.
+    """
+    HISTOGRAM_BOUNDS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+    
+    def __init__(self, workers: int = EXPORT_WORKERS, max_pending: int = EXPORT_MAX_PENDING, timeout: float = EXPORT_RENDER_TIMEOUT,
+                 interactive_reserve: int = EXPORT_INTERACTIVE_RESERVE):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.queued_limit = max(1, max_pending - interactive_reserve)
+        self.timeout = timeout
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.pending = 0
+        self.queued_pending = 0  # pending renders that came in with queue=True
+        self.running = 0  # renders handed to the pool and not yet finished
+        self.interactive_waiting = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.rejected = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.histogram = {fmt: [0] * (len(self.HISTOGRAM_BOUNDS_MS) + 1) for fmt in EXPORT_MEDIA_TYPES}
+        self.render_seconds = {fmt: 0.0 for fmt in EXPORT_MEDIA_TYPES}
+    
+    def _executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            # spawn: forking a process that holds the event loop, Motor and thread pools is unsafe
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=preload_export_templates
+            )
+        return self.executor
+    
+    def _reset(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+    
+    @staticmethod
+    def _busy() -> HTTPException:
+        return HTTPException(
+            status_code=503,
+            detail="Export rendering is busy, please retry shortly",
+            headers={"Retry-After": str(EXPORT_RETRY_AFTER)}
+        )
+    
+    def saturated(self) -> bool:
+        return self.pending >= self.max_pending
+    
+    def _record(self, fmt: str, seconds: float):
+        milliseconds = seconds * 1000
+        self.histogram[fmt][bisect.bisect_left(self.HISTOGRAM_BOUNDS_MS, milliseconds)] += 1
+        self.render_seconds[fmt] += seconds
+    
+    def _wake(self):
+        # Each woken render re-checks what it waits for and waits again if it lost the race
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+    
+    def _release(self, queue: bool):
+        self.pending -= 1
+        self.queued_pending -= queue
+        self._wake()
+    
+    def _finished(self, queue: bool):
+        self.running -= 1
+        self._release(queue)
+    
+    @staticmethod
+    def _abandon(future, destination: Optional[Path]):
+        """Delete the spilled temp file of a render nobody will collect, once its worker finishes"""
+        if destination is not None:
+            return
+        def discard(done):
+            if not done.cancelled() and done.exception() is None:
+                content, _ = done.result()
+                if isinstance(content, str):
+                    discard_export(Path(content))
+        future.add_done_callback(discard)
+    
+    async def _wait_until(self, ready: Callable[[], bool]):
+        while not ready():
+            waiter = asyncio.get_running_loop().create_future()
+            self.waiters.append(waiter)
+            await waiter
+    
+    async def _wait_for_worker(self, queue: bool):
+        if queue:
+            await self._wait_until(lambda: self.running < self.workers and not self.interactive_waiting)
+            return
+        self.interactive_waiting += 1
+        try:
+            await self._wait_until(lambda: self.running < self.workers)
+        finally:
+            self.interactive_waiting -= 1
+    
+    async def render(self, analysis: Dict[str, Any], fmt: str, style: str, queue: bool = False, destination: Optional[Path] = None) -> Union[bytes, Path]:
+        """Render in a worker process; queue=True waits for capacity instead of raising 503.
+        
+        Returns a Path when the document was written to destination or spilled to disk.
+        """
+        if queue:
+            await self._wait_until(lambda: not self.saturated() and self.queued_pending < self.queued_limit)
+        elif self.saturated():
+            self.rejected += 1
+            raise self._busy()
+        self.pending += 1
+        self.queued_pending += queue
+        submitted = False
+        try:
+            await self._wait_for_worker(queue)
+            future = self._executor().submit(timed_render_export, analysis, fmt, style, destination and str(destination))
+            submitted = True
+        except BrokenProcessPool:
+            self._reset()
+            raise self._busy()
+        finally:
+            if not submitted:
+                self._release(queue)
+        self.running += 1
+        
+        # Done callbacks run on the executor's management thread, which can outlive the loop
+        # when shutdown() cancels queued work
+        loop = asyncio.get_running_loop()
+        def finished(done):
+            try:
+                loop.call_soon_threadsafe(self._finished, queue)
+            except RuntimeError:
+                pass  # event loop already closed
+        future.add_done_callback(finished)
+        try:
+            content, seconds = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self._abandon(future, destination)
+            raise HTTPException(status_code=504, detail=f"Export rendering timed out after {self.timeout:g}s")
+        except asyncio.CancelledError:
+            self._abandon(future, destination)
+            raise
+        except BrokenProcessPool:
+            # A worker died; the next render starts a fresh pool
+            self.failures += 1
+            self._reset()
+            raise self._busy()
+        except ExportTemplateError as e:
+            self.failures += 1
+            raise HTTPException(status_code=500, detail=str(e))
+        except Exception:
+            self.failures += 1
+            raise
+        self._record(fmt, seconds)
+        return Path(content) if isinstance(content, str) else content
+    
+    def shutdown(self):
+        self._reset()
+    
+    def stats(self) -> Dict[str, Any]:
+        labels = [f"<={bound}ms" for bound in self.HISTOGRAM_BOUNDS_MS] + [f">{self.HISTOGRAM_BOUNDS_MS[-1]}ms"]
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "running": self.running,
+            "queued_pending": self.queued_pending,
+            "waiting": sum(not waiter.done() for waiter in self.waiters),
+            "max_pending": self.max_pending,
+            "queued_limit": self.queued_limit,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "formats": {
+                fmt: {
+                    "renders": sum(counts),
+                    "avg_ms": round(self.render_seconds[fmt] / sum(counts) * 1000, 1) if sum(counts) else 0.0,
+                    "histogram": dict(zip(labels, counts))
+                }
+                for fmt, counts in self.histogram.items()
+            }
+        }
+
+export_renderer = ExportRenderer()
+
+class ExportCache:
+    """Rendered exports on local disk, keyed by (analysis_id, updated_at, format, style).
+    
+    Each analysis gets its own directory so deleting it drops one tree. Total size is
+    bounded by an in-memory LRU over the files; hits touch the file mtime so the LRU
+    order survives restarts. Filesystem calls run in threads, off the event loop.
+    """
+    def __init__(self, directory: str = EXPORT_CACHE_DIR, max_bytes: int = EXPORT_CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[Path, int]" = OrderedDict()
+        self.total_bytes = 0
+        self.loaded = False
+        self.loading: Optional[asyncio.Future] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def _scan(self) -> List[Tuple[float, Path, int]]:
+        files = []
+        for path in self.directory.glob("*/*"):
+            if path.suffix.lstrip(".") in EXPORT_MEDIA_TYPES:
+                stat = path.stat()
+                files.append((stat.st_mtime, path, stat.st_size))
+        # Renders interrupted by a restart
+        for path in self.directory.glob("*/.*.tmp"):
+            path.unlink(missing_ok=True)
+        return sorted(files)
+    
+    async def _load(self):
+        if self.loaded:
+            return
+        if self.loading is None:
+            self.loading = asyncio.ensure_future(asyncio.to_thread(self._scan))
+        files = await asyncio.shield(self.loading)
+        if self.loaded:
+            return
+        self.loaded = True
+        for _, path, size in files:
+            self.entries[path] = size
+            self.total_bytes += size
+        await self._evict()
+    
+    def _analysis_dir(self, analysis_id: str) -> Path:
+        return self.directory / re.sub(r"[^A-Za-z0-9_-]", "_", analysis_id)
+    
+    def path_for(self, analysis_id: str, updated_at: datetime, fmt: str, style: str) -> Path:
+        stamp = int(updated_at.replace(tzinfo=timezone.utc).timestamp() * 1000)
+        return self._analysis_dir(analysis_id) / f"{stamp}_v{EXPORT_RENDER_VERSION}_{style}.{fmt}"
+    
+    @staticmethod
+    def _unlink(path: Path):
+        path.unlink(missing_ok=True)
+        try:
+            path.parent.rmdir()
+        except OSError:
+            pass  # other exports of the analysis remain
+    
+    async def _drop(self, path: Path):
+        # Forget the file before awaiting so no concurrent request is handed it
+        self.total_bytes -= self.entries.pop(path, 0)
+        await asyncio.to_thread(self._unlink, path)
+    
+    async def _evict(self):
+        while self.total_bytes > self.max_bytes and self.entries:
+            await self._drop(next(iter(self.entries)))
+            self.evictions += 1
+    
+    async def get(self, analysis_id: str, updated_at: datetime, fmt: str, style: str) -> Optional[Path]:
+        await self._load()
+        path = self.path_for(analysis_id, updated_at, fmt, style)
+        if path in self.entries:
+            self.entries.move_to_end(path)
+            try:
+                await asyncio.to_thread(os.utime, path)
+            except FileNotFoundError:
+                pass  # removed behind the cache's back
+            else:
+                self.hits += 1
+                return path
+        self.total_bytes -= self.entries.pop(path, 0)
+        self.misses += 1
+        return None
+    
+    async def reserve(self, analysis_id: str) -> Path:
+        """A temp file path in the analysis directory for a render to write into"""
+        await self._load()
+        directory = self._analysis_dir(analysis_id)
+        await asyncio.to_thread(directory.mkdir, parents=True, exist_ok=True)
+        return directory / f".{uuid.uuid4().hex}.tmp"
+    
+    @staticmethod
+    def _move(temporary: Path, path: Path) -> int:
+        size = temporary.stat().st_size
+        os.replace(temporary, path)
+        return size
+    
+    async def put(self, analysis_id: str, updated_at: datetime, fmt: str, style: str, temporary: Path) -> Path:
+        """Move a render from a reserve()d path into the cache and return its final path.
+        
+        A file larger than the whole cache is still moved into place for the requests
+        waiting on it, but is not tracked, so the next request renders it again.
+        """
+        path = self.path_for(analysis_id, updated_at, fmt, style)
+        size = await asyncio.to_thread(self._move, temporary, path)
+        # Renders of older versions of this analysis can never be served again
+        for stale in [entry for entry in self.entries if entry.parent == path.parent and entry.name.endswith(f"_{style}.{fmt}") and entry != path]:
+            await self._drop(stale)
+        self.total_bytes -= self.entries.pop(path, 0)
+        if size <= self.max_bytes:
+            self.entries[path] = size
+            self.total_bytes += size
+            await self._evict()
+        return path
+    
+    async def remove_analysis(self, analysis_id: str):
+        await self._load()
+        directory = self._analysis_dir(analysis_id)
+        for path in [entry for entry in self.entries if entry.parent == directory]:
+            self.total_bytes -= self.entries.pop(path)
+        await asyncio.to_thread(shutil.rmtree, directory, ignore_errors=True)
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": EXPORT_CACHE_ENABLED,
+            "entries": len(self.entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions
+        }
+
+export_cache = ExportCache()
+
+# Renders in progress, keyed by cache path, so concurrent requests for one version share a render
+export_renders: Dict[Path, asyncio.Task] = {}
+
+async def render_to_cache(analysis: Dict[str, Any], fmt: str, style: str, queue: bool = False) -> Path:
+    """Render an export into the cache, joining a render of the same version already in progress.
+    
+    The worker writes the file in the cache directory itself, so the document never passes
+    through this process's memory.
+    """
+    key = export_cache.path_for(analysis["id"], analysis["updated_at"], fmt, style)
+    task = export_renders.get(key)
+    if task is None:
+        async def run():
+            temporary = await export_cache.reserve(analysis["id"])
+            try:
+                await export_renderer.render(analysis, fmt, style, queue=queue, destination=temporary)
+            except BaseException:
+                # A timed-out worker may still be writing; the unlinked file goes when it closes
+                temporary.unlink(missing_ok=True)
+                raise
+            return await export_cache.put(analysis["id"], analysis["updated_at"], fmt, style, temporary)
+        task = asyncio.ensure_future(run())
+        export_renders[key] = task
+        task.add_done_callback(lambda _: export_renders.pop(key, None))
+    # Shielded so a disconnecting client does not cancel a render others are waiting for
+    return await asyncio.shield(task)
+
+async def prerender_exports(analysis_id: str):
+    """Render the EXPORT_PRERENDER_* exports of a just-completed analysis into the cache"""
+    analysis = await db.business_analyses.find_one({"id": analysis_id}, {"_id": 0, "search_text": 0})
+    if not analysis or analysis.get("status") != "completed":
+        return
+    results_codec.decode(analysis)
+    for fmt in EXPORT_PRERENDER_FORMATS:
+        for style in EXPORT_PRERENDER_STYLES:
+            if export_cache.path_for(analysis_id, analysis["updated_at"], fmt, style) in export_cache.entries:
+                continue
+            # Pre-renders give way to interactive downloads when the pool is saturated
+            if export_renderer.saturated():
+                logger.info(f"Skipping export pre-render of {analysis_id}: render pool saturated")
+                return
+            try:
+                await render_to_cache(analysis, fmt, style)
+            except Exception as e:
+                logger.error(f"Export pre-render of {analysis_id} ({fmt}, {style}) failed: {getattr(e, 'detail', str(e))}")
+
+async def export_analysis(
+    analysis_id: str,
+    user_id: str,
+    fmt: str,
+    style: str,
+    if_none_match: Optional[str],
+    if_modified_since: Optional[str],
+    range_header: Optional[str],
+    if_range: Optional[str]
+) -> Response:
+    """Serve an export: 304 from stamps, a cached file, or a fresh render that is then cached"""
+    filter_query = {"id": analysis_id, "user_id": user_id}
+    stamp = await db.business_analyses.find_one(filter_query, ETAG_PROJECTION)
+    if not stamp:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    
+    variant = f"export|{fmt}|{style}|{EXPORT_RENDER_VERSION}"
+    headers = export_validators(stamp, variant)
+    # If-None-Match takes precedence over If-Modified-Since
+    if etag_matches(if_none_match, headers["ETag"]) if if_none_match else (
+        if_modified_since and unmodified_since(stamp["updated_at"], if_modified_since)
+    ):
+        return Response(status_code=304, headers=headers)
+    headers["Content-Disposition"] = f"attachment; filename=business_analysis_{analysis_id}.{fmt}"
+    
+    cacheable = EXPORT_CACHE_ENABLED and style in EXPORT_STYLES
+    path = await export_cache.get(analysis_id, stamp["updated_at"], fmt, style) if cacheable else None
+    if path is None:
+        in_flight = export_renders.get(export_cache.path_for(analysis_id, stamp["updated_at"], fmt, style)) if cacheable else None
+        if in_flight is not None:
+            # A pre-render or another download of this version is already running
+            path = await asyncio.shield(in_flight)
+        else:
+            # Reject before loading the document when the pool is already saturated
+            if export_renderer.saturated():
+                export_renderer.rejected += 1
+                raise export_renderer._busy()
+            analysis = await db.business_analyses.find_one(filter_query, {"_id": 0, "search_text": 0})
+            if not analysis:
+                raise HTTPException(status_code=404, detail="Analysis not found")
+            results_codec.decode(analysis)
+            headers.update(export_validators(analysis, variant))
+            if cacheable:
+                path = await render_to_cache(analysis, fmt, style)
+            else:
+                content = await export_renderer.render(analysis, fmt, style)
+                if isinstance(content, bytes):
+                    return Response(content, media_type=EXPORT_MEDIA_TYPES[fmt], headers=headers)
+                # Spilled to a temp file: stream it and delete it afterwards
+                return ranged_file_response(content, EXPORT_MEDIA_TYPES[fmt], headers, range_header, if_range, delete_after=True)
+    
+    return ranged_file_response(path, EXPORT_MEDIA_TYPES[fmt], headers, range_header, if_range)
+
 # Export endpoints
 @api_router.get("/analysis/{analysis_id}/export/pdf")
 async def export_analysis_pdf(
     analysis_id: str,
     style: str = "designed",  # "designed" or "black_and_white"
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_range: Optional[str] = Header(None)
 ):
     """Export analysis as PDF"""
-    analysis = await db.business_analyses.find_one({
-        "id": analysis_id,
-        "user_id": current_user.id
-    })
-    
-    if not analysis:
-        raise HTTPException(status_code=404, detail="Analysis not found")
-    
-    if "_id" in analysis:
-        del analysis["_id"]
-    
-    pdf_content = export_service.generate_pdf_report(analysis, style)
-    
-    filename = f"business_analysis_{analysis_id}.pdf"
-    
-    return StreamingResponse(
-        io.BytesIO(pdf_content),
-        media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
+    return await export_analysis(analysis_id, current_user.id, "pdf", style, if_none_match, if_modified_since, range_header, if_range)
 
 @api_router.get("/analysis/{analysis_id}/export/pptx")
 async def export_analysis_pptx(
     analysis_id: str,
     style: str = "designed",  # "designed" or "black_and_white"
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_range: Optional[str] = Header(None)
 ):
     """Export analysis as PowerPoint presentation"""
-    analysis = await db.business_analyses.find_one({
-        "id": analysis_id,
-        "user_id": current_user.id
-    })
-    
-    if not analysis:
-        raise HTTPException(status_code=404, detail="Analysis not found")
-    
-    if "_id" in analysis:
-        del analysis["_id"]
-    
-    pptx_content = export_service.generate_pptx_report(analysis, style)
-    
-    filename = f"business_analysis_{analysis_id}.pptx"
-    
-    return StreamingResponse(
-        io.BytesIO(pptx_content),
-        media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
+    return await export_analysis(analysis_id, current_user.id, "pptx", style, if_none_match, if_modified_since, range_header, if_range)
 
 @api_router.get("/analysis/{analysis_id}/export/docx")
 async def export_analysis_docx(
     analysis_id: str,
     style: str = "designed",  # "designed" or "black_and_white"
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_range: Optional[str] = Header(None)
 ):
     """Export analysis as Word document"""
-    analysis = await db.business_analyses.find_one({
-        "id": analysis_id,
-        "user_id": current_user.id
-    })
+    return await export_analysis(analysis_id, current_user.id, "docx", style, if_none_match, if_modified_since, range_header, if_range)
+
+# Bulk export
+class BulkExportRequest(BaseModel):
+    analysis_ids: List[str]
+    formats: List[str] = ["pdf"]
+    style: str = "designed"
     
-    if not analysis:
-        raise HTTPException(status_code=404, detail="Analysis not found")
+    @validator('formats')
+    def validate_formats(cls, v):
+        unknown = [fmt for fmt in v if fmt not in EXPORT_MEDIA_TYPES]
+        if not v or unknown:
+            raise ValueError(f'formats must be a non-empty subset of {", ".join(EXPORT_MEDIA_TYPES)}')
+        return list(dict.fromkeys(v))
+    
+    @validator('style')
+    def validate_style(cls, v):
+        if v not in EXPORT_STYLES:
+            raise ValueError(f'style must be one of {", ".join(EXPORT_STYLES)}')
+        return v
+
+# Spilled renders are copied into bulk export archives this much at a time
+EXPORT_ZIP_COPY_CHUNK = 256 * 1024
+
+def discard_finished_exports(task: asyncio.Task):
+    """Delete the spilled renders of a finished bulk-export task whose result is never used"""
+    if not task.cancelled() and task.exception() is None:
+        for document in task.result():
+            discard_export(document)
+
+class ZipStreamBuffer:
+    """Write-only file object for ZipFile that hands back whatever has been written so far"""
+    def __init__(self):
+        self.chunks = []
     
-    if "_id" in analysis:
-        del analysis["_id"]
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
     
-    docx_content = export_service.generate_docx_report(analysis, style)
+    def flush(self):
+        pass
+    
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+class BulkExportService:
+    """Streams a ZIP of many exports, rendering a bounded window of analyses in the export pool.
+    
+    Only `workers` analyses and their rendered files are held at a time; each file is
+    written to the archive and sent as soon as it and everything before it is done.
+    """
+    def __init__(self, workers: int = EXPORT_WORKERS):
+        self.workers = workers
+    
+    async def _render_analysis(self, analysis_id: str, user_id: str, formats: List[str], style: str) -> List[Union[bytes, Path]]:
+        analysis = await db.business_analyses.find_one(
+            {"id": analysis_id, "user_id": user_id},
+            {"_id": 0, "search_text": 0}
+        )
+        if not analysis:
+            raise LookupError("Analysis not found")
+        results_codec.decode(analysis)
+        # Bulk jobs queue behind interactive renders instead of being rejected
+        renders = [
+            asyncio.ensure_future(export_renderer.render(analysis, fmt, style, queue=True))
+            for fmt in formats
+        ]
+        try:
+            documents = await asyncio.gather(*renders, return_exceptions=True)
+        except asyncio.CancelledError:
+            # Formats that finished before the cancellation still hold their files
+            for render in renders:
+                if render.done() and not render.cancelled() and render.exception() is None:
+                    discard_export(render.result())
+            raise
+        failed = [document for document in documents if isinstance(document, BaseException)]
+        if failed:
+            for document in documents:
+                if not isinstance(document, BaseException):
+                    discard_export(document)
+            raise failed[0]
+        return documents
+    
+    async def stream(self, analysis_ids: List[str], user_id: str, formats: List[str], style: str):
+        buffer = ZipStreamBuffer()
+        pending = deque()
+        remaining = iter(analysis_ids)
+        manifest = []
+        
+        def schedule():
+            for analysis_id in itertools.islice(remaining, self.workers - len(pending)):
+                pending.append((analysis_id, asyncio.create_task(self._render_analysis(analysis_id, user_id, formats, style))))
+        
+        try:
+            # Rendered documents are already compressed, so entries are stored as-is
+            with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+                schedule()
+                while pending:
+                    analysis_id, task = pending.popleft()
+                    try:
+                        documents = await task
+                    except Exception as e:
+                        logger.error(f"Bulk export of {analysis_id} failed: {str(e)}")
+                        manifest.append({"analysis_id": analysis_id, "error": str(e)})
+                    else:
+                        files = []
+                        schedule()
+                        try:
+                            for fmt, content in zip(formats, documents):
+                                filename = f"business_analysis_{analysis_id}.{fmt}"
+                                if isinstance(content, Path):
+                                    # Spilled renders are streamed through the archive a chunk at a time
+                                    entry = zipfile.ZipInfo(filename, date_time=time.localtime()[:6])
+                                    entry.file_size = content.stat().st_size
+                                    with open(content, "rb") as source, archive.open(entry, "w") as target:
+                                        while chunk := await asyncio.to_thread(source.read, EXPORT_ZIP_COPY_CHUNK):
+                                            target.write(chunk)
+                                            yield buffer.drain()
+                                    discard_export(content)
+                                else:
+                                    archive.writestr(filename, content)
+                                files.append(filename)
+                                yield buffer.drain()
+                        finally:
+                            for content in documents:
+                                discard_export(content)
+                        manifest.append({"analysis_id": analysis_id, "files": files})
+                    schedule()
+                    yield buffer.drain()
+                archive.writestr("manifest.json", json.dumps({"style": style, "exports": manifest}, indent=2))
+            yield buffer.drain()
+        finally:
+            # The client went away or the archive failed: stop the renders still in flight and
+            # delete whatever they already produced
+            for _, task in pending:
+                task.cancel()
+                task.add_done_callback(discard_finished_exports)
+
+bulk_export_service = BulkExportService()
+
+@api_router.post("/analysis/export/bulk")
+async def export_analyses_bulk(
+    request: BulkExportRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """Export many analyses in several formats as one streamed ZIP archive"""
+    analysis_ids = list(dict.fromkeys(request.analysis_ids))
+    if not analysis_ids:
+        raise HTTPException(status_code=400, detail="analysis_ids must not be empty")
+    if len(analysis_ids) > EXPORT_BULK_MAX_ANALYSES:
+        raise HTTPException(status_code=400, detail=f"At most {EXPORT_BULK_MAX_ANALYSES} analyses can be exported at once")
     
-    filename = f"business_analysis_{analysis_id}.docx"
+    owned = await db.business_analyses.find(
+        {"id": {"$in": analysis_ids}, "user_id": current_user.id},
+        {"_id": 0, "id": 1}
+    ).to_list(length=len(analysis_ids))
+    owned_ids = {analysis["id"] for analysis in owned}
+    if not owned_ids:
+        raise HTTPException(status_code=404, detail="Analysis not found")
     
+    filename = f"business_analyses_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.zip"
     return StreamingResponse(
-        io.BytesIO(docx_content),
-        media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        # Ids the user does not own are reported as not found in manifest.json
+        bulk_export_service.stream(
+            analysis_ids,
+            current_user.id,
+            request.formats,
+            request.style
+        ),
+        media_type="application/zip",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
@@ -1680,15 +5130,29 @@ async def root():
         "powered_by": "Elite Global AI"
     }
 
-@api_router.get("/stats")
-async def get_statistics():
+@api_router.get("/providers/stats", dependencies=[Depends(require_metrics_token)])
+async def get_provider_statistics():
+    """Rolling latency and error statistics per AI provider"""
+    return provider_registry.stats()
+
+@api_router.get("/metrics", dependencies=[Depends(require_metrics_token)])
+async def get_metrics():
+    """Operational metrics for the platform's internal pools and caches"""
     return {
-        "users": "12,847+",
-        "avgGenerationTime": "42 seconds",
-        "accountsCreated": "12,847",
-        "venturesAnalyzed": "23,156"
+        "providers": provider_registry.stats(),
+        "password_hashing": password_hasher.stats(),
+        "user_cache": user_cache.stats(),
+        "results_storage": results_codec.stats(),
+        "compression": compression_stats.stats(),
+        "export_cache": export_cache.stats(),
+        "export_rendering": export_renderer.stats()
     }
 
+@api_router.get("/stats")
+async def get_statistics():
+    """Public platform statistics from the cached counters snapshot"""
+    return Response(content=await platform_stats.get(), media_type="application/json")
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -1699,8 +5163,73 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
+# Response compression
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
+@app.on_event("startup")
+async def ensure_indexes():
+    if ENSURE_INDEXES_ON_STARTUP:
+        try:
+            await index_manager.ensure()
+        except Exception as e:
+            logger.error(f"Failed to ensure indexes: {str(e)}")
+
+@app.on_event("startup")
+async def seed_platform_stats():
+    try:
+        await platform_stats.seed()
+    except Exception as e:
+        logger.error(f"Failed to seed platform stats: {str(e)}")
+
+@app.on_event("startup")
+async def warm_semantic_index():
+    if SEMANTIC_INDEX_ENABLED:
+        try:
+            await semantic_index.warm()
+        except Exception as e:
+            logger.error(f"Failed to warm semantic index: {str(e)}")
+
+@app.on_event("shutdown")
+async def save_semantic_index():
+    if SEMANTIC_INDEX_ENABLED and SEMANTIC_INDEX_PATH:
+        try:
+            semantic_index.save(SEMANTIC_INDEX_PATH)
+        except Exception as e:
+            logger.error(f"Failed to save semantic index snapshot: {str(e)}")
+
+@app.on_event("shutdown")
+async def close_url_enrichment():
+    await url_enrichment.close()
+
+@app.on_event("shutdown")
+async def shutdown_export_renderer():
+    export_renderer.shutdown()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    client.close()
+
+async def check_indexes(create: bool = False) -> int:
+    """Report missing indexes and query plans that no longer use their index"""
+    if create:
+        await index_manager.ensure()
+    problems = await index_manager.missing() + await index_manager.explain_regressions()
+    for problem in problems:
+        print(f"✗ {problem}")
+    if not problems:
+        print("✓ All indexes present and used by their queries")
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Somna AI backend maintenance")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    check_parser = subcommands.add_parser("check-indexes", help="Report missing indexes and explain-plan regressions")
+    check_parser.add_argument("--create", action="store_true", help="Create missing indexes before checking")
+    args = parser.parse_args()
+    
+    if args.command == "check-indexes":
+        sys.exit(asyncio.run(check_indexes(create=args.create)))
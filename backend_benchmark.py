@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the backend hot paths, run in-process against realistic payloads.
+
+Usage: python backend_benchmark.py
+"""
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Tuple
+
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+os.environ.setdefault("DEMO_MODE", "true")
+
+import server
+from fastapi.encoders import jsonable_encoder
+
+MODELS = ["deepseek", "gemini", "openai"]
+WORDS = (
+    "market customer revenue growth platform pricing retention channel partner supply "
+    "regulation competitor margin acquisition churn subscription segment brand logistics "
+    "automation enterprise adoption risk funding expansion demand forecast operations"
+).split()
+
+rng = random.Random(42)
+
+def sentence(words: int = 28) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+def sample_value(schema):
+    """Fill a framework schema with result-sized text, as a model response would"""
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+    if schema["type"] == "object":
+        properties = schema.get("properties") or {word: {"type": "number"} for word in WORDS[:8]}
+        return {key: sample_value(value) for key, value in properties.items()}
+    if schema["type"] == "array":
+        return [sample_value(schema["items"]) for _ in range(6)]
+    if schema["type"] == "number":
+        return round(rng.random(), 2)
+    return sentence()
+
+def build_analysis_payload():
+    """A completed 25-framework, three-model analysis as returned by GET /analysis/{id}"""
+    comprehensive_results = {
+        framework: {
+            model: {
+                "analysis": sample_value(server.FRAMEWORK_SCHEMAS[framework]),
+                "confidence_score": 0.85,
+                "processing_time": round(rng.uniform(2, 20), 2),
+                "schema_valid": True
+            }
+            for model in MODELS
+        }
+        for framework in server.ANALYSIS_FRAMEWORKS
+    }
+    created_at = datetime.utcnow().replace(microsecond=123000)
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": str(uuid.uuid4()),
+        "business_input": "A subscription coffee delivery service for offices",
+        "comprehensive_results": comprehensive_results,
+        "ai_consensus": {"overall_score": 0.82, "key_insights": [sentence() for _ in range(5)]},
+        "confidence_score": 0.84,
+        "status": "completed",
+        "error": None,
+        "summary": server.build_analysis_summary(comprehensive_results, {}, 0.84),
+        "version": 2,
+        "created_at": created_at,
+        "updated_at": created_at + timedelta(minutes=3)
+    }
+
+def build_history_page(analysis, size: int = 50):
+    return [
+        {field: analysis.get(field) for field in server.HISTORY_SUMMARY_FIELDS}
+        for _ in range(size)
+    ]
+
+def default_render(content) -> bytes:
+    """What FastAPI does for a returned dict: jsonable_encoder, then JSONResponse.render"""
+    return json.dumps(
+        jsonable_encoder(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+def fast_render(content) -> bytes:
+    return server.FastJSONResponse(content).body
+
+def benchmark(fn, *args, iterations: int = 50) -> float:
+    """Median wall time of fn(*args) in milliseconds"""
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn(*args)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+def benchmark_json_encoding():
+    """Compare default and orjson encoding of analysis, framework and history payloads"""
+    print("\n=== JSON Encoding ===")
+    print(f"orjson available: {server.orjson is not None}")
+    analysis = build_analysis_payload()
+    payloads = {
+        "analysis": analysis,
+        "framework": {
+            "analysis_id": analysis["id"],
+            "framework": "swot_analysis",
+            "status": "completed",
+            "results": analysis["comprehensive_results"]["swot_analysis"]
+        },
+        "history (50 summaries)": build_history_page(analysis)
+    }
+    for name, payload in payloads.items():
+        assert json.loads(default_render(payload)) == json.loads(fast_render(payload)), f"{name} output differs"
+        size_kb = len(default_render(payload)) / 1024
+        default_ms = benchmark(default_render, payload)
+        fast_ms = benchmark(fast_render, payload)
+        print(
+            f"{name:<24} {size_kb:8.1f} KB  default {default_ms:7.2f} ms  "
+            f"fast {fast_ms:7.2f} ms  speedup {default_ms / fast_ms:5.1f}x"
+        )
+
+def export_memory_kb(fn, *args) -> Tuple[float, float]:
+    """Peak Python heap while fn(*args) renders, and the heap its result still holds, in KB"""
+    tracemalloc.start()
+    try:
+        result = fn(*args)
+        retained, peak = tracemalloc.get_traced_memory()
+        del result
+        # Renderers fill module-level caches as they go; count only what the result keeps alive
+        return peak / 1024, max(0.0, retained - tracemalloc.get_traced_memory()[0]) / 1024
+    finally:
+        tracemalloc.stop()
+
+def buffered_export(analysis, fmt, style):
+    """The previous export path: render to BytesIO, read() into bytes, wrap in a new BytesIO"""
+    buffer = io.BytesIO()
+    server.render_export(analysis, fmt, style, buffer)
+    buffer.seek(0)
+    content = buffer.read()
+    return buffer, content, io.BytesIO(content)
+
+def spooled_export(analysis, fmt, style):
+    """An uncached render as handed back by a worker: bytes, or a spilled temp file"""
+    content, _ = server.timed_render_export(analysis, fmt, style)
+    if isinstance(content, str):
+        os.unlink(content)
+        return None
+    return content
+
+def cached_export(analysis, fmt, style, directory):
+    """A cached render: the worker writes the cache file directly"""
+    server.timed_render_export(analysis, fmt, style, str(Path(directory) / f"export.{fmt}"))
+
+def benchmark_export_memory():
+    """Memory per export for the buffered, spooled, spilled and direct-to-cache render paths"""
+    print("\n=== Export Memory (peak / held for the response) ===")
+    analysis = build_analysis_payload()
+    spool_max_bytes = server.EXPORT_SPOOL_MAX_BYTES
+    with tempfile.TemporaryDirectory() as directory:
+        for fmt in server.EXPORT_MEDIA_TYPES:
+            size_kb = len(spooled_export(analysis, fmt, "designed")) / 1024
+            results = {
+                "buffered": export_memory_kb(buffered_export, analysis, fmt, "designed"),
+                "spooled": export_memory_kb(spooled_export, analysis, fmt, "designed")
+            }
+            server.EXPORT_SPOOL_MAX_BYTES = 16 * 1024
+            try:
+                results["spilled"] = export_memory_kb(spooled_export, analysis, fmt, "designed")
+            finally:
+                server.EXPORT_SPOOL_MAX_BYTES = spool_max_bytes
+            results["cache file"] = export_memory_kb(cached_export, analysis, fmt, "designed", directory)
+            print(f"{fmt:<5} {size_kb:8.1f} KB  " + "  ".join(
+                f"{name} {peak:6.0f}/{held:5.0f} KB" for name, (peak, held) in results.items()
+            ))
+
+def per_render_styles(style):
+    """Style setup each PDF render used to repeat: a stylesheet per report and per watermark"""
+    styles = server.build_export_styles(style)
+    for _ in range(2):
+        server.getSampleStyleSheet()
+    return styles
+
+def benchmark_export_styles():
+    """Style setup per render (rebuilt vs. registry lookup), template build, and render time per format"""
+    print("\n=== Export Styles ===")
+    for name, setup in (("rebuilt per render", per_render_styles), ("registry lookup", server.export_styles)):
+        setup_us = benchmark(setup, "designed", iterations=200) * 1000
+        peak_kb, _ = export_memory_kb(setup, "designed")
+        print(f"{name:<20} setup {setup_us:9.1f} us  allocated {peak_kb:7.1f} KB")
+    started = time.perf_counter()
+    server.export_service.load_templates()
+    print(f"PPTX/DOCX master templates built once in {(time.perf_counter() - started) * 1000:.1f} ms")
+    analysis = build_analysis_payload()
+    for fmt in server.EXPORT_MEDIA_TYPES:
+        for style in server.EXPORT_STYLES:
+            render_ms = benchmark(lambda: server.render_export(analysis, fmt, style, io.BytesIO()), iterations=10)
+            print(f"{fmt:<5} {style:<16} render {render_ms:8.1f} ms")
+
+def business_input() -> str:
+    """A short business description over a vocabulary large enough to keep postings realistic"""
+    place = "".join(rng.choice("bcdfghklmnprstvz") + rng.choice("aeiou") for _ in range(rng.randint(2, 4)))
+    return f"{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.choice(WORDS)} for {rng.choice(WORDS)} teams in {place}"
+
+def percentile_ms(timings, fraction: float) -> float:
+    return sorted(timings)[int(fraction * (len(timings) - 1))]
+
+def benchmark_semantic_lookup(entries: int = 100_000, queries: int = 2000):
+    """Near-duplicate index build time, memory and lookup latency at the given size"""
+    print(f"\n=== Semantic Lookup ({entries:,} entries, one partition) ===")
+    scope = server.SEMANTIC_REUSE_SCOPE
+    server.SEMANTIC_REUSE_SCOPE = "global"  # everything in one partition: the worst case
+    try:
+        inputs = [business_input() for _ in range(entries)]
+        index = server.SemanticResultIndex()
+        tracemalloc.start()
+        started = time.perf_counter()
+        for i, text in enumerate(inputs):
+            index.add(str(i), "user", text)
+        build_s = time.perf_counter() - started
+        memory_mb = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+        tracemalloc.stop()
+        # Build time includes tracemalloc overhead
+        print(f"build {build_s:6.1f} s (traced)  memory {memory_mb:6.1f} MB")
+        
+        samples = {
+            # An existing input with a changed word and a legal suffix
+            "near duplicate": [rng.choice(inputs).replace(" for ", " for small ") + " ltd" for _ in range(queries)],
+            "fresh input": [business_input() for _ in range(queries)]
+        }
+        for name, texts in samples.items():
+            timings, matched = [], 0
+            for text in texts:
+                started = time.perf_counter()
+                matched += bool(index.lookup("user", text))
+                timings.append((time.perf_counter() - started) * 1000)
+            print(
+                f"{name:<16} median {statistics.median(timings):6.3f} ms  p99 {percentile_ms(timings, 0.99):6.3f} ms  "
+                f"matched {matched / len(texts):5.1%}"
+            )
+    finally:
+        server.SEMANTIC_REUSE_SCOPE = scope
+
+def run_all_benchmarks():
+    benchmark_json_encoding()
+    benchmark_export_memory()
+    benchmark_export_styles()
+    benchmark_semantic_lookup()
+
+if __name__ == "__main__":
+    run_all_benchmarks()
@@ -226,6 +226,50 @@ def test_analysis_history():
         print(f"❌ Analysis history test failed: {str(e)}")
         return False
 
+def test_analysis_history_cursor():
+    """Test keyset (cursor) pagination of analysis history"""
+    print("\n=== Testing Analysis History Cursor Pagination ===")
+    try:
+        headers = {
+            "Authorization": f"Bearer {auth_token}"
+        }
+        
+        response = requests.get(
+            f"{API_URL}/analysis/history",
+            headers=headers,
+            params={"cursor": "", "limit": 1}
+        )
+        print(f"Status Code: {response.status_code}")
+        print(f"Response: {json.dumps(response.json(), indent=2)}")
+        
+        assert response.status_code == 200
+        assert isinstance(response.json()["items"], list)
+        assert "next_cursor" in response.json()
+        
+        next_cursor = response.json()["next_cursor"]
+        if next_cursor:
+            next_page = requests.get(
+                f"{API_URL}/analysis/history",
+                headers=headers,
+                params={"cursor": next_cursor, "limit": 1}
+            )
+            assert next_page.status_code == 200
+            first_ids = {a["id"] for a in response.json()["items"]}
+            assert not first_ids & {a["id"] for a in next_page.json()["items"]}
+        
+        invalid = requests.get(
+            f"{API_URL}/analysis/history",
+            headers=headers,
+            params={"cursor": "not-a-cursor"}
+        )
+        assert invalid.status_code == 400
+        
+        print("✅ Analysis history cursor test passed")
+        return True
+    except Exception as e:
+        print(f"❌ Analysis history cursor test failed: {str(e)}")
+        return False
+
 def test_get_analysis_by_id(analysis_id):
     """Test getting a specific analysis by ID"""
     print("\n=== Testing Get Analysis by ID ===")
@@ -261,6 +305,47 @@ def test_get_analysis_by_id(analysis_id):
         print(f"❌ Get analysis by ID test failed: {str(e)}")
         return False
 
+def test_get_analysis_framework(analysis_id):
+    """Test loading a single framework and a fields= subset of an analysis"""
+    print("\n=== Testing Get Analysis Framework ===")
+    try:
+        if not analysis_id:
+            print("⚠️ Skipping test: No analysis ID available")
+            return True
+            
+        headers = {
+            "Authorization": f"Bearer {auth_token}"
+        }
+        
+        response = requests.get(
+            f"{API_URL}/analysis/{analysis_id}/frameworks/swot_analysis",
+            headers=headers
+        )
+        print(f"Status Code: {response.status_code}")
+        
+        if response.status_code == 404:
+            print("Analysis not found (404). This might be because the test analysis was not saved properly.")
+            print("⚠️ Test inconclusive")
+            return True
+        
+        assert response.status_code == 200
+        assert response.json()["framework"] == "swot_analysis"
+        
+        subset = requests.get(
+            f"{API_URL}/analysis/{analysis_id}",
+            headers=headers,
+            params={"fields": "status,comprehensive_results.swot_analysis"}
+        )
+        assert subset.status_code == 200
+        assert set(subset.json()) <= {"id", "status", "comprehensive_results"}
+        assert set(subset.json().get("comprehensive_results", {})) <= {"swot_analysis"}
+        
+        print("✅ Get analysis framework test passed")
+        return True
+    except Exception as e:
+        print(f"❌ Get analysis framework test failed: {str(e)}")
+        return False
+
 def test_export_pdf(analysis_id):
     """Test PDF export functionality"""
     print("\n=== Testing PDF Export ===")
@@ -487,7 +572,9 @@ def run_all_tests():
     
     # Test analysis retrieval
     results["analysis_history"] = test_analysis_history()
+    results["analysis_history_cursor"] = test_analysis_history_cursor()
     results["get_analysis_by_id"] = test_get_analysis_by_id(analysis_id)
+    results["get_analysis_framework"] = test_get_analysis_framework(analysis_id)
     
     # Test export functionality
     results["export_pdf"] = test_export_pdf(analysis_id)
@@ -0,0 +1,7 @@
+import os
+import sys
+from pathlib import Path
+
+# The backend is a single module, not an installed package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+os.environ.setdefault("DEMO_MODE", "true")
@@ -0,0 +1,108 @@
+import asyncio
+import io
+
+import pytest
+from fastapi import UploadFile
+
+import server
+from server import iter_upload_rows
+
+def read_rows(data: bytes, fmt: str):
+    async def run():
+        upload = UploadFile(file=io.BytesIO(data), filename=f"portfolio.{fmt}")
+        return [row async for row in iter_upload_rows(upload, fmt)]
+    return asyncio.run(run())
+
+@pytest.fixture(params=[3, 64 * 1024], ids=["tiny-chunks", "default-chunks"])
+def chunk_size(request, monkeypatch):
+    # Tiny chunks split lines, quoted fields and multi-byte characters across reads
+    monkeypatch.setattr(server, "BATCH_READ_CHUNK", request.param)
+
+def test_csv_header_selects_the_business_input_column(chunk_size):
+    data = b"name,business_input\nAcme,Coffee delivery\nBeta,Bike repair\n"
+    assert read_rows(data, "csv") == [(2, "Coffee delivery", None), (3, "Bike repair", None)]
+
+def test_csv_without_header_uses_the_first_column(chunk_size):
+    data = b"Coffee delivery,extra\r\nBike repair\r\n"
+    assert read_rows(data, "csv") == [(1, "Coffee delivery", None), (2, "Bike repair", None)]
+
+def test_csv_multiline_quoted_fields_stay_one_record(chunk_size):
+    data = (
+        '﻿business_input,notes\n'
+        '"Café chain\nwith ""premium"" beans, downtown",x\n'
+        '\n'
+        'Bike repair,"a\nb"\n'
+    ).encode("utf-8")
+    assert read_rows(data, "csv") == [
+        (2, 'Café chain\nwith "premium" beans, downtown', None),
+        (5, "Bike repair", None)
+    ]
+
+def test_csv_short_row_and_missing_final_newline(chunk_size):
+    data = b"id,business_input\n7\n8,Tea shop"
+    assert read_rows(data, "csv") == [(2, None, "Missing business_input"), (3, "Tea shop", None)]
+
+def test_ndjson_rows_and_errors(chunk_size):
+    data = b'{"business_input": "Coffee delivery"}\n"Bike repair"\n\n{"name": 1}\nnot json\n'
+    assert read_rows(data, "ndjson") == [
+        (1, "Coffee delivery", None),
+        (2, "Bike repair", None),
+        (4, None, "Missing business_input"),
+        (5, None, "Invalid JSON")
+    ]
+
+class RecordingCollection:
+    def __init__(self):
+        self.calls = []
+    
+    async def insert_one(self, document):
+        self.calls.append(("insert_one", dict(document)))
+    
+    async def update_one(self, query, update):
+        self.calls.append(("update_one", update["$set"]))
+
+class FakeAnalyses:
+    def __init__(self, calls, fail_on=None):
+        self.calls = calls
+        self.fail_on = fail_on
+        self.started = []
+    
+    async def perform_analysis(self, request, user_id, batch_id):
+        if request.business_input == self.fail_on:
+            raise RuntimeError("database unavailable")
+        self.calls.append(("perform_analysis", request.business_input))
+        self.started.append(f"a{len(self.started) + 1}")
+        return type("Analysis", (), {"id": self.started[-1]})
+
+async def rows_of(*rows):
+    for row in rows:
+        yield row
+
+def submit(monkeypatch, rows, fail_on=None):
+    batches = RecordingCollection()
+    analyses = FakeAnalyses(batches.calls, fail_on)
+    monkeypatch.setattr(server, "db", type("Db", (), {"analysis_batches": batches}))
+    monkeypatch.setattr(server, "business_service", analyses)
+    result = asyncio.run(server.batch_service.submit("u1", rows, {}, "portfolio.csv"))
+    return result, batches.calls
+
+def test_batch_is_stored_before_analyses_start(monkeypatch):
+    batch, calls = submit(monkeypatch, rows_of((1, "Coffee delivery", None), (2, "coffee  delivery", None), (3, "Bike repair", None)))
+    assert [call[0] for call in calls] == ["insert_one", "perform_analysis", "perform_analysis", "update_one"]
+    assert calls[0][1]["total"] == 2
+    assert calls[-1][1] == {"analysis_ids": ["a1", "a2"], "total": 2}
+    assert batch["duplicates"] == 1 and batch["analysis_ids"] == ["a1", "a2"]
+
+def test_upload_failure_starts_no_analyses(monkeypatch):
+    async def failing_rows():
+        yield 1, "Coffee delivery", None
+        raise UnicodeDecodeError("utf-8", b"\xff", 0, 1, "invalid start byte")
+    with pytest.raises(UnicodeDecodeError):
+        submit(monkeypatch, failing_rows())
+    assert server.business_service.started == []
+
+def test_failed_start_records_the_analyses_that_did_start(monkeypatch):
+    with pytest.raises(RuntimeError):
+        submit(monkeypatch, rows_of((1, "Coffee delivery", None), (2, "Bike repair", None)), fail_on="Bike repair")
+    calls = server.db.analysis_batches.calls
+    assert calls[-1] == ("update_one", {"analysis_ids": ["a1"], "total": 1})
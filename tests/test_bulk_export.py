@@ -0,0 +1,52 @@
+import asyncio
+import io
+import json
+import zipfile
+
+import pytest
+
+import server
+from server import BulkExportService
+
+class Analyses:
+    async def find_one(self, query, projection=None):
+        return {"id": query["id"], "user_id": query["user_id"], "title": "Plan"}
+
+@pytest.fixture
+def spill_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "db", type("Db", (), {"business_analyses": Analyses()}))
+    return tmp_path
+
+def spilling_renderer(spill_dir, size, delays=None):
+    async def render(analysis, fmt, style, queue=False, destination=None):
+        path = spill_dir / f"{analysis['id']}.{fmt}"
+        await asyncio.sleep((delays or {}).get(path.name, 0))
+        path.write_bytes(analysis["id"].encode() * (size // len(analysis["id"])))
+        return path
+    return render
+
+def test_spilled_renders_stream_in_chunks(spill_dir, monkeypatch):
+    monkeypatch.setattr(server, "EXPORT_ZIP_COPY_CHUNK", 1024)
+    monkeypatch.setattr(server.export_renderer, "render", spilling_renderer(spill_dir, 16 * 1024))
+    async def run():
+        return [chunk async for chunk in BulkExportService(workers=2).stream(["a1", "a2"], "u1", ["pdf"], "designed")]
+    chunks = asyncio.run(run())
+    
+    assert max(len(chunk) for chunk in chunks) < 2 * 1024
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.read("business_analysis_a2.pdf") == b"a2" * 8 * 1024
+    assert json.loads(archive.read("manifest.json"))["exports"][0] == {"analysis_id": "a1", "files": ["business_analysis_a1.pdf"]}
+    assert list(spill_dir.iterdir()) == []
+
+def test_disconnect_discards_renders_in_flight(spill_dir, monkeypatch):
+    # a2 is fully rendered, a3 has only its PDF and a4 nothing when the client goes away
+    delays = {"a3.docx": 1, "a4.pdf": 1, "a4.docx": 1}
+    monkeypatch.setattr(server.export_renderer, "render", spilling_renderer(spill_dir, 1024, delays))
+    async def run():
+        stream = BulkExportService(workers=3).stream(["a1", "a2", "a3", "a4"], "u1", ["pdf", "docx"], "designed")
+        await stream.__anext__()
+        await asyncio.sleep(0.05)
+        await stream.aclose()
+        await asyncio.sleep(0.2)
+    asyncio.run(run())
+    assert list(spill_dir.iterdir()) == []
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from server import parse_byte_range, ranged_file_response
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=900-5000", (900, 999)),
+    ("BYTES = 10-19", (10, 19)),
+    # Suffix ranges: the last N bytes, clamped to the file
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=-0", "unsatisfiable"),
+    # Starting at or past the end cannot be satisfied
+    ("bytes=1000-", "unsatisfiable"),
+    ("bytes=1000-1200", "unsatisfiable"),
+    # Anything else is ignored and the whole file is sent
+    ("bytes=20-10", None),
+    ("bytes=0-1,5-6", None),
+    ("items=0-10", None),
+    ("bytes=abc-", None),
+    ("bytes=-", None),
+])
+def test_parse_byte_range(header, expected):
+    assert parse_byte_range(header, 1000) == expected
+
+def test_suffix_range_of_empty_file_is_unsatisfiable():
+    assert parse_byte_range("bytes=-10", 0) == "unsatisfiable"
+    assert parse_byte_range("bytes=0-", 0) == "unsatisfiable"
+
+def body_of(response):
+    async def collect():
+        return b"".join([chunk async for chunk in response.body_iterator])
+    return asyncio.run(collect())
+
+@pytest.fixture
+def export_file(tmp_path):
+    path = tmp_path / "report.pdf"
+    path.write_bytes(bytes(range(256)) * 4)
+    return path
+
+HEADERS = {"ETag": '"abc"', "Last-Modified": "Mon, 19 Oct 2026 10:00:00 GMT"}
+
+def test_range_response_is_partial(export_file):
+    response = ranged_file_response(export_file, "application/pdf", HEADERS, "bytes=-4", None)
+    assert response.status_code == 206
+    assert response.headers["content-range"] == "bytes 1020-1023/1024"
+    assert response.headers["content-length"] == "4"
+    assert body_of(response) == bytes([252, 253, 254, 255])
+
+def test_unsatisfiable_range_is_416(export_file):
+    response = ranged_file_response(export_file, "application/pdf", HEADERS, "bytes=2048-", None)
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */1024"
+
+def test_if_range_with_stale_validator_sends_whole_file(export_file):
+    response = ranged_file_response(export_file, "application/pdf", HEADERS, "bytes=0-9", '"old"')
+    assert response.status_code == 200
+    assert response.headers["accept-ranges"] == "bytes"
+    response = ranged_file_response(export_file, "application/pdf", HEADERS, "bytes=0-9", '"abc"')
+    assert response.status_code == 206
@@ -0,0 +1,101 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+import server
+from server import ExportCache
+
+T1 = datetime(2026, 10, 1, 12, 0, 0)
+T2 = T1 + timedelta(minutes=5)
+
+def store(cache, analysis_id, updated_at, size, fmt="pdf", style="designed"):
+    async def run():
+        temporary = await cache.reserve(analysis_id)
+        temporary.write_bytes(b"x" * size)
+        return await cache.put(analysis_id, updated_at, fmt, style, temporary)
+    return asyncio.run(run())
+
+def lookup(cache, analysis_id, updated_at, fmt="pdf", style="designed"):
+    return asyncio.run(cache.get(analysis_id, updated_at, fmt, style))
+
+def test_hit_after_put(tmp_path):
+    cache = ExportCache(str(tmp_path), max_bytes=1000)
+    path = store(cache, "a1", T1, 100)
+    assert lookup(cache, "a1", T1) == path
+    assert lookup(cache, "a1", T1, fmt="docx") is None
+    assert (cache.hits, cache.misses, cache.total_bytes) == (1, 1, 100)
+
+def test_least_recently_used_file_is_evicted(tmp_path):
+    cache = ExportCache(str(tmp_path), max_bytes=250)
+    first = store(cache, "a1", T1, 100)
+    second = store(cache, "a2", T1, 100)
+    assert lookup(cache, "a1", T1) == first
+    store(cache, "a3", T1, 100)
+    assert not second.exists() and first.exists()
+    assert lookup(cache, "a2", T1) is None
+    assert (cache.evictions, cache.total_bytes) == (1, 200)
+
+def test_new_version_replaces_the_old_render(tmp_path):
+    cache = ExportCache(str(tmp_path), max_bytes=1000)
+    old = store(cache, "a1", T1, 100)
+    other_style = store(cache, "a1", T1, 100, style="black_and_white")
+    new = store(cache, "a1", T2, 120)
+    assert not old.exists() and other_style.exists()
+    assert lookup(cache, "a1", T1) is None
+    assert lookup(cache, "a1", T2) == new
+    assert cache.total_bytes == 220
+
+def test_restart_reloads_files_and_drops_interrupted_renders(tmp_path):
+    cache = ExportCache(str(tmp_path), max_bytes=1000)
+    path = store(cache, "a1", T1, 100)
+    interrupted = asyncio.run(cache.reserve("a1"))
+    interrupted.write_bytes(b"partial")
+    
+    restarted = ExportCache(str(tmp_path), max_bytes=1000)
+    assert lookup(restarted, "a1", T1) == path
+    assert restarted.total_bytes == 100
+    assert not interrupted.exists()
+
+def test_remove_analysis(tmp_path):
+    cache = ExportCache(str(tmp_path), max_bytes=1000)
+    path = store(cache, "a1", T1, 100)
+    asyncio.run(cache.remove_analysis("a1"))
+    assert not path.parent.exists()
+    assert cache.total_bytes == 0
+
+class Analyses:
+    def __init__(self, analysis):
+        self.analysis = analysis
+    
+    async def find_one(self, query, projection=None):
+        return dict(self.analysis)
+
+@pytest.fixture
+def cached_export(tmp_path, monkeypatch):
+    analysis = {"id": "a1", "user_id": "u1", "version": 2, "updated_at": T1, "title": "Plan"}
+    renders = []
+    async def render(analysis, fmt, style, queue=False, destination=None):
+        renders.append(fmt)
+        destination.write_bytes(bytes(range(100)))
+        return destination
+    monkeypatch.setattr(server, "db", type("Db", (), {"business_analyses": Analyses(analysis)}))
+    monkeypatch.setattr(server, "export_cache", ExportCache(str(tmp_path), max_bytes=10_000))
+    monkeypatch.setattr(server.export_renderer, "render", render)
+    
+    def export(range_header=None, if_range=None):
+        return asyncio.run(server.export_analysis("a1", "u1", "pdf", "designed", None, None, range_header, if_range))
+    return export, renders
+
+def test_cached_export_honours_if_range(cached_export):
+    export, renders = cached_export
+    etag = export().headers["etag"]
+    
+    partial = export("bytes=0-9", etag)
+    assert partial.status_code == 206
+    assert partial.headers["content-range"] == "bytes 0-9/100"
+    # A validator from an earlier version no longer matches: the whole file is sent
+    stale = export("bytes=0-9", '"stale"')
+    assert stale.status_code == 200
+    assert "content-range" not in stale.headers
+    assert renders == ["pdf"]
@@ -0,0 +1,86 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+
+import server
+from server import ExportRenderer
+
+def slow_render(seconds):
+    def render(analysis, fmt, style, destination=None):
+        time.sleep(seconds)
+        return b"%PDF", seconds
+    return render
+
+def renderer(monkeypatch, render_seconds, **options):
+    monkeypatch.setattr(server, "timed_render_export", slow_render(render_seconds))
+    renderer = ExportRenderer(**options)
+    renderer.executor = ThreadPoolExecutor(max_workers=renderer.workers)
+    return renderer
+
+def test_timeout_excludes_time_waiting_for_a_worker(monkeypatch):
+    export = renderer(monkeypatch, 0.2, workers=1, max_pending=4, timeout=0.5, interactive_reserve=1)
+    async def run():
+        return await asyncio.gather(*(export.render({}, "pdf", "designed", queue=True) for _ in range(4)))
+    assert asyncio.run(run()) == [b"%PDF"] * 4
+    assert export.timeouts == 0
+    assert export.pending == export.running == export.queued_pending == 0
+
+def test_queued_renders_leave_room_for_interactive_ones(monkeypatch):
+    export = renderer(monkeypatch, 0.1, workers=2, max_pending=4, timeout=5, interactive_reserve=2)
+    peak = 0
+    async def bulk():
+        nonlocal peak
+        for _ in range(3):
+            peak = max(peak, export.queued_pending)
+            await asyncio.sleep(0.02)
+    async def run():
+        renders = [asyncio.create_task(export.render({}, "pdf", "designed", queue=True)) for _ in range(6)]
+        watcher = asyncio.create_task(bulk())
+        await asyncio.sleep(0.01)
+        interactive = await export.render({}, "pdf", "designed")
+        await asyncio.gather(*renders, watcher)
+        return interactive
+    assert asyncio.run(run()) == b"%PDF"
+    assert peak <= 2
+    assert export.rejected == 0
+
+def test_interactive_render_rejected_when_saturated(monkeypatch):
+    export = renderer(monkeypatch, 0.2, workers=1, max_pending=1, timeout=5, interactive_reserve=0)
+    async def run():
+        first = asyncio.create_task(export.render({}, "pdf", "designed"))
+        await asyncio.sleep(0.01)
+        with pytest.raises(HTTPException) as busy:
+            await export.render({}, "pdf", "designed")
+        await first
+        return busy.value.status_code
+    assert asyncio.run(run()) == 503
+
+def test_render_finishing_after_loop_closed(monkeypatch, caplog):
+    export = renderer(monkeypatch, 0.3, workers=1, max_pending=2, timeout=0.05)
+    async def run():
+        with pytest.raises(HTTPException) as timed_out:
+            await export.render({}, "pdf", "designed")
+        return timed_out.value.status_code
+    with caplog.at_level(logging.ERROR):
+        assert asyncio.run(run()) == 504
+        export.executor.shutdown(wait=True)
+    assert "exception calling callback" not in caplog.text
+
+def test_timed_out_render_deletes_its_spilled_file(monkeypatch, tmp_path):
+    spilled = tmp_path / "spilled.pdf"
+    def render(analysis, fmt, style, destination=None):
+        time.sleep(0.2)
+        spilled.write_bytes(b"%PDF")
+        return str(spilled), 0.2
+    export = renderer(monkeypatch, 0, workers=1, max_pending=2, timeout=0.05)
+    monkeypatch.setattr(server, "timed_render_export", render)
+    async def run():
+        with pytest.raises(HTTPException):
+            await export.render({}, "pdf", "designed")
+    asyncio.run(run())
+    export.executor.shutdown(wait=True)
+    assert not spilled.exists()
@@ -0,0 +1,111 @@
+import io
+
+import pytest
+from docx import Document
+from pptx import Presentation
+
+import server
+from server import DocumentExportService, ExportTemplateError
+
+@pytest.fixture
+def service():
+    return DocumentExportService()
+
+def sample(schema):
+    """A value of the given framework schema, the shape validated model output takes"""
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type")
+    if kind == "object":
+        return {key: sample(value) for key, value in schema.get("properties", {"note": {"type": "string"}}).items()}
+    if kind == "array":
+        return [sample(schema["items"]) for _ in range(2)]
+    return {"number": 0.7, "boolean": True}.get(kind, "Strong demand in urban markets")
+
+@pytest.fixture
+def analysis():
+    return {
+        "id": "a1",
+        "business_input": "Coffee subscription for remote teams",
+        "comprehensive_results": {
+            framework: {
+                model: {"analysis": sample(server.FRAMEWORK_SCHEMAS[framework]), "confidence_score": 0.85, "processing_time": 1.2, "schema_valid": True}
+                for model in ("deepseek", "gemini")
+            }
+            for framework in server.ANALYSIS_FRAMEWORKS
+        },
+        "ai_consensus": {"consensus_score": 0.84, "key_recommendations": ["Start in Berlin", "Partner with coworking spaces"]}
+    }
+
+def open_pptx(data):
+    return Presentation(io.BytesIO(data))
+
+def open_docx(data):
+    return Document(io.BytesIO(data))
+
+def test_pptx_uses_master_layouts(service, analysis):
+    for _ in range(2):  # the reused master must come back clean after each render
+        prs = open_pptx(service.generate_pptx_report(analysis))
+        assert len(prs.slides) == 1 + len(server.ANALYSIS_FRAMEWORKS)
+    assert prs.slides[0].slide_layout.name == prs.slide_layouts[0].name
+    assert {slide.slide_layout.name for slide in list(prs.slides)[1:]} == {prs.slide_layouts[1].name}
+    assert prs.slides[1].shapes.title.text == "Swot Analysis"
+    assert "Watermark" in [shape.name for shape in prs.slide_master.shapes]
+    assert len(service.master("pptx", "designed").slides) == 0
+
+def test_docx_uses_master_styles(service, analysis):
+    for _ in range(2):
+        doc = open_docx(service.generate_docx_report(analysis))
+        styles = [paragraph.style.name for paragraph in doc.paragraphs]
+        assert styles.count("Title") == 1
+    # One heading per framework plus the consensus section
+    assert styles.count("Heading 1") == len(server.ANALYSIS_FRAMEWORKS) + 1
+    assert styles.count("List Bullet") > len(server.ANALYSIS_FRAMEWORKS)
+    assert doc.styles["Heading 1"].font.color.rgb == server.export_styles("designed")["docx_heading_color"]
+    assert "Created with Somna AI" in doc.sections[0].footer.paragraphs[-1].text
+
+def test_custom_templates_are_used(service, analysis, tmp_path, monkeypatch):
+    prs = Presentation()
+    prs.slide_layouts[1].name = "Brand Content"
+    prs.slides.add_slide(prs.slide_layouts[0])  # sample slide, discarded
+    prs.save(tmp_path / "master.pptx")
+    doc = Document()
+    doc.styles["Heading 1"].font.name = "Georgia"
+    doc.add_paragraph("Sample body, discarded")
+    doc.save(tmp_path / "master.docx")
+    monkeypatch.setattr(server, "EXPORT_PPTX_TEMPLATE", str(tmp_path / "master.pptx"))
+    monkeypatch.setattr(server, "EXPORT_DOCX_TEMPLATE", str(tmp_path / "master.docx"))
+    service.load_templates()
+    
+    prs = open_pptx(service.generate_pptx_report(analysis))
+    assert len(prs.slides) == 1 + len(server.ANALYSIS_FRAMEWORKS)
+    assert prs.slides[1].slide_layout.name == "Brand Content"
+    doc = open_docx(service.generate_docx_report(analysis))
+    assert doc.paragraphs[0].text == "Comprehensive Business Analysis Report"
+    assert doc.styles["Heading 1"].font.name == "Georgia"
+
+def test_pptx_template_without_content_body(service, tmp_path, monkeypatch):
+    prs = Presentation()
+    for placeholder in list(prs.slide_layouts[1].placeholders):
+        if placeholder.placeholder_format.idx == 1:
+            placeholder.element.getparent().remove(placeholder.element)
+    path = tmp_path / "master.pptx"
+    prs.save(path)
+    monkeypatch.setattr(server, "EXPORT_PPTX_TEMPLATE", str(path))
+    with pytest.raises(ExportTemplateError, match="layout 1 .* no placeholder with idx 1"):
+        service.template("pptx", "designed")
+
+def test_docx_template_without_list_style(service, tmp_path, monkeypatch):
+    doc = Document()
+    style = doc.styles["List Bullet"]
+    style.element.getparent().remove(style.element)
+    path = tmp_path / "master.docx"
+    doc.save(path)
+    monkeypatch.setattr(server, "EXPORT_DOCX_TEMPLATE", str(path))
+    with pytest.raises(ExportTemplateError, match="no paragraph style List Bullet"):
+        service.template("docx", "designed")
+
+def test_missing_template_file(service, tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "EXPORT_PPTX_TEMPLATE", str(tmp_path / "missing.pptx"))
+    with pytest.raises(ExportTemplateError, match="Cannot open EXPORT_PPTX_TEMPLATE"):
+        service.template("pptx", "designed")
@@ -0,0 +1,96 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+import server
+from server import HistorySearchIndex, User
+
+def matches(document, query):
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(document, branch) for branch in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = document.get(key)
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+            if "$gt" in condition and not value > condition["$gt"]:
+                return False
+            if "$gte" in condition and not value >= condition["$gte"]:
+                return False
+        elif document.get(key) != condition:
+            return False
+    return True
+
+class Cursor:
+    def __init__(self, documents):
+        self.documents = documents
+    
+    def sort(self, keys):
+        for key, direction in reversed(keys):
+            self.documents.sort(key=lambda document: document[key], reverse=direction < 0)
+        return self
+    
+    def limit(self, count):
+        self.documents = self.documents[:count]
+        return self
+    
+    async def to_list(self, length=None):
+        return [dict(document) for document in self.documents]
+
+class Analyses:
+    def __init__(self, documents):
+        self.documents = documents
+        self.queries = []
+    
+    def find(self, query, projection=None):
+        self.queries.append(query)
+        return Cursor([document for document in self.documents if matches(document, query)])
+
+@pytest.fixture
+def analyses(monkeypatch):
+    now = datetime(2026, 1, 1)
+    collection = Analyses([
+        # Several analyses share a timestamp, so paging must break ties by id
+        {"id": f"a{i}", "user_id": "u1", "business_input": f"coffee roastery {i}", "updated_at": now + timedelta(seconds=i // 3)}
+        for i in range(7)
+    ] + [{"id": "b1", "user_id": "u2", "business_input": "coffee cart", "updated_at": now}])
+    monkeypatch.setattr(server, "db", type("Db", (), {"business_analyses": collection}))
+    monkeypatch.setattr(server, "SEARCH_INDEX_PAGE", 2)
+    return collection
+
+def test_index_is_built_in_pages(analyses):
+    index = HistorySearchIndex()
+    assert sorted(asyncio.run(index.search("u1", "roastery"))) == [f"a{i}" for i in range(7)]
+    assert len(analyses.queries) == 4
+    
+    analyses.documents.append({"id": "a7", "user_id": "u1", "business_input": "tea roastery", "updated_at": datetime(2026, 1, 2)})
+    assert asyncio.run(index.search("u1", "tea")) == ["a7"]
+
+def test_concurrent_searches_share_one_build(analyses):
+    index = HistorySearchIndex()
+    async def run():
+        return await asyncio.gather(index.search("u1", "coffee"), index.search("u1", "roastery"))
+    first, second = asyncio.run(run())
+    assert len(first) == len(second) == 7
+    assert len(analyses.queries) == 4
+
+def test_search_evicts_analyses_deleted_elsewhere(analyses, monkeypatch):
+    index = HistorySearchIndex()
+    monkeypatch.setattr(server, "history_search", index)
+    asyncio.run(index.search("u1", "roastery"))
+    analyses.documents = [document for document in analyses.documents if document["id"] not in ("a0", "a1", "a2")]
+    user = User(id="u1", name="A", email="a@example.com")
+    
+    async def page(cursor):
+        response = await server.search_analysis_history(user, "roastery", 0, 3, cursor, {"_id": 0, "id": 1}, "test", None)
+        return json.loads(response.body)
+    first = asyncio.run(page(""))
+    assert len(first["items"]) == 3
+    second = asyncio.run(page(first["next_cursor"]))
+    assert len(second["items"]) == 1 and second["next_cursor"] is None
+    ids = [item["id"] for item in first["items"] + second["items"]]
+    assert sorted(ids) == ["a3", "a4", "a5", "a6"]
+    assert sorted(asyncio.run(index.search("u1", "roastery"))) == ["a3", "a4", "a5", "a6"]
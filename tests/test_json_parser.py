@@ -0,0 +1,49 @@
+import json
+
+from server import IncrementalJSONParser, parse_json_response
+
+DOCUMENT = {
+    "strengths": [{"factor": "Brand", "evidence": "Quoted \"best\" {coffee}, [2024]"}],
+    "summary": "Line one\nline two, with a comma and a \\ backslash",
+    "score": 0.8
+}
+
+def feed_in_chunks(text, size):
+    parser = IncrementalJSONParser()
+    completed = []
+    for start in range(0, len(text), size):
+        completed.extend(parser.feed(text[start:start + size]))
+    return parser, completed
+
+def test_bare_json_round_trips():
+    assert parse_json_response(json.dumps(DOCUMENT)) == DOCUMENT
+
+def test_markdown_fences_and_prose_are_skipped():
+    text = "Here is the analysis:\n```json\n" + json.dumps(DOCUMENT, indent=2) + "\n```\nLet me know!"
+    assert parse_json_response(text) == DOCUMENT
+
+def test_members_are_emitted_as_they_complete_regardless_of_chunking():
+    text = json.dumps(DOCUMENT)
+    for size in (1, 3, 7, len(text)):
+        parser, completed = feed_in_chunks(text, size)
+        assert [key for key, _ in completed] == list(DOCUMENT)
+        assert dict(completed) == DOCUMENT
+        assert parser.finish() == DOCUMENT
+
+def test_escaped_quotes_and_brackets_inside_strings_do_not_split_members():
+    text = '{"a": "he said \\"x, y\\" {not nested}", "b": "\\\\", "c": 1}'
+    parser, completed = feed_in_chunks(text, 2)
+    assert completed == [("a", 'he said "x, y" {not nested}'), ("b", "\\"), ("c", 1)]
+
+def test_truncated_input_keeps_completed_members():
+    text = json.dumps(DOCUMENT)
+    truncated = text[:text.index('"score"') + 5]
+    result = parse_json_response(truncated)
+    assert result == {"strengths": DOCUMENT["strengths"], "summary": DOCUMENT["summary"]}
+
+def test_malformed_member_is_skipped():
+    result = parse_json_response('{"a": 1, "b": nope, "c": [1, 2]}')
+    assert result == {"a": 1, "c": [1, 2]}
+
+def test_unparseable_text_is_returned_raw():
+    assert parse_json_response("The model refused.") == {"analysis": "The model refused.", "raw_response": True}
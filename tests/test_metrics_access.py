@@ -0,0 +1,29 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import server
+from server import require_metrics_token
+
+def check(token):
+    return asyncio.run(require_metrics_token(token))
+
+def test_metrics_disabled_without_token(monkeypatch):
+    monkeypatch.setattr(server, "METRICS_TOKEN", "")
+    with pytest.raises(HTTPException) as denied:
+        check("anything")
+    assert denied.value.status_code == 404
+
+def test_metrics_require_the_operator_token(monkeypatch):
+    monkeypatch.setattr(server, "METRICS_TOKEN", "s3cret")
+    for token in (None, "wrong"):
+        with pytest.raises(HTTPException) as denied:
+            check(token)
+        assert denied.value.status_code == 403
+    assert check("s3cret") is None
+
+@pytest.mark.parametrize("path", ["/api/metrics", "/api/providers/stats"])
+def test_operational_routes_are_guarded(path):
+    route = next(route for route in server.app.routes if getattr(route, "path", None) == path)
+    assert any(dependency.call is require_metrics_token for dependency in route.dependant.dependencies)
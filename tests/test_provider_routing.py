@@ -0,0 +1,41 @@
+import pytest
+
+from server import AIProvider, ProviderRegistry
+
+class Provider(AIProvider):
+    def __init__(self, name, configured=True, latency=None):
+        super().__init__()
+        self.name = name
+        self.configured = configured
+        if latency is not None:
+            for _ in range(5):
+                self.stats.record(latency)
+    
+    def is_configured(self):
+        return self.configured
+    
+    async def _complete(self, prompt, on_partial, max_tokens):
+        return {}
+
+@pytest.fixture
+def registry():
+    registry = ProviderRegistry()
+    registry.register(Provider("slow", latency=4.0))
+    registry.register(Provider("fast", latency=0.5))
+    registry.register(Provider("mock", configured=False))
+    return registry
+
+def test_rank_orders_configured_providers_by_latency(registry):
+    assert registry.rank(["mock", "slow", "fast"]) == ["fast", "slow", "mock"]
+    assert registry.route(["mock", "slow", "fast"]) == "fast"
+
+def test_unconfigured_provider_only_routed_when_alone(registry):
+    assert registry.route(["mock"]) == "mock"
+    with pytest.raises(ValueError):
+        registry.route(["unknown"])
+
+def test_provider_must_implement_complete():
+    class Incomplete(AIProvider):
+        pass
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,53 @@
+from server import normalize_key, schema_errors, validate_framework_result, FRAMEWORK_SCHEMAS
+
+SWOT = {
+    "strengths": [{"factor": "Loyal customers", "impact": "high", "confidence": 0.9}],
+    "weaknesses": [{"factor": "Thin margins"}],
+    "opportunities": [{"factor": "Office market"}],
+    "threats": [{"factor": "Chains"}]
+}
+
+def test_valid_result_is_returned_unchanged():
+    assert validate_framework_result("swot_analysis", SWOT) == (SWOT, True)
+
+def test_unknown_framework_passes_through():
+    assert validate_framework_result("astrology", {"x": 1}) == ({"x": 1}, True)
+
+def test_framework_named_wrapper_is_unwrapped():
+    result, valid = validate_framework_result("swot_analysis", {"SWOT Analysis": SWOT})
+    assert valid
+    assert result == SWOT
+
+def test_keys_are_normalized():
+    result, valid = validate_framework_result("swot_analysis", {
+        "Strengths": SWOT["strengths"],
+        "weaknesses ": SWOT["weaknesses"],
+        "Opportunities": SWOT["opportunities"],
+        "THREATS": SWOT["threats"]
+    })
+    assert valid
+    assert result == SWOT
+    assert normalize_key("Key Findings!") == "key_findings"
+
+def test_scalars_are_coerced_to_the_schema():
+    result, valid = validate_framework_result("swot_analysis", {
+        "strengths": {"factor": "Loyal customers", "impact": " HIGH ", "confidence": "90%"},
+        "weaknesses": "Thin margins",
+        "opportunities": [{"factor": "Office market"}],
+        "threats": [{"factor": "Chains"}]
+    })
+    assert valid
+    assert result["strengths"] == [{"factor": "Loyal customers", "impact": "high", "confidence": 90.0}]
+    assert result["weaknesses"] == [{"factor": "Thin margins"}]
+
+def test_unrepairable_result_is_reported_invalid():
+    result, valid = validate_framework_result("swot_analysis", {**SWOT, "threats": 42})
+    assert not valid
+    assert schema_errors(result, FRAMEWORK_SCHEMAS["swot_analysis"]) == ["$.threats: expected array"]
+
+def test_raw_text_becomes_a_section_summary():
+    result, valid = validate_framework_result("kpi_dashboard", {"analysis": "Track churn weekly.", "raw_response": True})
+    assert result["summary"] == "Track churn weekly."
+    assert not valid  # findings and recommendations are still missing
+    result, _ = validate_framework_result("kpi_dashboard", {"analysis": "Track churn weekly."})
+    assert result == {"summary": "Track churn weekly."}
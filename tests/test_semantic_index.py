@@ -0,0 +1,43 @@
+import json
+import pickle
+
+import pytest
+
+from server import SemanticResultIndex
+
+@pytest.fixture
+def index():
+    index = SemanticResultIndex()
+    index.add("a1", "u1", "Coffee subscription for remote teams")
+    index.add("a2", "u1", "Electric bike rental in Lisbon")
+    return index
+
+def test_snapshot_round_trip(index, tmp_path):
+    path = tmp_path / "index.json"
+    index.save(str(path))
+    assert json.loads(path.read_text())["version"] == 2
+    
+    restored = SemanticResultIndex()
+    assert restored.load(str(path))
+    assert len(restored) == 2
+    assert restored.documents["a1"] == index.documents["a1"]
+    assert restored.snapshot_at is not None
+    assert [match["id"] for match in restored.lookup("u1", "coffee subscription for remote teams")] == ["a1"]
+
+def test_pickle_snapshot_is_not_loaded(tmp_path):
+    path = tmp_path / "index.snapshot"
+    path.write_bytes(pickle.dumps({"version": 1, "documents": {}}))
+    index = SemanticResultIndex()
+    assert not index.load(str(path))
+    assert len(index) == 0
+
+def test_malformed_snapshot_leaves_index_empty(index, tmp_path):
+    path = tmp_path / "index.json"
+    index.save(str(path))
+    snapshot = json.loads(path.read_text())
+    snapshot["documents"].append(["a3", "u1", "text", ["not", "hashes"]])
+    path.write_text(json.dumps(snapshot))
+    restored = SemanticResultIndex()
+    with pytest.raises(TypeError):
+        restored.load(str(path))
+    assert len(restored) == 0
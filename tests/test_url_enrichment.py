@@ -0,0 +1,113 @@
+import asyncio
+
+import httpx
+
+import server
+from server import UrlEnrichmentService
+
+PAGE = (
+    "<html><head><title>Acme Coffee</title>"
+    '<meta name="description" content="Office coffee delivery"></head>'
+    "<body><script>ignored()</script><p>Fresh beans every week.</p></body></html>"
+)
+
+def fetch(service, url):
+    async def run():
+        try:
+            return await service.fetch_summary(url)
+        finally:
+            await service.close()
+    return asyncio.run(run())
+
+def test_fetch_summary_extracts_page():
+    service = UrlEnrichmentService(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, html=PAGE)),
+        allow_private=True
+    )
+    summary = fetch(service, "http://acme.test/")
+    assert summary == {
+        "url": "http://acme.test/",
+        "title": "Acme Coffee",
+        "description": "Office coffee delivery",
+        "text": "Fresh beans every week."
+    }
+
+def test_revalidates_cached_page_with_etag():
+    requests = []
+    
+    def handler(request):
+        requests.append(request)
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, html=PAGE, headers={"ETag": '"v1"'})
+    
+    service = UrlEnrichmentService(transport=httpx.MockTransport(handler), allow_private=True)
+    first = fetch(service, "http://acme.test/")
+    second = fetch(service, "http://acme.test/")
+    assert second == first
+    assert "if-none-match" not in requests[0].headers
+    assert requests[1].headers["if-none-match"] == '"v1"'
+
+def test_stops_reading_at_size_cap(monkeypatch):
+    monkeypatch.setattr(server, "URL_FETCH_MAX_BYTES", 1024)
+    sent = []
+    
+    async def body():
+        for _ in range(100):
+            chunk = b"<p>" + b"x" * 509 + b"</p>"
+            sent.append(chunk)
+            yield chunk
+    
+    service = UrlEnrichmentService(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, headers={"Content-Type": "text/html"}, content=body())),
+        allow_private=True
+    )
+    summary = fetch(service, "http://acme.test/")
+    assert summary is not None
+    assert len(sent) <= 3
+
+def test_refuses_private_hosts():
+    requests = []
+    service = UrlEnrichmentService(
+        transport=httpx.MockTransport(lambda request: requests.append(request) or httpx.Response(200, html=PAGE)),
+        allow_private=False
+    )
+    assert fetch(service, "http://127.0.0.1/admin") is None
+    assert fetch(service, "http://localhost:8001/") is None
+    assert requests == []
+
+def test_refuses_redirect_to_private_host():
+    requests = []
+    
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(302, headers={"Location": "http://10.0.0.5/internal"})
+    
+    service = UrlEnrichmentService(transport=httpx.MockTransport(handler), allow_private=False)
+    
+    async def public(host):
+        return "93.184.216.34" if host == "acme.test" else None
+    
+    service._resolve_public = public
+    assert fetch(service, "http://acme.test/") is None
+    assert len(requests) == 1
+
+def test_connects_to_the_checked_address():
+    requests = []
+    
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, html=PAGE)
+    
+    service = UrlEnrichmentService(transport=httpx.MockTransport(handler), allow_private=False)
+    
+    async def public(host):
+        return "93.184.216.34"
+    
+    service._resolve_public = public
+    summary = fetch(service, "https://acme.test:8443/about")
+    assert summary["url"] == "https://acme.test:8443/about"
+    request = requests[0]
+    assert str(request.url) == "https://93.184.216.34:8443/about"
+    assert request.headers["host"] == "acme.test:8443"
+    assert request.extensions["sni_hostname"] == "acme.test"